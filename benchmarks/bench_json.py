@@ -0,0 +1,44 @@
+"""
+benchmark: decode throughput of the installed json backends on pages of full reports
+
+run from the repo root with `PYTHONPATH=. python benchmarks/bench_json.py`
+"""
+import json
+import time
+from pybugsnag.test.fixtures import event_data
+from pybugsnag.utils.serialization import BACKENDS
+
+
+PAGE_SIZE = 100
+PAGES = 50
+
+
+def main():
+    """run the benchmark"""
+    pages = []
+    for page in range(PAGES):
+        events = [
+            event_data(page * PAGE_SIZE + x, full_report=True) for x in range(PAGE_SIZE)
+        ]
+        pages.append(json.dumps(events).encode("utf-8"))
+    size = sum(len(x) for x in pages)
+    results = {}
+    for name in sorted(BACKENDS):
+        loads = BACKENDS[name].loads
+        start = time.perf_counter()
+        for page in pages:
+            loads(page)
+        results[name] = time.perf_counter() - start
+    for name in sorted(results, key=results.get):
+        print(
+            "{:<8} {:>10.1f} MiB/s {:>10.0f} events/s {:>8.2f}x".format(
+                name,
+                size / results[name] / 2 ** 20,
+                PAGE_SIZE * PAGES / results[name],
+                results["json"] / results[name],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+benchmarks: model construction time and throughput on pages of full event reports
+
+run from the repo root with
+`PYTHONPATH=. python benchmarks/bench_model_construction.py`
+"""
+import json
+import time
+from datetime import datetime
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models import Event
+from pybugsnag.models.client import BugsnagDataClient
+from pybugsnag.test.fixtures import event_data
+from pybugsnag.utils.text import (
+    DATE_FORMAT_MILLIS,
+    iso8601_to_datetime,
+    snakeify,
+    snakeify_keys,
+)
+
+
+PAGE_SIZE = 100
+PAGES = 100
+
+
+class EagerJsonEvent(Event):
+    """an event that serializes its payload in the constructor, as models used to"""
+
+    def __init__(self, data, **kwargs):
+        """constructor"""
+        super(EagerJsonEvent, self).__init__(data, **kwargs)
+        self.to_json()
+
+
+def per_model(model, pages):
+    """average construction time per model, in microseconds"""
+    start = time.perf_counter()
+    count = 0
+    for page in pages:
+        for item in page:
+            model(item)
+            count += 1
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def throughput(pages, client=None):
+    """models per second, constructing each model and reading every field"""
+    start = time.perf_counter()
+    count = 0
+    for page in pages:
+        for item in page:
+            model = Event(item, client=client)
+            for field in Event.FIELDS:
+                getattr(model, snakeify(field), None)
+            count += 1
+    return count / (time.perf_counter() - start)
+
+
+def keys_per_second(convert, pages):
+    """snake_case key conversions per second over every nested key of the pages"""
+    keys = []
+    stack = [x for page in pages for x in page]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            keys.extend(value)
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    start = time.perf_counter()
+    for key in keys:
+        convert(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+def dates_per_second(parse, count=100000):
+    """timestamps parsed per second"""
+    start = time.perf_counter()
+    for _ in range(count):
+        parse("2018-09-24T15:23:00.000Z")
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    """run the benchmarks"""
+    pages = [
+        json.loads(
+            json.dumps(
+                [
+                    event_data(page * PAGE_SIZE + x, full_report=True)
+                    for x in range(PAGE_SIZE)
+                ]
+            )
+        )
+        for page in range(PAGES)
+    ]
+    rows = [("eager _json", EagerJsonEvent), ("lazy _json", Event)]
+    results = {name: per_model(model, pages) for name, model in rows}
+    for name, _ in rows:
+        print("{:<12} {:>8.2f} us/model".format(name, results[name]))
+    print(
+        "{:<12} {:>8.2f}x".format(
+            "speedup", results["eager _json"] / results["lazy _json"]
+        )
+    )
+    print("")
+
+    nested = BugsnagDataClient(TEST_TOKEN, snakeify_nested=True)
+    print("{:<24} {:>12.0f} models/s".format("read all fields", throughput(pages)))
+    print(
+        "{:<24} {:>12.0f} models/s".format(
+            "read all fields, nested", throughput(pages, client=nested)
+        )
+    )
+    print(
+        "{:<24} {:>12.0f} keys/s".format(
+            "snakeify", keys_per_second(snakeify.__wrapped__, pages)
+        )
+    )
+    print(
+        "{:<24} {:>12.0f} keys/s".format(
+            "snakeify, memoized", keys_per_second(snakeify, pages)
+        )
+    )
+    start = time.perf_counter()
+    for page in pages:
+        snakeify_keys(page)
+    print(
+        "{:<24} {:>12.0f} models/s".format(
+            "snakeify_keys", PAGE_SIZE * PAGES / (time.perf_counter() - start)
+        )
+    )
+    print("")
+
+    print(
+        "{:<24} {:>12.0f} dates/s".format(
+            "strptime",
+            dates_per_second(lambda x: datetime.strptime(x, DATE_FORMAT_MILLIS)),
+        )
+    )
+    print(
+        "{:<24} {:>12.0f} dates/s".format(
+            "iso8601_to_datetime", dates_per_second(iso8601_to_datetime)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+benchmark: memory retained by 100k event models, eager setattr vs the backing dict
+
+run from the repo root with
+`PYTHONPATH=. python benchmarks/bench_model_memory.py [count]`
+"""
+import gc
+import json
+import sys
+import tracemalloc
+from pybugsnag.models import BaseModel, Event
+from pybugsnag.test.fixtures import event_data
+from pybugsnag.utils.text import snakeify
+
+
+EVENTS = 100000
+
+
+class EagerModel(BaseModel):
+    """
+    the previous model layout: a copied payload, an attribute per key, and the
+    payload serialized up front
+    """
+
+    def __init__(self, data, client=None, **kwargs):
+        """constructor"""
+        # pylint: disable=super-init-not-called
+        self._data = {**data, **kwargs}
+        self._client = client
+        self._serialized = self._jsond(data)
+        for key in self._data:
+            setattr(self, snakeify(key), self._data[key])
+
+
+def retained(model, payloads):
+    """bytes retained by models built over the payloads"""
+    gc.collect()
+    tracemalloc.start()
+    models = [model(x) for x in payloads]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    serialized = sum(sys.getsizeof(x._serialized or "") for x in models)
+    del models
+    return size, size - serialized
+
+
+def main(count=EVENTS):
+    """run the benchmark"""
+    payloads = [
+        json.loads(json.dumps(event_data(x, full_report=True))) for x in range(count)
+    ]
+    json_size = sum(len(json.dumps(x)) for x in payloads)
+    eager, eager_models = retained(EagerModel, payloads)
+    compact, compact_models = retained(Event, payloads)
+    row = "{:<14} {:>10.1f} MiB {:>10.1f} MiB"
+    print("{:<14} {:>14} {:>14}".format("", "total", "without json"))
+    print(row.format("json payloads", json_size / 2 ** 20, json_size / 2 ** 20))
+    print(row.format("eager models", eager / 2 ** 20, eager_models / 2 ** 20))
+    print(row.format("models", compact / 2 ** 20, compact_models / 2 ** 20))
+    print(
+        "{:<14} {:>13.2f}x {:>13.2f}x".format(
+            "reduction", eager / compact, eager_models / compact_models
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,46 @@
+"""
+benchmark: pooled keep-alive session vs a fresh connection per request
+
+run from the repo root with `PYTHONPATH=. python benchmarks/bench_session.py`
+"""
+import time
+import requests
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models.client import BugsnagDataClient
+from pybugsnag.test.server import MockServer
+
+
+REQUESTS = 1000
+
+
+def bench_unpooled(client):
+    """one connection per request, the way the client used to work"""
+    url = "{}user/organizations".format(client.api_url)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        requests.request("get", url, headers=client.headers).json()
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def bench_pooled(client):
+    """requests made through the client's pooled session"""
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        client.get("user/organizations")
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    """run the benchmarks"""
+    with MockServer() as server:
+        server.route("user/organizations", [{"id": "1", "name": "org"}])
+        with BugsnagDataClient(TEST_TOKEN, api_url=server.url) as client:
+            unpooled = bench_unpooled(client)
+            pooled = bench_pooled(client)
+    print("unpooled: {:>10.1f} req/s".format(unpooled))
+    print("pooled:   {:>10.1f} req/s".format(pooled))
+    print("speedup:  {:>10.2f}x".format(pooled / unpooled))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+fixtures for the benchmark suite
+
+the synthetic api runs in a separate process, so neither its cpu time nor its
+memory is counted against the client being measured
+"""
+import os
+import subprocess
+import sys
+import pytest
+import pybugsnag
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models.client import BugsnagDataClient
+
+
+SCALE = {"projects": 4, "errors": 500, "events": 10, "collaborators": 50}
+
+
+@pytest.fixture(scope="session")
+def api_server():
+    """url of a synthetic api server running in a subprocess"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(pybugsnag.__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    command = [sys.executable, "-m", "pybugsnag.test.server"]
+    for name in SCALE:
+        command += ["--{}".format(name), str(SCALE[name])]
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, env=env, universal_newlines=True
+    )
+    try:
+        yield process.stdout.readline().strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.fixture
+def client(api_server):
+    """a client pointed at the synthetic api"""
+    with BugsnagDataClient(TEST_TOKEN, api_url=api_server) as client:
+        yield client
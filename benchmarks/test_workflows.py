@@ -0,0 +1,133 @@
+"""
+benchmark suite for the main client workflows, against the synthetic api
+
+run from the repo root with `PYTHONPATH=. pytest benchmarks/`. besides timings,
+every benchmark reports requests/sec, models/sec and the peak memory allocated
+by one run of the workflow in its extra info
+"""
+import tracemalloc
+import pytest
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models.async_client import AsyncBugsnagDataClient
+from pybugsnag.models.client import BugsnagDataClient
+from pybugsnag.test.helpers import run_async
+from pybugsnag.test.server import SyntheticServer
+from conftest import SCALE
+
+
+pytest.importorskip("pytest_benchmark")
+
+
+PER_PAGE = 100
+
+
+def measure(benchmark, workflow, requests, rounds=5):
+    """benchmarks a workflow returning its models, recording throughput and memory"""
+    models = len(benchmark.pedantic(workflow, rounds=rounds, warmup_rounds=1))
+    if benchmark.stats is None:
+        # --benchmark-disable runs each workflow once, as a smoke test
+        return models
+    tracemalloc.start()
+    workflow()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info.update(
+        {
+            "requests_per_sec": requests / mean,
+            "models_per_sec": models / mean,
+            "peak_memory_kib": peak / 1024,
+        }
+    )
+    return models
+
+
+def pages(count):
+    """requests needed to page through a list"""
+    return -(-count // PER_PAGE)
+
+
+def test_get_project(benchmark, client):
+    """single model lookups"""
+    lookups = 50
+
+    def workflow():
+        """look up projects round robin"""
+        return [client.get_project(x % SCALE["projects"]) for x in range(lookups)]
+
+    assert measure(benchmark, workflow, lookups) == lookups
+
+
+def test_paginate_errors(benchmark, client):
+    """paging through every error of a project"""
+    project = client.get_project(0)
+
+    def workflow():
+        """every error as a model"""
+        return list(project.get_errors(per_page=PER_PAGE))
+
+    assert measure(benchmark, workflow, pages(SCALE["errors"])) == SCALE["errors"]
+
+
+def test_paginate_full_events(benchmark, client):
+    """paging through full reports of the events of a project"""
+    project = client.get_project(0)
+    events = SCALE["errors"] * SCALE["events"]
+
+    def workflow():
+        """read a field off every event, like a report would"""
+        models = list(project.get_events(per_page=PER_PAGE, full_reports=True))
+        assert all(x.app["releaseStage"] for x in models)
+        return models
+
+    assert measure(benchmark, workflow, pages(events), rounds=3) == events
+
+
+def test_fan_out(benchmark, client):
+    """fetching the errors of every project of an organization concurrently"""
+    organization = client.get_organization(0)
+
+    def workflow():
+        """flatten every project's errors"""
+        results = organization.get_errors_for_all_projects(per_page=PER_PAGE)
+        return [x for result in results for x in result.result]
+
+    requests = 1 + SCALE["projects"] * pages(SCALE["errors"])
+    total = SCALE["projects"] * SCALE["errors"]
+    assert measure(benchmark, workflow, requests) == total
+
+
+def test_async_fan_out(benchmark, api_server):
+    """the same fan-out on the async client"""
+    pytest.importorskip("httpx")
+
+    async def fetch():
+        """flatten every project's errors"""
+        async with AsyncBugsnagDataClient(TEST_TOKEN, api_url=api_server) as client:
+            organization = await client.get_organization(0)
+            results = client.map(
+                lambda project: project.get_errors(per_page=PER_PAGE),
+                await organization.projects,
+            )
+            return [x async for result in results for x in result.result]
+
+    requests = 2 + SCALE["projects"] * pages(SCALE["errors"])
+    total = SCALE["projects"] * SCALE["errors"]
+    assert measure(benchmark, lambda: run_async(fetch()), requests) == total
+
+
+def test_latency_bound_fan_out(benchmark):
+    """
+    fan-out when every response takes 20ms, where concurrency pays off most. this
+    server runs in-process, so its peak memory includes the server's share
+    """
+    with SyntheticServer(projects=8, errors=200, latency=0.02, record=False) as server:
+        with BugsnagDataClient(TEST_TOKEN, api_url=server.url) as client:
+            organization = client.get_organization(0)
+
+            def workflow():
+                """flatten every project's errors"""
+                results = organization.get_errors_for_all_projects(per_page=PER_PAGE)
+                return [x for result in results for x in result.result]
+
+            assert measure(benchmark, workflow, 1 + 8 * pages(200), rounds=3) == 1600
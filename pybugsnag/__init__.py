@@ -2,3 +2,4 @@
 pybugsnag main entrypoint for the library
 """
 from pybugsnag.models.client import BugsnagDataClient  # noqa
+from pybugsnag.models.async_client import AsyncBugsnagDataClient  # noqa
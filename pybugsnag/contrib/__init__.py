@@ -0,0 +1,3 @@
+"""
+optional integrations with third party libraries
+"""
@@ -0,0 +1,71 @@
+"""
+opentelemetry tracing for a client's requests
+
+every attempt becomes a client span named after its endpoint template, e.g.
+`GET projects/{id}/errors`
+"""
+from pybugsnag.globals import __version__, LIBRARY
+from pybugsnag.models.error import MissingDependency
+from pybugsnag.utils.hooks import AFTER_RESPONSE, BEFORE_REQUEST, ERROR
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+
+class TracingHooks:
+    """hooks that trace every request attempt as an opentelemetry span"""
+
+    def __init__(self, tracer_provider=None):
+        """constructor"""
+        if trace is None:
+            raise MissingDependency("opentelemetry-api is required for tracing")
+        self.tracer = trace.get_tracer(
+            LIBRARY, __version__, tracer_provider=tracer_provider
+        )
+        self._spans = {}
+
+    def attach(self, hooks):
+        """registers the tracing handlers on a client's hooks"""
+        hooks.register(BEFORE_REQUEST, self._on_request)
+        hooks.register(AFTER_RESPONSE, self._on_response)
+        hooks.register(ERROR, self._on_error)
+        return self
+
+    def _on_request(self, event):
+        """starts the span of an attempt"""
+        attributes = {
+            "http.request.method": event.method,
+            "url.full": event.url,
+            "pybugsnag.endpoint": event.endpoint,
+        }
+        if event.attempt > 1:
+            attributes["http.request.resend_count"] = event.attempt - 1
+        self._spans[event.request_id] = self.tracer.start_span(
+            "{} {}".format(event.method, event.endpoint),
+            kind=trace.SpanKind.CLIENT,
+            attributes=attributes,
+        )
+
+    def _on_response(self, event):
+        """ends the span of an attempt that got a response"""
+        span = self._spans.pop(event.request_id, None)
+        if span is None:
+            return
+        span.set_attribute("http.response.status_code", event.status)
+        span.set_attribute("http.response.body.size", event.size)
+        if event.status >= 400:
+            span.set_attribute("error.type", str(event.status))
+            span.set_status(trace.Status(trace.StatusCode.ERROR))
+        span.end()
+
+    def _on_error(self, event):
+        """ends the span of an attempt that failed without a response"""
+        span = self._spans.pop(event.request_id, None)
+        if span is None:
+            return
+        span.record_exception(event.exception)
+        span.set_attribute("error.type", type(event.exception).__name__)
+        span.set_status(trace.Status(trace.StatusCode.ERROR, str(event.exception)))
+        span.end()
@@ -0,0 +1,85 @@
+"""
+prometheus metrics for a client's requests, labelled by method and endpoint template
+"""
+from pybugsnag.models.error import MissingDependency
+from pybugsnag.utils.hooks import (
+    AFTER_RESPONSE,
+    CACHE_HIT,
+    ERROR,
+    LATENCY_BUCKETS,
+    RETRY,
+)
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+
+LABELS = ["method", "endpoint"]
+
+
+class PrometheusMetrics:
+    """hooks that export request latency, bytes, errors, retries and cache hits"""
+
+    def __init__(self, registry=None, namespace="pybugsnag"):
+        """constructor"""
+        if prometheus_client is None:
+            raise MissingDependency("prometheus_client is required for prometheus")
+        options = {
+            "namespace": namespace,
+            "registry": registry or prometheus_client.REGISTRY,
+        }
+        self.latency = prometheus_client.Histogram(
+            "request_duration_seconds",
+            "latency of bugsnag api requests",
+            LABELS + ["status"],
+            buckets=LATENCY_BUCKETS,
+            **options
+        )
+        self.response_bytes = prometheus_client.Counter(
+            "response_bytes", "bytes received from the bugsnag api", LABELS, **options
+        )
+        self.errors = prometheus_client.Counter(
+            "request_errors",
+            "bugsnag api requests that failed without a response",
+            LABELS + ["error"],
+            **options
+        )
+        self.retries = prometheus_client.Counter(
+            "request_retries", "retried bugsnag api requests", LABELS, **options
+        )
+        self.cache_hits = prometheus_client.Counter(
+            "cache_hits", "responses served from the response cache", LABELS, **options
+        )
+
+    def attach(self, hooks):
+        """registers the metric handlers on a client's hooks"""
+        hooks.register(AFTER_RESPONSE, self._on_response)
+        hooks.register(ERROR, self._on_error)
+        hooks.register(RETRY, self._on_retry)
+        hooks.register(CACHE_HIT, self._on_cache_hit)
+        return self
+
+    def _on_response(self, event):
+        """records the latency and size of a response"""
+        self.latency.labels(event.method, event.endpoint, str(event.status)).observe(
+            event.duration
+        )
+        self.response_bytes.labels(event.method, event.endpoint).inc(event.size)
+
+    def _on_error(self, event):
+        """records a request that failed without a response"""
+        self.latency.labels(event.method, event.endpoint, "error").observe(
+            event.duration
+        )
+        error = type(event.exception).__name__
+        self.errors.labels(event.method, event.endpoint, error).inc()
+
+    def _on_retry(self, event):
+        """records a retry"""
+        self.retries.labels(event.method, event.endpoint).inc()
+
+    def _on_cache_hit(self, event):
+        """records a cache hit"""
+        self.cache_hits.labels(event.method, event.endpoint).inc()
@@ -0,0 +1,267 @@
+"""
+streaming exporters for paginated list endpoints
+
+pages are written as they're fetched and flushed incrementally, so exporting a
+long history of events uses constant memory. with a checkpoint file, an export
+that was interrupted resumes from the last page that was safely written
+"""
+import json
+import os
+import zlib
+from collections import namedtuple
+from pybugsnag.models.error import MissingDependency
+from pybugsnag.utils.serialization import get_json_backend
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+
+ExportResult = namedtuple("ExportResult", ["pages", "rows"])
+
+
+class Checkpoint:
+    """progress of an export, persisted atomically as json"""
+
+    def __init__(self, path):
+        """constructor"""
+        self.path = path
+        self.next_url = None
+        self.pages = 0
+        self.rows = 0
+        # how far the writer's output went at the last checkpoint (see writer.tell)
+        self.offset = None
+        self.done = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as checkpoint_file:
+                state = json.load(checkpoint_file)
+            self.next_url = state["next_url"]
+            self.pages = state["pages"]
+            self.rows = state["rows"]
+            self.offset = state.get("offset")
+            self.done = state["done"]
+
+    @property
+    def started(self):
+        """whether an earlier export already wrote anything"""
+        return self.pages > 0
+
+    def save(self):
+        """writes the checkpoint to disk"""
+        temp_path = "{}.tmp".format(self.path)
+        with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(
+                {
+                    "next_url": self.next_url,
+                    "pages": self.pages,
+                    "rows": self.rows,
+                    "offset": self.offset,
+                    "done": self.done,
+                },
+                checkpoint_file,
+            )
+        os.replace(temp_path, self.path)
+
+
+class NDJSONWriter:
+    """
+    writes one json document per line, gzipped if the path ends in .gz
+
+    every page is flushed as soon as it is written. when gzipped, every page is a
+    complete gzip member (which readers concatenate transparently), so when resuming
+    the file can be cut back to the last checkpointed page and appended to
+    """
+
+    def __init__(self, path, compress=None, json_backend=None):
+        """constructor"""
+        self.path = path
+        self.compress = path.endswith(".gz") if compress is None else compress
+        self.json_backend = get_json_backend(json_backend)
+        self._file = None
+
+    def open(self, append=False, offset=None):
+        """opens the output file, cut back to `offset` bytes when appending"""
+        self._file = open(self.path, "ab" if append else "wb")
+        if append and offset is not None:
+            self._file.truncate(offset)
+
+    def write(self, items):
+        """writes a page of items, returning whether they're flushed to disk"""
+        dumps = self.json_backend.dumps
+        data = "".join("{}\n".format(dumps(x)) for x in items).encode("utf-8")
+        if self.compress:
+            compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+            data = compressor.compress(data) + compressor.flush()
+        self._file.write(data)
+        self._file.flush()
+        return True
+
+    def tell(self):
+        """the size of the output file, in bytes"""
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self, flush=True):
+        """closes the output file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetWriter:
+    """
+    writes columnar parquet files into a directory, one file per row group
+
+    rows are buffered until there are at least `row_group_size` of them, then
+    written to a new part file, so a crash never leaves a partially written file
+    behind. `columns` are pulled out of each item (nested values are stored as json
+    strings), and the whole item is kept as json in a `payload` column unless
+    `include_payload` is False
+    """
+
+    def __init__(
+        self,
+        directory,
+        columns=None,
+        row_group_size=DEFAULT_ROW_GROUP_SIZE,
+        include_payload=True,
+        json_backend=None,
+    ):
+        """constructor"""
+        if pyarrow is None:
+            raise MissingDependency("pyarrow is required for parquet exports")
+        self.directory = directory
+        self.columns = columns
+        self.row_group_size = row_group_size
+        self.include_payload = include_payload
+        self.json_backend = get_json_backend(json_backend)
+        self.schema = None
+        self._rows = []
+        self._part = 0
+
+    def open(self, append=False, offset=None):
+        """
+        creates the output directory, removing the parts of an earlier export. on
+        append, the first `offset` parts (all of them without an offset) are kept
+        and the part numbering continues after them
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        parts = sorted(x for x in os.listdir(self.directory) if x.endswith(".parquet"))
+        keep = 0
+        if append:
+            keep = len(parts) if offset is None else offset
+        for part in parts[keep:]:
+            os.remove(os.path.join(self.directory, part))
+        parts = parts[:keep]
+        if parts:
+            self._part = len(parts)
+            self.schema = pyarrow.parquet.read_schema(
+                os.path.join(self.directory, parts[0])
+            )
+
+    def _row(self, item):
+        """turns an item into a flat row"""
+        dumps = self.json_backend.dumps
+        if self.columns is None:
+            self.columns = [x for x in item if not isinstance(item[x], (dict, list))]
+        row = {}
+        for column in self.columns:
+            value = item.get(column)
+            row[column] = dumps(value) if isinstance(value, (dict, list)) else value
+        if self.include_payload:
+            row["payload"] = dumps(item)
+        return row
+
+    def write(self, items):
+        """buffers a page of items, returning whether everything is flushed to disk"""
+        self._rows.extend(self._row(x) for x in items)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+        return not self._rows
+
+    def tell(self):
+        """the number of part files written"""
+        return self._part
+
+    def flush(self):
+        """writes the buffered rows to a new part file"""
+        if not self._rows:
+            return
+        table = pyarrow.Table.from_pylist(self._rows, schema=self.schema)
+        if self.schema is None:
+            self.schema = table.schema
+        path = os.path.join(self.directory, "part-{:05d}.parquet".format(self._part))
+        temp_path = "{}.tmp".format(path)
+        pyarrow.parquet.write_table(table, temp_path)
+        os.replace(temp_path, path)
+        self._part += 1
+        self._rows = []
+
+    def close(self, flush=True):
+        """flushes any remaining rows, or drops them after a failure"""
+        if flush:
+            self.flush()
+        self._rows = []
+
+
+def _pages(paginator, start, rows):
+    """
+    the items, next url and whether it's the last page for every page to export,
+    after `rows` items were already exported. the page reaching the paginator's
+    limit is cut down to it, and is the last one
+    """
+    limit = getattr(paginator, "limit", None)
+    if limit is not None and rows >= limit:
+        return
+    for page in paginator.pages(start=start):
+        items, last = page.items, page.next_url is None
+        if limit is not None and rows + len(items) >= limit:
+            items, last = items[:limit - rows], True
+        yield items, page.next_url, last
+        if last:
+            return
+        rows += len(items)
+
+
+def export(paginator, writer, checkpoint=None):
+    """
+    streams every page of a paginator into a writer, up to the paginator's `limit`
+    of items if it has one
+
+    with a checkpoint path, progress is saved after every page the writer has
+    flushed, and calling export again with the same checkpoint resumes after the
+    last flushed page (or does nothing, if the export already finished). the
+    checkpoint records how far the output went, so anything written after it (a
+    page, or part of one) is dropped from the output before resuming
+    """
+    state = Checkpoint(checkpoint) if checkpoint else None
+    if state is not None and state.done:
+        return ExportResult(state.pages, state.rows)
+    resume = state is not None and state.started
+    pages, rows = (state.pages, state.rows) if resume else (0, 0)
+    start = state.next_url if resume else None
+    writer.open(append=resume, offset=state.offset if resume else None)
+    try:
+        for items, next_url, last in _pages(paginator, start, rows):
+            flushed = writer.write(items)
+            pages += 1
+            rows += len(items)
+            if state is not None and flushed:
+                state.next_url, state.pages, state.rows = next_url, pages, rows
+                state.offset = writer.tell()
+                # the last page is saved as done, so it is never fetched again
+                state.done = last
+                state.save()
+    except BaseException:
+        # anything not yet flushed is fetched again when the export is resumed
+        writer.close(flush=False)
+        raise
+    writer.close()
+    if state is not None and not state.done:
+        state.next_url, state.pages, state.rows, state.done = None, pages, rows, True
+        state.save()
+    return ExportResult(pages, rows)
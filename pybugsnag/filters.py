@@ -0,0 +1,205 @@
+"""
+composable filters for the list endpoints, compiled into bugsnag's filter params
+
+    from pybugsnag.filters import F
+
+    open_in_production = (F.error.status == "open") & (F.app.release_stage == "prod")
+    project.get_errors(filters=open_in_production)
+
+fields are named by attribute (`F.error.status`), by item (`F["user.email"]`), or
+by one of the ALIASES (`F.error_status`). conditions on different fields are
+combined with `&`, and alternatives for the same field with `|`. note that `&` and
+`|` bind tighter than `==`, so comparisons need parentheses
+"""
+from pybugsnag.models.error import InvalidFilter
+from pybugsnag.utils.text import query_value
+
+
+EQUALS = "eq"
+NOT_EQUALS = "ne"
+EMPTY = "empty"
+
+# shorthands for common fields
+ALIASES = {
+    "error_status": "error.status",
+    "release_stage": "app.release_stage",
+    "severity": "event.severity",
+    "since": "event.since",
+    "before": "event.before",
+    "unhandled": "event.unhandled",
+    "user_id": "user.id",
+    "user_email": "user.email",
+}
+
+
+class Field:
+    """a filterable event field, compared against values to build a filter"""
+
+    def __init__(self, name):
+        """constructor"""
+        self.name = ALIASES.get(name, name)
+
+    def __repr__(self):
+        """repr"""
+        return "F[{!r}]".format(self.name)
+
+    def __getattr__(self, name):
+        """nested fields, like F.app.release_stage"""
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Field("{}.{}".format(self.name, name))
+
+    def __eq__(self, value):
+        """matches events where the field equals a value"""
+        return Filter(((self.name, EQUALS, query_value(value)),))
+
+    def __ne__(self, value):
+        """matches events where the field doesn't equal a value"""
+        return Filter(((self.name, NOT_EQUALS, query_value(value)),))
+
+    __hash__ = object.__hash__
+
+    def is_in(self, values):
+        """matches events where the field equals any of the values"""
+        conditions = tuple((self.name, EQUALS, query_value(x)) for x in values)
+        if not conditions:
+            raise InvalidFilter("is_in() needs at least one value")
+        return Filter(conditions)
+
+    def empty(self, is_empty=True):
+        """matches events where the field is (or isn't) empty"""
+        return Filter(((self.name, EMPTY, query_value(is_empty)),))
+
+
+class _FieldFactory:
+    """creates fields by attribute or by item"""
+
+    def __getattr__(self, name):
+        """F.error_status"""
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Field(name)
+
+    def __getitem__(self, name):
+        """F["user.email"]"""
+        return Field(name)
+
+
+F = _FieldFactory()
+
+
+class Filter:
+    """
+    an immutable set of conditions on event fields
+
+    the api ors conditions on the same field and ands conditions on different
+    fields, so a filter can only be built in those shapes. the query params are
+    compiled once, on first use
+    """
+
+    __slots__ = ("conditions", "_params")
+
+    def __init__(self, conditions):
+        """constructor"""
+        self.conditions = tuple(conditions)
+        self._params = None
+
+    def __repr__(self):
+        """repr"""
+        return "<Filter {}>".format(
+            " & ".join("{} {} {!r}".format(*x) for x in self.conditions)
+        )
+
+    def __eq__(self, other):
+        """filters are equal if they have the same conditions, in any order"""
+        return isinstance(other, Filter) and sorted(self.conditions) == sorted(
+            other.conditions
+        )
+
+    def __hash__(self):
+        """hashable, so filters can be used in cache keys"""
+        return hash(tuple(sorted(self.conditions)))
+
+    @property
+    def fields(self):
+        """the (type, value) conditions of each field, in order"""
+        fields = {}
+        for name, match_type, value in self.conditions:
+            fields.setdefault(name, []).append((match_type, value))
+        return fields
+
+    def __and__(self, other):
+        """requires the conditions of both filters, which must be on other fields"""
+        other = as_filter(other)
+        shared = sorted(set(self.fields) & set(other.fields))
+        if shared:
+            raise InvalidFilter(
+                "the api ors conditions on the same field, use | for {}".format(
+                    ", ".join(shared)
+                )
+            )
+        return Filter(self.conditions + other.conditions)
+
+    def __or__(self, other):
+        """allows either filter, which must both be on the same single field"""
+        other = as_filter(other)
+        if len(set(self.fields) | set(other.fields)) != 1:
+            raise InvalidFilter("only conditions on the same field can be or'ed")
+        return Filter(self.conditions + other.conditions)
+
+    def to_params(self):
+        """
+        the query params of the filter, as (key, value) pairs. conditions are sorted,
+        so the same filter built in any order gives the same params
+        """
+        if self._params is None:
+            params = []
+            for name, match_type, value in sorted(self.conditions):
+                key = "filters[{}][]".format(name)
+                params.append(("{}[type]".format(key), match_type))
+                params.append(("{}[value]".format(key), value))
+            self._params = tuple(params)
+        return self._params
+
+    def validate(self, event_fields):
+        """
+        checks the filter against the event fields of a project (a project or the
+        result of its get_event_fields), raising InvalidFilter for unknown fields
+        and unsupported match types
+        """
+        if hasattr(event_fields, "get_event_fields"):
+            event_fields = event_fields.get_event_fields()
+        options = {x.display_id: x.filter_options or {} for x in event_fields}
+        for name, values in self.fields.items():
+            if name not in options:
+                raise InvalidFilter("unknown filter field '{}'".format(name))
+            match_types = options[name].get("match_types")
+            for match_type, _ in values:
+                if match_types is not None and match_type not in match_types:
+                    raise InvalidFilter(
+                        "'{}' does not support '{}' filters".format(name, match_type)
+                    )
+        return self
+
+
+def as_filter(value):
+    """
+    turns a Filter, or a dict of field names to a value or a list of values, into a
+    Filter
+    """
+    if isinstance(value, Filter):
+        return value
+    if isinstance(value, dict):
+        result = None
+        for name in value:
+            values = value[name]
+            field = Field(name)
+            if isinstance(values, (list, tuple, set)):
+                condition = field.is_in(values)
+            else:
+                condition = field == values
+            result = condition if result is None else result & condition
+        if result is None:
+            raise InvalidFilter("empty filter")
+        return result
+    raise InvalidFilter("can't filter with {!r}".format(value))
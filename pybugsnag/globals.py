@@ -10,5 +10,12 @@ LIBRARY = "pybugsnag"
 API_URL = "https://api.bugsnag.com/"
 
 
+# http session defaults
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_CONCURRENCY = 10
+
+
 TEST_API_URL = "https://private-anon-3633b611b0-bugsnagapiv2.apiary-mock.com/"
 TEST_TOKEN = "access_token"
@@ -1,42 +1,173 @@
 """
 models for each object in the bugsnag data access api
 """
-import json
+import abc
+import inspect
+import urllib.parse
+from collections import namedtuple
 from datetime import datetime
+from operator import methodcaller
+from pybugsnag.filters import as_filter
 from pybugsnag.globals import LIBRARY
+from pybugsnag.models.error import RequestFailed
+from pybugsnag.utils.serialization import STDLIB
 from pybugsnag.utils.text import (
     filter_locals,
     snakeify,
+    snakeify_keys,
     dict_to_query_params,
     datetime_to_iso8601,
     iso8601_to_datetime,
 )
 
 
+PAGINATION_ARGS = ["limit", "max_pages"]
+
+UpdateResult = namedtuple("UpdateResult", ["error_id", "ok", "error"])
+
+
 class BaseModel:
-    """basic model that just parses camelCase json to snake_case keys"""
+    """
+    basic model that exposes camelCase json keys as snake_case attributes
+
+    the payload is kept as-is in a single backing dict, and attributes are resolved
+    from it on access instead of being copied onto the instance. the snake_case to
+    json key mapping is shared by every instance of a model class, and is
+    precomputed from FIELDS, the keys known to be in the payload.
+
+    DATE_FIELDS are parsed into datetimes on first access, so code that never
+    reads them doesn't pay for parsing.
+
+    if the client was created with snakeify_nested=True, nested dicts are also
+    converted to snake_case keys the first time their attribute is accessed.
+
+    RELATIONS map the attributes of related models to the payload keys of their
+    ids. unless the related model was given to the constructor, the attribute
+    resolves to a lazy reference (see Ref) built from the id in the payload
+    """
+
+    FIELDS = []
+    DATE_FIELDS = []
+    RELATIONS = {}
+    _keys = {}
 
     def __init__(self, data, client=None, **kwargs):
         """constructor"""
-        self._data = {**data, **kwargs}
-        self._json = self._jsond(data)
+        self._data = data
+        self._serialized = None
         self._client = client
 
-        for key in self._data:
-            setattr(self, snakeify(key), self._data[key])
+        # related models (project=, error=, ...) are set directly
+        for key in kwargs:
+            setattr(self, snakeify(key), kwargs[key])
+
+    def __init_subclass__(cls, **kwargs):
+        """every model class gets its own key mapping, seeded from its FIELDS"""
+        super().__init_subclass__(**kwargs)
+        cls._keys = {snakeify(x): x for x in cls.FIELDS}
+
+    def _json_key(self, name, data):
+        """finds the payload key for a snake_case attribute name"""
+        if name in data:
+            return name
+        key = self._keys.get(name)
+        if key is not None and key in data:
+            return key
+        key = None
+        for json_key in data:
+            snake_key = snakeify(json_key)
+            self._keys.setdefault(snake_key, json_key)
+            if snake_key == name:
+                key = json_key
+        return key
+
+    def __getattr__(self, name):
+        """resolves an attribute from the backing payload"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        data = self.__dict__.get("_data") or {}
+        key = self._json_key(name, data)
+        if key is None and data.get(self.RELATIONS.get(name)) is not None:
+            value = REFS[name].relation(self, data[self.RELATIONS[name]])
+            self.__dict__[name] = value
+            return value
+        if key is None:
+            raise AttributeError(
+                "'{}' object has no attribute '{}'".format(type(self).__name__, name)
+            )
+        value = data[key]
+        if name in self.DATE_FIELDS:
+            value = iso8601_to_datetime(value)
+            self.__dict__[name] = value
+        elif isinstance(value, (dict, list)) and getattr(
+            self.__dict__.get("_client"), "snakeify_nested", False
+        ):
+            value = snakeify_keys(value)
+            self.__dict__[name] = value
+        return value
+
+    def _merge(self, data, **kwargs):
+        """merges a fresher payload (and related models) into this model"""
+        if data is not self._data:
+            self._data = {**self._data, **data}
+            self._serialized = None
+            # drop the values cached from the old payload, but not related models
+            for key in data:
+                name = snakeify(key)
+                if not isinstance(self.__dict__.get(name, self), BaseModel):
+                    del self.__dict__[name]
+        for key in kwargs:
+            setattr(self, snakeify(key), kwargs[key])
+
+    def __dir__(self):
+        """include the payload's attributes"""
+        return sorted(
+            set(super().__dir__()) | {snakeify(x) for x in self.__dict__["_data"]}
+        )
+
+    @property
+    def _json(self):
+        """the serialized payload"""
+        return self.to_json()
+
+    def to_json(self):
+        """serializes the payload on first use, caching the result"""
+        if self._serialized is None:
+            self._serialized = self._jsond(self._data)
+        return self._serialized
+
+    @property
+    def _json_backend(self):
+        """the json backend of this model's client"""
+        return getattr(self._client, "json_backend", None) or STDLIB
 
     def _jsond(self, json_data):
         """json dumps"""
-        return json.dumps(json_data)
+        return self._json_backend.dumps(json_data)
 
     def _jsonl(self, dictionary):
         """json loads"""
-        return json.loads(dictionary)
+        return self._json_backend.loads(dictionary)
 
 
 class Collaborator(BaseModel):
     """bugsnag user (collaborator) object"""
 
+    FIELDS = [
+        "id",
+        "name",
+        "email",
+        "is_admin",
+        "projects_url",
+        "two_factor_enabled",
+        "two_factor_enabled_on",
+        "password_updated_on",
+        "show_time_in_utc",
+        "created_at",
+        "last_request_at",
+        "pending_invitation",
+    ]
+
     def __init__(self, data, **kwargs):
         """override"""
         super(Collaborator, self).__init__(data, **kwargs)
@@ -49,7 +180,28 @@ class Collaborator(BaseModel):
 class Event(BaseModel):
     """bugsnag event object"""
 
+    FIELDS = [
+        "id",
+        "url",
+        "project_url",
+        "is_full_report",
+        "error_id",
+        "received_at",
+        "exceptions",
+        "threads",
+        "metaData",
+        "request",
+        "app",
+        "device",
+        "user",
+        "breadcrumbs",
+        "context",
+        "severity",
+        "unhandled",
+    ]
+
     DATE_FIELDS = ["received_at"]
+    RELATIONS = {"error": "error_id"}
 
     class Sort:
         """event sort enum"""
@@ -65,12 +217,6 @@ class Event(BaseModel):
     def __init__(self, data, **kwargs):
         """override"""
         super(Event, self).__init__(data, **kwargs)
-        for field in Event.DATE_FIELDS:
-            setattr(
-                self,
-                field,
-                iso8601_to_datetime(getattr(self, field), milliseconds=True),
-            )
 
     def __repr__(self):
         """repr"""
@@ -80,6 +226,8 @@ class Event(BaseModel):
 class EventField(BaseModel):
     """bugsnag eventField object"""
 
+    FIELDS = ["custom", "display_id", "filter_options", "pivot_options"]
+
     def __init__(self, data, **kwargs):
         """override"""
         super(EventField, self).__init__(data, **kwargs)
@@ -94,6 +242,15 @@ class EventField(BaseModel):
 class Pivot(BaseModel):
     """bugsnag pivot object"""
 
+    FIELDS = [
+        "event_field_display_id",
+        "name",
+        "cardinality",
+        "summary",
+        "list",
+        "values",
+    ]
+
     def __init__(self, data, **kwargs):
         """override"""
         super(Pivot, self).__init__(data, **kwargs)
@@ -104,13 +261,68 @@ class Pivot(BaseModel):
             LIBRARY, self.event_field_display_id, self.name
         )
 
+    def get_values(self, **kwargs):
+        """
+        lazily get the values of this pivot, on its error if it has one or else on
+        its project, following pagination
+        """
+        owner = self.__dict__.get("error") or self.project
+        return owner.get_pivot_values(self.event_field_display_id, **kwargs)
+
+
+class PivotValue(BaseModel):
+    """bugsnag pivot value object"""
+
+    FIELDS = ["value", "events", "errors", "proportion"]
+
+    def __init__(self, data, **kwargs):
+        """override"""
+        super(PivotValue, self).__init__(data, **kwargs)
+
+    def __repr__(self):
+        """repr"""
+        return "<{}.PivotValue '{}' ({} events)>".format(
+            LIBRARY, self.value, self.events
+        )
+
 
 class Error(BaseModel):
     """bugsnag error object"""
 
+    FIELDS = [
+        "id",
+        "project_id",
+        "url",
+        "project_url",
+        "error_class",
+        "message",
+        "context",
+        "severity",
+        "original_severity",
+        "overridden_severity",
+        "events",
+        "events_url",
+        "unthrottled_occurrence_count",
+        "users",
+        "first_seen",
+        "last_seen",
+        "first_seen_unfiltered",
+        "last_context_change",
+        "reopen_rules",
+        "status",
+        "comment_count",
+        "missing_dsyms",
+        "release_stages",
+        "grouping_reason",
+        "grouping_fields",
+        "assigned_collaborator_id",
+        "created_issue",
+    ]
+
     MIN_BUCKETS = 1
     MAX_BUCKETS = 50
     DATE_FIELDS = ["first_seen", "last_seen", "first_seen_unfiltered"]
+    RELATIONS = {"project": "project_id"}
 
     class Resolution:
         """time resolution enum"""
@@ -143,30 +355,68 @@ class Error(BaseModel):
         WARNING = "warning"
         INFO = "info"
 
+    class Operation:
+        """error update operation enum"""
+
+        OVERRIDE_SEVERITY = "override_severity"
+        ASSIGN = "assign"
+        CREATE_ISSUE = "create_issue"
+        LINK_ISSUE = "link_issue"
+        UNLINK_ISSUE = "unlink_issue"
+        OPEN = "open"
+        SNOOZE = "snooze"
+        FIX = "fix"
+        IGNORE = "ignore"
+        DELETE = "delete"
+        DISCARD = "discard"
+        UNDISCARD = "undiscard"
+
     def __init__(self, data, **kwargs):
         """override"""
         super(Error, self).__init__(data, **kwargs)
-        for field in Error.DATE_FIELDS:
-            setattr(self, field, iso8601_to_datetime(getattr(self, field)))
 
     def __repr__(self):
         """repr"""
         return "<{}.Error[{}] '{}'>".format(LIBRARY, self.id, self.error_class)
 
+    def update(self, operation, **kwargs):
+        """
+        applies an operation (see Error.Operation) to this error, with its extra
+        params (severity=, assigned_collaborator_id=, reopen_rules=, ...) as
+        keyword arguments, merging the updated payload into this model
+        """
+        path = "projects/{}/errors/{}".format(self.project.id, self.id)
+        return self._client.then(
+            self._client.patch(path, json={"operation": operation, **kwargs}),
+            self._updated,
+        )
+
+    def _updated(self, data):
+        """merges the payload of an update"""
+        if isinstance(data, dict):
+            self._merge(data)
+        return self
+
+    def delete(self):
+        """deletes this error and its events"""
+        return self._client.delete(
+            "projects/{}/errors/{}".format(self.project.id, self.id)
+        )
+
     def get_event(self, event_id):
         """gets an event by id for this error"""
-        return Event(
-            self._client.get("projects/{}/events/{}".format(self.project.id, event_id)),
-            client=self._client,
+        return self._client.get_model(
+            "projects/{}/events/{}".format(self.project.id, event_id),
+            Event,
             project=self.project,
             error=self,
         )
 
     def get_latest_event(self):
         """gets the latest event for this error"""
-        return Event(
-            self._client.get("errors/{}/latest_event".format(self.id)),
-            client=self._client,
+        return self._client.get_model(
+            "errors/{}/latest_event".format(self.id),
+            Event,
             project=self.project,
             error=self,
         )
@@ -177,12 +427,16 @@ class Error(BaseModel):
         sort=Event.Sort.TIMESTAMP,
         direction=Event.Sort.Direction.DESCENDING,
         per_page=30,
-        filters=None,  # TODO
+        filters=None,
         full_reports=False,
+        limit=None,
+        max_pages=None,
         **kwargs
     ):
-        """get events for this error"""
-        params = filter_locals(locals())
+        """lazily get events for this error, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
+        if filters is not None:
+            params["filters"] = as_filter(filters)
 
         if "base" not in params:
             params["base"] = datetime.now()
@@ -191,10 +445,14 @@ class Error(BaseModel):
         path = "projects/{}/errors/{}/events{}".format(
             self.project.id, self.id, query_params
         )
-        return [
-            Event(x, error=self, client=self._client, project=self.project)
-            for x in self._client.get(path)
-        ]
+        return self._client.paginate(
+            path,
+            Event,
+            limit=limit,
+            max_pages=max_pages,
+            error=self,
+            project=self.project,
+        )
 
     def get_trend_buckets(self, buckets_count=10):
         """get trend buckets for this error"""
@@ -215,23 +473,84 @@ class Error(BaseModel):
             )
         )
 
-    def get_pivots(self, summary_size=10, per_page=30):
-        """get a number of pivots for this error"""
-        params = filter_locals(locals())
+    def get_pivots(self, summary_size=10, per_page=30, limit=None, max_pages=None):
+        """lazily get the pivots for this error, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
         query_params = dict_to_query_params(params)
-        return [
-            Pivot(x, project=self.project, error=self, client=self._client)
-            for x in self._client.get(
-                "projects/{}/errors/{}/pivots{}".format(
-                    self.project.id, self.id, query_params
-                )
-            )
-        ]
+        path = "projects/{}/errors/{}/pivots{}".format(
+            self.project.id, self.id, query_params
+        )
+        return self._client.paginate(
+            path,
+            Pivot,
+            limit=limit,
+            max_pages=max_pages,
+            project=self.project,
+            error=self,
+        )
+
+    def get_pivot_values(
+        self,
+        event_field_display_id,
+        base=None,
+        per_page=30,
+        filters=None,
+        limit=None,
+        max_pages=None,
+        **kwargs
+    ):
+        """lazily get the values of a pivot on this error, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
+        del params["event_field_display_id"]
+        if filters is not None:
+            params["filters"] = as_filter(filters)
+
+        query_params = dict_to_query_params(params)
+        path = "projects/{}/errors/{}/pivots/{}/values{}".format(
+            self.project.id,
+            self.id,
+            urllib.parse.quote(event_field_display_id, safe=""),
+            query_params,
+        )
+        return self._client.paginate(
+            path,
+            PivotValue,
+            limit=limit,
+            max_pages=max_pages,
+            project=self.project,
+            error=self,
+        )
 
 
 class Release(BaseModel):
     """bugsnag release object"""
 
+    FIELDS = [
+        "id",
+        "project_id",
+        "release_time",
+        "release_source",
+        "app_version",
+        "app_version_code",
+        "app_bundle_version",
+        "build_label",
+        "builder_name",
+        "build_tool",
+        "errors_introduced_count",
+        "errors_seen_count",
+        "sessions_count_in_last_24h",
+        "total_sessions_count",
+        "unhandled_sessions_count_in_last_24h",
+        "accumulative_daily_users_seen",
+        "accumulative_daily_users_with_unhandled",
+        "metadata",
+        "release_stage",
+        "source_control",
+        "release_group_id",
+    ]
+
+    RELATIONS = {"project": "project_id"}
+
     class Sort:
         """release sort enum"""
 
@@ -258,9 +577,41 @@ class Release(BaseModel):
 class Project(BaseModel):
     """bugsnag project object"""
 
+    FIELDS = [
+        "id",
+        "organization_id",
+        "slug",
+        "name",
+        "api_key",
+        "type",
+        "is_full_view",
+        "release_stages",
+        "language",
+        "created_at",
+        "updated_at",
+        "errors_url",
+        "events_url",
+        "url",
+        "html_url",
+        "open_error_count",
+        "for_review_error_count",
+        "collaborators_count",
+        "global_grouping",
+        "location_grouping",
+        "discarded_app_versions",
+        "discarded_errors",
+        "custom_event_fields_used",
+        "resolve_on_deploy",
+        "url_whitelist",
+        "ignore_old_browsers",
+        "ignored_browser_versions",
+    ]
+
     MIN_BUCKETS = 1
     MAX_BUCKETS = 50
+    MAX_BULK_ERRORS = 100
     DATE_FIELDS = ["created_at", "updated_at"]
+    RELATIONS = {"organization": "organization_id"}
 
     class Resolution:
         """time resolution enum"""
@@ -285,12 +636,6 @@ class Project(BaseModel):
     def __init__(self, data, **kwargs):
         """override"""
         super(Project, self).__init__(data, **kwargs)
-        for field in Project.DATE_FIELDS:
-            setattr(
-                self,
-                field,
-                iso8601_to_datetime(getattr(self, field), milliseconds=True),
-            )
 
     def __repr__(self):
         """repr"""
@@ -298,10 +643,8 @@ class Project(BaseModel):
 
     def get_error(self, error_id):
         """gets an error by id for this project"""
-        return Error(
-            self._client.get("projects/{}/errors/{}".format(self.id, error_id)),
-            client=self._client,
-            project=self,
+        return self._client.get_model(
+            "projects/{}/errors/{}".format(self.id, error_id), Error, project=self
         )
 
     def get_errors(
@@ -310,27 +653,59 @@ class Project(BaseModel):
         sort=Error.Sort.LAST_SEEN,
         direction=Error.Sort.Direction.DESCENDING,
         per_page=30,
-        filters=None,  # TODO
+        filters=None,
+        limit=None,
+        max_pages=None,
         **kwargs
     ):
-        """get errors for this project"""
-        params = filter_locals(locals())
+        """lazily get errors for this project, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
+        if filters is not None:
+            params["filters"] = as_filter(filters)
 
         if "base" not in params:
             params["base"] = datetime.now()
 
         query_params = dict_to_query_params(params)
         path = "projects/{}/errors{}".format(self.id, query_params)
-        return [
-            Error(x, project=self, client=self._client) for x in self._client.get(path)
+        return self._client.paginate(
+            path, Error, limit=limit, max_pages=max_pages, project=self
+        )
+
+    def bulk_update_errors(
+        self, error_ids, operation, chunk_size=None, max_workers=None, **kwargs
+    ):
+        """
+        applies an operation (see Error.Operation) to many errors (or error ids)
+        through the bulk endpoint. the ids are split into chunks of `chunk_size`,
+        sent concurrently with client.map (so within the rate limit), and an
+        UpdateResult is returned per id, in order. a failed chunk fails its ids
+        without aborting the others. on an async client this returns an awaitable
+        """
+        error_ids = list(dict.fromkeys(getattr(x, "id", x) for x in error_ids))
+        chunk_size = chunk_size or Project.MAX_BULK_ERRORS
+        chunks = [
+            error_ids[x:x + chunk_size] for x in range(0, len(error_ids), chunk_size)
         ]
+        body = {"operation": operation, **kwargs}
+        results = self._client.map(
+            lambda chunk: self._client.patch(
+                "projects/{}/errors{}".format(
+                    self.id, dict_to_query_params({"error_ids[]": chunk})
+                ),
+                json=body,
+            ),
+            chunks,
+            max_workers=max_workers,
+        )
+        if inspect.isasyncgen(results):
+            return _aupdate_results(error_ids, results)
+        return _update_results(error_ids, results)
 
     def get_event(self, event_id):
         """gets an event by id for this project"""
-        return Event(
-            self._client.get("projects/{}/events/{}".format(self.id, event_id)),
-            client=self._client,
-            project=self,
+        return self._client.get_model(
+            "projects/{}/events/{}".format(self.id, event_id), Event, project=self
         )
 
     def get_events(
@@ -339,21 +714,25 @@ class Project(BaseModel):
         sort=Event.Sort.TIMESTAMP,
         direction=Event.Sort.Direction.DESCENDING,
         per_page=30,
-        filters=None,  # TODO
+        filters=None,
         full_reports=False,
+        limit=None,
+        max_pages=None,
         **kwargs
     ):
-        """get events for this project"""
-        params = filter_locals(locals())
+        """lazily get events for this project, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
+        if filters is not None:
+            params["filters"] = as_filter(filters)
 
         if "base" not in params:
             params["base"] = datetime.now()
 
         query_params = dict_to_query_params(params)
         path = "projects/{}/events{}".format(self.id, query_params)
-        return [
-            Event(x, project=self, client=self._client) for x in self._client.get(path)
-        ]
+        return self._client.paginate(
+            path, Event, limit=limit, max_pages=max_pages, project=self
+        )
 
     def get_trend_buckets(self, buckets_count=10):
         """get trend buckets for this project"""
@@ -372,10 +751,8 @@ class Project(BaseModel):
 
     def get_release(self, release_id):
         """get a single release by id"""
-        return Release(
-            self._client.get("projects/{}/releases/{}".format(self.id, release_id)),
-            project=self,
-            client=self._client,
+        return self._client.get_model(
+            "projects/{}/releases/{}".format(self.id, release_id), Release, project=self
         )
 
     def get_releases(
@@ -385,42 +762,79 @@ class Project(BaseModel):
         sort=Release.Sort.TIMESTAMP,
         offset=0,
         per_page=5,
+        limit=None,
+        max_pages=None,
     ):
-        """get a list of releases for this project"""
-        params = filter_locals(locals())
+        """lazily get the releases for this project, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
 
         if "base" in params:
             params["base"] = datetime_to_iso8601(params["base"])
 
         query_params = dict_to_query_params(params)
         path = "projects/{}/releases{}".format(self.id, query_params)
-        return [
-            Release(x, project=self, client=self._client)
-            for x in self._client.get(path)
-        ]
+        return self._client.paginate(
+            path, Release, limit=limit, max_pages=max_pages, project=self
+        )
 
-    def get_pivots(self, summary_size=10):
-        """get a number of pivots for this project"""
-        params = filter_locals(locals())
+    def get_pivots(self, summary_size=10, limit=None, max_pages=None):
+        """lazily get the pivots for this project, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
         query_params = dict_to_query_params(params)
-        return [
-            Pivot(x, project=self, client=self._client)
-            for x in self._client.get(
-                "projects/{}/pivots{}".format(self.id, query_params)
-            )
-        ]
+        path = "projects/{}/pivots{}".format(self.id, query_params)
+        return self._client.paginate(
+            path, Pivot, limit=limit, max_pages=max_pages, project=self
+        )
 
-    def get_event_fields(self):
-        """gets a list of event fields for the project"""
-        return [
-            EventField(x, project=self, client=self._client)
-            for x in self._client.get("projects/{}/event_fields".format(self.id))
-        ]
+    def get_pivot_values(
+        self,
+        event_field_display_id,
+        base=None,
+        per_page=30,
+        filters=None,
+        limit=None,
+        max_pages=None,
+        **kwargs
+    ):
+        """lazily get the values of a pivot on this project, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
+        del params["event_field_display_id"]
+        if filters is not None:
+            params["filters"] = as_filter(filters)
+
+        query_params = dict_to_query_params(params)
+        path = "projects/{}/pivots/{}/values{}".format(
+            self.id, urllib.parse.quote(event_field_display_id, safe=""), query_params
+        )
+        return self._client.paginate(
+            path, PivotValue, limit=limit, max_pages=max_pages, project=self
+        )
+
+    def get_event_fields(self, limit=None, max_pages=None):
+        """lazily get the event fields for the project, following pagination"""
+        path = "projects/{}/event_fields".format(self.id)
+        return self._client.paginate(
+            path, EventField, limit=limit, max_pages=max_pages, project=self
+        )
 
 
 class Organization(BaseModel):
     """bugsnag organization object"""
 
+    FIELDS = [
+        "id",
+        "name",
+        "slug",
+        "creator",
+        "collaborators_url",
+        "projects_url",
+        "created_at",
+        "updated_at",
+        "auto_upgrade",
+        "upgrade_url",
+        "billing_emails",
+    ]
+
     DATE_FIELDS = ["created_at", "updated_at"]
 
     def __init__(self, data, **kwargs):
@@ -429,12 +843,6 @@ class Organization(BaseModel):
         self._projects = None
         self._collaborators = None
         self._admins_count = None
-        for field in Organization.DATE_FIELDS:
-            setattr(
-                self,
-                field,
-                iso8601_to_datetime(getattr(self, field), milliseconds=True),
-            )
 
     def __repr__(self):
         """repr"""
@@ -444,24 +852,25 @@ class Organization(BaseModel):
     def projects(self):
         """cachable projects property"""
         if not self._projects or not self._client.cache:
-            self._projects = self.get_projects()
+            self._projects = self._client.collect(self.get_projects())
         return self._projects
 
     @property
     def collaborators(self):
         """cachable collaborators property"""
         if not self._collaborators or not self._client.cache:
-            self._collaborators = self.get_collaborators()
+            self._collaborators = self._client.collect(self.get_collaborators())
         return self._collaborators
 
     @property
     def admins_count(self):
         """gets the count of admin collaborators"""
         if not self._admins_count or not self._client.cache:
-            self._admins_count = int(
+            self._admins_count = self._client.then(
                 self._client.get(
                     "organizations/{}/admins_count".format(self.id), raw=True
-                ).text
+                ),
+                lambda request: int(request.text),
             )
         return self._admins_count
 
@@ -470,34 +879,265 @@ class Organization(BaseModel):
         sort=Project.Sort.CREATED_AT,
         direction=Project.Sort.Direction.DESCENDING,
         per_page=30,
+        limit=None,
+        max_pages=None,
     ):
-        """gets the projects based on the params"""
-        params = filter_locals(locals())
+        """lazily get the projects based on the params, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
         query_params = dict_to_query_params(params)
 
         path = "organizations/{}/projects{}".format(self.id, query_params)
-        return [
-            Project(x, organization=self, client=self._client)
-            for x in self._client.get(path)
-        ]
+        return self._client.paginate(
+            path, Project, limit=limit, max_pages=max_pages, organization=self
+        )
 
-    def get_collaborators(self, per_page=30, q=None, exclude_project=None):
-        """get collaborators for this organization"""
-        params = filter_locals(locals())
+    def get_collaborators(
+        self, per_page=30, q=None, exclude_project=None, limit=None, max_pages=None
+    ):
+        """lazily get collaborators for this organization, following pagination"""
+        params = filter_locals(locals(), extras=PAGINATION_ARGS)
         query_params = dict_to_query_params(params)
 
         path = "organizations/{}/collaborators{}".format(self.id, query_params)
-        return [
-            Collaborator(x, organization=self, client=self._client)
-            for x in self._client.get(path)
-        ]
+        return self._client.paginate(
+            path, Collaborator, limit=limit, max_pages=max_pages, organization=self
+        )
+
+    def get_errors_for_all_projects(self, max_workers=None, **kwargs):
+        """
+        get errors for every project in this organization concurrently, yielding a
+        MapResult tagged with its project as each one completes
+        """
+        return self._client.map(
+            lambda project: project.get_errors(**kwargs),
+            self.projects,
+            max_workers=max_workers,
+        )
+
+    def get_events_for_all_projects(self, max_workers=None, **kwargs):
+        """
+        get events for every project in this organization concurrently, yielding a
+        MapResult tagged with its project as each one completes
+        """
+        return self._client.map(
+            lambda project: project.get_events(**kwargs),
+            self.projects,
+            max_workers=max_workers,
+        )
 
     def get_collaborator(self, collaborator_id):
         """get collaborator by id"""
-        return Collaborator(
-            self._client.get(
-                "organizations/{}/collaborators/{}".format(self.id, collaborator_id)
-            ),
+        return self._client.get_model(
+            "organizations/{}/collaborators/{}".format(self.id, collaborator_id),
+            Collaborator,
             organization=self,
-            client=self._client,
         )
+
+
+class Ref(abc.ABC):
+    """
+    lazy id-only reference to a model, fetched on first attribute access
+
+    the id (and the related models given to the constructor) are available without
+    any request. methods of the model that only need the id, such as
+    ProjectRef.get_errors(), are called on the reference directly, and any other
+    attribute fetches the model once, through the client's identity map. on an
+    async client, `await ref.fetch()` (or materialize) first
+    """
+
+    MODEL = None
+    # methods of the model that only need the id (and related models)
+    ID_METHODS = ()
+
+    def __init__(self, client, model_id, **kwargs):
+        """constructor"""
+        self._client = client
+        self._model = None
+        self._related = kwargs
+        self.id = model_id
+
+        # related models (project=, ...) are set directly
+        for key in kwargs:
+            setattr(self, snakeify(key), kwargs[key])
+
+    def __repr__(self):
+        """repr"""
+        return "<{}.{}[{}]{}>".format(
+            LIBRARY,
+            type(self).__name__,
+            self.id,
+            "" if self._model is None else " (materialized)",
+        )
+
+    @classmethod
+    def relation(cls, owner, model_id):
+        """reference to the related model of `owner`, from its id in the payload"""
+        return cls(owner._client, model_id)
+
+    @property
+    def materialized(self):
+        """whether the model has been fetched"""
+        return self._model is not None
+
+    def _lookup(self):
+        """the model, if it has already been fetched (or built) by the client"""
+        if self._model is None:
+            identity_map = getattr(self._client, "identity_map", None)
+            if identity_map is not None:
+                self._model = identity_map.get(self.MODEL, self.id)
+        return self._model
+
+    @abc.abstractmethod
+    def _get(self):
+        """fetches the model, or an awaitable of it on an async client"""
+
+    def _set(self, model):
+        """keeps the fetched model"""
+        self._model = model
+        return model
+
+    def _updated(self, data):
+        """keeps the payload of an update (through a model method) as the model"""
+        if isinstance(data, dict):
+            self._set(self._client.build(self.MODEL, data, **self._related))
+        return self
+
+    def fetch(self):
+        """fetches the model (even if it was already), returning it"""
+        return self._client.then(self._get(), self._set)
+
+    def resolve(self):
+        """the model, fetching it if it hasn't been yet"""
+        if self._lookup() is None:
+            model = self._get()
+            if inspect.isawaitable(model):
+                model.close()
+                raise TypeError(
+                    "await {!r}.fetch() before reading its attributes".format(self)
+                )
+            self._set(model)
+        return self._model
+
+    def __getattr__(self, name):
+        """id-only model methods are bound to the reference, anything else is fetched"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in self.ID_METHODS and self._lookup() is None:
+            return getattr(self.MODEL, name).__get__(self)
+        return getattr(self.resolve(), name)
+
+
+class OrganizationRef(Ref):
+    """lazy reference to an organization"""
+
+    MODEL = Organization
+    ID_METHODS = ("get_projects", "get_collaborators", "get_collaborator")
+
+    def _get(self):
+        """override"""
+        return self._client.get_organization(self.id)
+
+
+class ProjectRef(Ref):
+    """lazy reference to a project"""
+
+    MODEL = Project
+    ID_METHODS = (
+        "get_error",
+        "get_errors",
+        "bulk_update_errors",
+        "get_event",
+        "get_events",
+        "get_trend_buckets",
+        "get_trend_resolution",
+        "get_release",
+        "get_releases",
+        "get_pivots",
+        "get_pivot_values",
+        "get_event_fields",
+    )
+
+    def _get(self):
+        """override"""
+        return self._client.get_project(self.id)
+
+
+class ErrorRef(Ref):
+    """lazy reference to an error of a project (or a reference to one)"""
+
+    MODEL = Error
+    ID_METHODS = (
+        "update",
+        "delete",
+        "get_event",
+        "get_latest_event",
+        "get_events",
+        "get_trend_buckets",
+        "get_trend_resolution",
+        "get_pivots",
+        "get_pivot_values",
+    )
+
+    @classmethod
+    def relation(cls, owner, model_id):
+        """override - errors are fetched through their project"""
+        return cls(owner._client, model_id, project=getattr(owner, "project", None))
+
+    def _get(self):
+        """override"""
+        project = self.__dict__.get("project")
+        if project is None:
+            raise ValueError("{!r} has no project to fetch it from".format(self))
+        return project.get_error(self.id)
+
+
+REFS = {"organization": OrganizationRef, "project": ProjectRef, "error": ErrorRef}
+
+
+def materialize(refs, max_workers=None):
+    """
+    fetches many references concurrently with client.map, returning their models
+    in order. references already fetched or in the client's identity map cost no
+    request. a reference the api answered with an error status (RequestFailed,
+    like a 404) is left unfetched, with None in its place, while other failures
+    are raised. on an async client this returns an awaitable
+    """
+    refs = list(refs)
+    if not refs:
+        return []
+    client = refs[0]._client
+    pending = [x for x in refs if x._lookup() is None]
+    fetched = client.map(methodcaller("fetch"), pending, max_workers=max_workers)
+    if inspect.isasyncgen(fetched):
+        return _amaterialize(refs, fetched)
+    return _materialized(refs, list(fetched))
+
+
+def _update_results(error_ids, results):
+    """expands the MapResults of bulk update chunks into per-id UpdateResults"""
+    by_id = {}
+    for result in results:
+        for error_id in result.item:
+            by_id[error_id] = UpdateResult(error_id, result.error is None, result.error)
+    return [by_id[x] for x in error_ids]
+
+
+async def _aupdate_results(error_ids, results):
+    """awaits the chunks of a bulk update on an async client"""
+    return _update_results(error_ids, [x async for x in results])
+
+
+async def _amaterialize(refs, fetched):
+    """awaits the fetches of materialize on an async client"""
+    return _materialized(refs, [x async for x in fetched])
+
+
+def _materialized(refs, results):
+    """
+    the models of references, None for those that weren't fetched, raising the
+    first failure that isn't an error status
+    """
+    for result in results:
+        if result.error is not None and not isinstance(result.error, RequestFailed):
+            raise result.error
+    return [x._model for x in refs]
@@ -0,0 +1,251 @@
+"""
+asyncio client model, sharing the models and their parsing with the sync client
+"""
+import asyncio
+import inspect
+import time
+import urllib.parse
+from pybugsnag.globals import DEFAULT_MAX_CONCURRENCY
+from pybugsnag.models.client import BugsnagDataClient, MapResult
+from pybugsnag.models.error import MissingDependency, RateLimited
+from pybugsnag.models.pagination import AsyncPaginator, Page
+from pybugsnag.utils.cache import CacheEntry
+from pybugsnag.utils.hooks import CACHE_HIT
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+class AsyncBugsnagDataClient(BugsnagDataClient):
+    """
+    asyncio client http wrapper
+
+    model methods called through this client are awaitable, and list endpoints
+    are async iterators. it shares the sync client's setup and helpers, but its
+    request methods are coroutines, so it can't stand in for a sync client
+    """
+
+    # pylint: disable=invalid-overridden-method
+
+    def __init__(self, token, max_concurrency=DEFAULT_MAX_CONCURRENCY, **kwargs):
+        """creates a new async client"""
+        if httpx is None:
+            raise MissingDependency("httpx is required for AsyncBugsnagDataClient")
+        super(AsyncBugsnagDataClient, self).__init__(token, **kwargs)
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    def __enter__(self):
+        """the sync context manager would leak the async pool - use `async with`"""
+        raise TypeError(
+            "use 'async with' instead of 'with' for {}".format(type(self).__name__)
+        )
+
+    def __exit__(self, *args):
+        """see __enter__"""
+        raise TypeError(
+            "use 'async with' instead of 'with' for {}".format(type(self).__name__)
+        )
+
+    async def __aenter__(self):
+        """async context manager entry"""
+        return self
+
+    async def __aexit__(self, *args):
+        """async context manager exit - releases pooled connections"""
+        await self.close()
+
+    def _create_session(self):
+        """creates a pooled async http session for this client"""
+        return httpx.AsyncClient(
+            headers=self._headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.pool_maxsize,
+                max_keepalive_connections=self.pool_connections
+                if self.keep_alive
+                else 0,
+            ),
+        )
+
+    @property
+    def semaphore(self):
+        """lazily created semaphore bounding the number of in-flight requests"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        """closes the http session and any pooled connections"""
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+    async def _req(self, path, method="get", **kwargs):
+        """requests wrapper"""
+        full_path = urllib.parse.urljoin(self.api_url, path)
+        self._log("[{}]: {}".format(method.upper(), full_path))
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.rate_limiter.acquire_async()
+            async with self.semaphore:
+                context = self._before_attempt(method, full_path, attempt, started)
+                try:
+                    request = await self.session.request(
+                        method.upper(), full_path, **kwargs
+                    )
+                except Exception as exception:
+                    self._after_attempt(
+                        method, full_path, context, exception=exception
+                    )
+                    if not isinstance(exception, httpx.TransportError):
+                        raise
+                    delay = self._retry_delay(
+                        method, full_path, attempt, started, exception=exception
+                    )
+                    if delay is None:
+                        raise
+                else:
+                    self._after_attempt(method, full_path, context, request=request)
+                    self.rate_limiter.update(request.headers)
+                    delay = self._retry_delay(
+                        method, full_path, attempt, started, request=request
+                    )
+                    if delay is None:
+                        break
+            await asyncio.sleep(delay)
+        if request.status_code == 429:
+            raise RateLimited(
+                "gave up after {} attempt(s) for {}".format(attempt, full_path)
+            )
+        return request
+
+    async def _get_entry(self, path, **kwargs):
+        """
+        makes a get request to the API, sharing it with identical concurrent gets
+        """
+        key = self._flight_key(path, kwargs)
+        if key is None:
+            return await self._fetch_entry(path, **kwargs)
+        return await self.single_flight.do_async(key, lambda: self._fetch_entry(path))
+
+    async def _fetch_entry(self, path, **kwargs):
+        """makes a get request to the API, through the response cache if enabled"""
+        url = urllib.parse.urljoin(self.api_url, path)
+        cache = self.response_cache
+        if cache is None:
+            return CacheEntry.from_response(
+                url,
+                self._check(await self._req(path, **kwargs)),
+                loads=self.json_backend.loads,
+            )
+        stale, fresh = cache.lookup(url, namespace=self.cache_namespace)
+        if fresh:
+            self.hooks.emit(CACHE_HIT, "get", url)
+            return stale
+        kwargs["headers"] = {
+            **kwargs.get("headers", {}),
+            **cache.conditional_headers(stale),
+        }
+        return cache.update(
+            url,
+            self._check(await self._req(path, **kwargs)),
+            stale,
+            loads=self.json_backend.loads,
+            namespace=self.cache_namespace,
+        )
+
+    async def get(self, path, raw=False, **kwargs):
+        """makes a get request to the API"""
+        if raw:
+            return await self._req(path, **kwargs)
+        return (await self._get_entry(path, **kwargs)).data
+
+    async def post(self, path, raw=False, **kwargs):
+        """makes a post request to the API"""
+        request = await self._req(path, method="post", **kwargs)
+        return request if raw else self._decode(request)
+
+    async def put(self, path, raw=False, **kwargs):
+        """makes a put request to the API"""
+        request = await self._req(path, method="put", **kwargs)
+        return request if raw else self._decode(request)
+
+    async def patch(self, path, raw=False, **kwargs):
+        """makes a patch request to the API"""
+        request = await self._req(path, method="patch", **kwargs)
+        return request if raw else self._decode(request)
+
+    async def delete(self, path, raw=False, **kwargs):
+        """makes a delete request to the API"""
+        request = await self._req(path, method="delete", **kwargs)
+        return request if raw else self._decode(request)
+
+    async def iter_pages(self, path, max_pages=None, **kwargs):
+        """follows the rel="next" link headers of a list endpoint, page by page"""
+        pages = 0
+        while path and (max_pages is None or pages < max_pages):
+            entry = await self._get_entry(path, **kwargs)
+            yield Page(entry.data, path, entry.next_url)
+            pages += 1
+            path = entry.next_url
+
+    def paginate(self, path, model, limit=None, max_pages=None, **kwargs):
+        """lazy async iterable over the models from every page of a list endpoint"""
+        return AsyncPaginator(
+            self, path, model, limit=limit, max_pages=max_pages, **kwargs
+        )
+
+    async def get_model(self, path, model, **kwargs):
+        """gets a single object from the API as the given model"""
+        return self.build(model, await self.get(path), **kwargs)
+
+    async def _collect(self, iterable):
+        """collects an async iterator into a list"""
+        return [x async for x in iterable]
+
+    async def _then(self, result, callback):
+        """awaits a request and applies a callback to its result"""
+        return callback(await result)
+
+    def collect(self, iterable):
+        """collects a lazy list endpoint into a list, as a reusable future"""
+        return asyncio.ensure_future(self._collect(iterable))
+
+    def then(self, result, callback):
+        """applies a callback to the result of a request, as a reusable future"""
+        return asyncio.ensure_future(self._then(result, callback))
+
+    async def _call(self, func, item, semaphore):
+        """calls func on an item, capturing its result or failure"""
+        async with semaphore:
+            try:
+                result = func(item)
+                if hasattr(result, "__aiter__"):
+                    result = await self._collect(result)
+                elif inspect.isawaitable(result):
+                    result = await result
+            except Exception as error:
+                return MapResult(item, None, error)
+        return MapResult(item, result, None)
+
+    async def map(self, func, items, max_workers=None):
+        """
+        calls func on every item with bounded concurrency, yielding a MapResult per
+        item as they complete. a failure is captured in the MapResult of its item
+        instead of aborting the rest of the batch
+        """
+        if inspect.isawaitable(items):
+            items = await items
+        semaphore = asyncio.Semaphore(max_workers or self.max_concurrency)
+        tasks = [asyncio.ensure_future(self._call(func, x, semaphore)) for x in items]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,11 +1,51 @@
 """
 base client model to create and use http endpoints
 """
+import hashlib
 import requests
+import requests.adapters
+import time
+import types
 import urllib.parse
-from pybugsnag.globals import __version__, API_URL, LIBRARY, TEST_TOKEN, TEST_API_URL
-from pybugsnag.models.error import RateLimited
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pybugsnag.globals import (
+    __version__,
+    API_URL,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    LIBRARY,
+    TEST_TOKEN,
+    TEST_API_URL,
+)
+from pybugsnag.models.error import RateLimited, RequestFailed
+from pybugsnag.models.identity import IdentityMap
+from pybugsnag.models.pagination import Page, Paginator
 from pybugsnag.models import Organization, Project
+from pybugsnag.utils.cache import (
+    CacheBackend,
+    CacheEntry,
+    ResponseCache,
+    normalize_url,
+)
+from pybugsnag.utils.hooks import (
+    AFTER_RESPONSE,
+    BEFORE_REQUEST,
+    CACHE_HIT,
+    ERROR,
+    RETRY,
+    Hooks,
+    MetricsCollector,
+)
+from pybugsnag.utils.ratelimit import RateLimiter
+from pybugsnag.utils.retry import RetryAttempt, RetryPolicy
+from pybugsnag.utils.serialization import get_json_backend
+from pybugsnag.utils.singleflight import SingleFlight
+
+
+MapResult = namedtuple("MapResult", ["item", "result", "error"])
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
 
 
 def test_client():
@@ -16,7 +56,27 @@ def test_client():
 class BugsnagDataClient:
     """client http wrapper"""
 
-    def __init__(self, token, api_url=API_URL, cache=True, debug=False):
+    def __init__(
+        self,
+        token,
+        api_url=API_URL,
+        cache=True,
+        debug=False,
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        keep_alive=True,
+        timeout=DEFAULT_TIMEOUT,
+        rate_limit=None,
+        rate_limiter=None,
+        retry_policy=None,
+        response_cache=None,
+        snakeify_nested=False,
+        json_backend=None,
+        hooks=None,
+        metrics=None,
+        identity_map=True,
+        coalesce=True,
+    ):
         """creates a new client"""
         if not token:
             raise Exception("no token specified!")
@@ -25,19 +85,92 @@ class BugsnagDataClient:
         self.version = __version__
         self.cache = cache
         self.debug = debug
+        self.snakeify_nested = snakeify_nested
+        # orjson or ujson if installed, falling back to the stdlib json module
+        self.json_backend = get_json_backend(json_backend)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        # requests per minute - learned from the quota headers if not given
+        self.rate_limiter = rate_limiter or RateLimiter(rate=rate_limit)
+        self.retry_policy = retry_policy or RetryPolicy()
+        if isinstance(response_cache, CacheBackend):
+            response_cache = ResponseCache(backend=response_cache)
+        self.response_cache = response_cache
+        # lifecycle events of every request, and optional metrics built on them
+        self.hooks = hooks or Hooks()
+        if metrics is True:
+            metrics = MetricsCollector()
+        self.metrics = metrics.attach(self.hooks) if metrics else None
+        # one shared model instance per entity, unless disabled with False
+        if identity_map is True:
+            identity_map = IdentityMap()
+        self.identity_map = identity_map if identity_map is not False else None
+        # concurrent identical gets share one request, unless disabled with False
+        if coalesce is True:
+            coalesce = SingleFlight()
+        self.single_flight = coalesce if coalesce is not False else None
+
+        # the headers never change for the lifetime of the client, so build them once
+        self._headers = self._build_headers()
+        self._session = None
+        # response cache entries are only shared between clients with the same token
+        self.cache_namespace = hashlib.sha256(
+            self._headers["Authorization"].encode("utf-8")
+        ).hexdigest()[:16]
 
         # cache
         self._organizations = None
 
-    @property
-    def headers(self):
+    def __enter__(self):
+        """context manager entry"""
+        return self
+
+    def __exit__(self, *args):
+        """context manager exit - releases pooled connections"""
+        self.close()
+
+    def _build_headers(self):
         """forms the headers required for the API calls"""
-        return {
+        headers = {
             "Accept": "application/json; version=2",
-            "AcceptEncoding": "gzip, deflate",
+            "Accept-Encoding": "gzip, deflate",
             "Authorization": "token {}".format(self.token),
             "User-Agent": "{}/{}".format(LIBRARY, self.version),
         }
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+        return headers
+
+    @property
+    def headers(self):
+        """the headers required for the API calls"""
+        return self._headers
+
+    def _create_session(self):
+        """creates a pooled http session for this client"""
+        session = requests.Session()
+        session.headers.update(self._headers)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self):
+        """lazily created pooled http session"""
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def close(self):
+        """closes the http session and any pooled connections"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
 
     def _log(self, *args):
         """logging method"""
@@ -45,45 +178,273 @@ class BugsnagDataClient:
             return
         print(*args)
 
+    def on(self, event, handler=None):
+        """registers a request lifecycle hook, usable as a decorator"""
+        return self.hooks.register(event, handler)
+
+    def _before_attempt(self, method, full_path, attempt, started):
+        """fires the before_request hook, returning the context of the attempt"""
+        request_id = self.hooks.next_id()
+        self.hooks.emit(
+            BEFORE_REQUEST, method, full_path, request_id=request_id, attempt=attempt
+        )
+        return request_id, attempt, started, time.monotonic()
+
+    def _after_attempt(self, method, full_path, context, request=None, **kwargs):
+        """fires the after_response hook, or the error hook if there's no response"""
+        request_id, attempt, started, sent = context
+        now = time.monotonic()
+        if request is None:
+            event = ERROR
+        else:
+            event = AFTER_RESPONSE
+            kwargs["status"] = request.status_code
+            length = request.headers.get("Content-Length")
+            kwargs["size"] = int(length) if length else len(request.content)
+        self.hooks.emit(
+            event,
+            method,
+            full_path,
+            request_id=request_id,
+            attempt=attempt,
+            duration=now - sent,
+            elapsed=now - started,
+            **kwargs
+        )
+
+    def _retry_delay(
+        self, method, full_path, attempt, started, request=None, exception=None
+    ):
+        """
+        decides whether an attempt should be retried, returning the delay before the
+        next attempt or None if it shouldn't be retried
+        """
+        status = request.status_code if request is not None else None
+        if not self.retry_policy.should_retry(method, attempt, status=status):
+            return None
+        headers = request.headers if request is not None else None
+        delay = self.retry_policy.delay(attempt, headers=headers)
+        self._log(
+            "[RETRY {}]: {} in {:.2f}s".format(attempt, status or exception, delay)
+        )
+        elapsed = time.monotonic() - started
+        self.retry_policy.report(
+            RetryAttempt(
+                method.upper(), full_path, attempt, delay, status, exception, elapsed
+            )
+        )
+        self.hooks.emit(
+            RETRY,
+            method,
+            full_path,
+            attempt=attempt,
+            status=status,
+            elapsed=elapsed,
+            delay=delay,
+            exception=exception,
+        )
+        return delay
+
     def _req(self, path, method="get", **kwargs):
         """requests wrapper"""
         full_path = urllib.parse.urljoin(self.api_url, path)
         self._log("[{}]: {}".format(method.upper(), full_path))
-        request = requests.request(method, full_path, headers=self.headers, **kwargs)
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.acquire()
+            context = self._before_attempt(method, full_path, attempt, started)
+            try:
+                request = self.session.request(method, full_path, **kwargs)
+            except Exception as exception:
+                self._after_attempt(method, full_path, context, exception=exception)
+                if not isinstance(exception, TRANSIENT_ERRORS):
+                    raise
+                delay = self._retry_delay(
+                    method, full_path, attempt, started, exception=exception
+                )
+                if delay is None:
+                    raise
+            else:
+                self._after_attempt(method, full_path, context, request=request)
+                self.rate_limiter.update(request.headers)
+                delay = self._retry_delay(
+                    method, full_path, attempt, started, request=request
+                )
+                if delay is None:
+                    break
+            time.sleep(delay)
         if request.status_code == 429:
-            raise RateLimited()
+            raise RateLimited(
+                "gave up after {} attempt(s) for {}".format(attempt, full_path)
+            )
         return request
 
+    def _flight_key(self, path, kwargs):
+        """the single-flight key of a get request, or None if it can't be shared"""
+        if self.single_flight is None or kwargs:
+            return None
+        return normalize_url(urllib.parse.urljoin(self.api_url, path))
+
+    def _get_entry(self, path, **kwargs):
+        """
+        makes a get request to the API, sharing it with identical concurrent gets
+        """
+        key = self._flight_key(path, kwargs)
+        if key is None:
+            return self._fetch_entry(path, **kwargs)
+        return self.single_flight.do(key, lambda: self._fetch_entry(path))
+
+    def _fetch_entry(self, path, **kwargs):
+        """makes a get request to the API, through the response cache if enabled"""
+        url = urllib.parse.urljoin(self.api_url, path)
+        cache = self.response_cache
+        if cache is None:
+            return CacheEntry.from_response(
+                url,
+                self._check(self._req(path, **kwargs)),
+                loads=self.json_backend.loads,
+            )
+        stale, fresh = cache.lookup(url, namespace=self.cache_namespace)
+        if fresh:
+            self.hooks.emit(CACHE_HIT, "get", url)
+            return stale
+        kwargs["headers"] = {
+            **kwargs.get("headers", {}),
+            **cache.conditional_headers(stale),
+        }
+        return cache.update(
+            url,
+            self._check(self._req(path, **kwargs)),
+            stale,
+            loads=self.json_backend.loads,
+            namespace=self.cache_namespace,
+        )
+
     def get(self, path, raw=False, **kwargs):
         """makes a get request to the API"""
-        request = self._req(path, **kwargs)
-        return request if raw else request.json()
+        if raw:
+            return self._req(path, **kwargs)
+        return self._get_entry(path, **kwargs).data
 
     def post(self, path, raw=False, **kwargs):
         """makes a post request to the API"""
         request = self._req(path, method="post", **kwargs)
-        return request if raw else request.json()
+        return request if raw else self._decode(request)
 
     def put(self, path, raw=False, **kwargs):
         """makes a put request to the API"""
         request = self._req(path, method="put", **kwargs)
-        return request if raw else request.json()
+        return request if raw else self._decode(request)
+
+    def patch(self, path, raw=False, **kwargs):
+        """makes a patch request to the API"""
+        request = self._req(path, method="patch", **kwargs)
+        return request if raw else self._decode(request)
+
+    def delete(self, path, raw=False, **kwargs):
+        """makes a delete request to the API"""
+        request = self._req(path, method="delete", **kwargs)
+        return request if raw else self._decode(request)
+
+    def _check(self, request):
+        """raises RequestFailed if the api answered with an error status"""
+        if request.status_code >= 400:
+            raise RequestFailed(
+                "{} for {}".format(request.status_code, request.url),
+                status=request.status_code,
+            )
+        return request
+
+    def _decode(self, request):
+        """
+        decodes the json body of a response (None if it has none), raising
+        RequestFailed if the api answered with an error status
+        """
+        self._check(request)
+        return self.json_backend.loads(request.content) if request.content else None
+
+    def iter_pages(self, path, max_pages=None, **kwargs):
+        """follows the rel="next" link headers of a list endpoint, page by page"""
+        pages = 0
+        while path and (max_pages is None or pages < max_pages):
+            entry = self._get_entry(path, **kwargs)
+            yield Page(entry.data, path, entry.next_url)
+            pages += 1
+            path = entry.next_url
+
+    def paginate(self, path, model, limit=None, max_pages=None, **kwargs):
+        """lazy iterable over the models from every page of a list endpoint"""
+        return Paginator(self, path, model, limit=limit, max_pages=max_pages, **kwargs)
+
+    def build(self, model, data, **kwargs):
+        """builds a model from a payload, through the identity map if enabled"""
+        if self.identity_map is None:
+            return model(data, client=self, **kwargs)
+        return self.identity_map.resolve(model, data, client=self, **kwargs)
+
+    def get_model(self, path, model, **kwargs):
+        """gets a single object from the API as the given model"""
+        return self.build(model, self.get(path), **kwargs)
+
+    def collect(self, iterable):
+        """collects a lazy list endpoint into a list"""
+        return list(iterable)
+
+    def then(self, result, callback):
+        """applies a callback to the result of a request"""
+        return callback(result)
+
+    def _call(self, func, item):
+        """calls func on an item in a worker, collecting lazy list endpoints"""
+        result = func(item)
+        if isinstance(result, (types.GeneratorType, Paginator)):
+            result = self.collect(result)
+        return result
+
+    def map(self, func, items, max_workers=None):
+        """
+        calls func on every item on a bounded thread pool, yielding a MapResult per
+        item as they complete. a failure is captured in the MapResult of its item
+        instead of aborting the rest of the batch
+        """
+        max_workers = max_workers or self.pool_maxsize
+        items = iter(items)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                while True:
+                    for item in items:
+                        pending[executor.submit(self._call, func, item)] = item
+                        if len(pending) >= max_workers * 2:
+                            break
+                    if not pending:
+                        return
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = pending.pop(future)
+                        error = future.exception()
+                        result = None if error else future.result()
+                        yield MapResult(item, result, error)
+            finally:
+                for future in pending:
+                    future.cancel()
 
     @property
     def organizations(self):
         """organizations list for this access token"""
         if not self._organizations or not self.cache:
-            self._organizations = [
-                Organization(x, client=self) for x in self.get("user/organizations")
-            ]
+            self._organizations = self.collect(
+                self.paginate("user/organizations", Organization)
+            )
         return self._organizations
 
     def get_organization(self, organization_id):
         """get organization info by organization_id"""
-        return Organization(
-            self.get("organizations/{}".format(organization_id)), client=self
-        )
+        return self.get_model("organizations/{}".format(organization_id), Organization)
 
     def get_project(self, project_id):
         """gets a project by it's id"""
-        return Project(self.get("projects/{}".format(project_id)), client=self)
+        return self.get_model("projects/{}".format(project_id), Project)
@@ -6,17 +6,31 @@ error models for pybugsnag
 class PyBugsnagException(Exception):
     """base pybugsnag exception class"""
 
-    def __init__(self, *args, **kwargs):
+    def __str__(self):
         extra = ""
-        if args:
-            extra = '\n| extra info: "{extra}"'.format(extra=args[0])
-        print(
-            "[{exception}]: {doc}{extra}".format(
-                exception=self.__class__.__name__, doc=self.__doc__, extra=extra
-            )
+        if self.args:
+            extra = '\n| extra info: "{extra}"'.format(extra=self.args[0])
+        return "[{exception}]: {doc}{extra}".format(
+            exception=self.__class__.__name__, doc=self.__doc__, extra=extra
         )
-        Exception.__init__(self, *args, **kwargs)
 
 
 class RateLimited(PyBugsnagException):
     """request received a 429 - you are currently rate limited"""
+
+
+class MissingDependency(PyBugsnagException):
+    """an optional dependency required for this feature is not installed"""
+
+
+class InvalidFilter(PyBugsnagException):
+    """a filter can't be expressed by the api, or isn't supported by the project"""
+
+
+class RequestFailed(PyBugsnagException):
+    """the api answered a request with an error status"""
+
+    def __init__(self, message, status=None):
+        """constructor"""
+        super(RequestFailed, self).__init__(message)
+        self.status = status
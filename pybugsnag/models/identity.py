@@ -0,0 +1,61 @@
+"""
+per-client identity map, so an entity is represented by a single model instance
+"""
+import threading
+import weakref
+
+
+class IdentityMap:
+    """
+    weakly referenced models, keyed by (model class, id)
+
+    resolving a payload for an entity that's already mapped returns the existing
+    instance, with the fresher payload merged into it, so every place that fetched
+    the same project or error shares one object (and its cached relations). models
+    are only held weakly, and drop out of the map once nothing else refers to them.
+    payloads without an id (pivots, event fields) aren't mapped
+    """
+
+    def __init__(self):
+        """constructor"""
+        self._models = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """number of live models in the map"""
+        return len(self._models)
+
+    def __contains__(self, key):
+        """whether a (model class, id) is mapped"""
+        return key in self._models
+
+    def get(self, model, model_id):
+        """the mapped instance of an entity, or None"""
+        return self._models.get((model, model_id))
+
+    def resolve(self, model, data, client=None, **kwargs):
+        """
+        the model instance for a payload, creating and mapping it if the entity
+        isn't mapped yet, or merging the payload into the mapped instance if it is
+        """
+        model_id = data.get("id") if isinstance(data, dict) else None
+        if model_id is None:
+            return model(data, client=client, **kwargs)
+        key = (model, model_id)
+        with self._lock:
+            instance = self._models.get(key)
+            if instance is None:
+                self.misses += 1
+                instance = model(data, client=client, **kwargs)
+                self._models[key] = instance
+            else:
+                self.hits += 1
+                instance._merge(data, **kwargs)
+        return instance
+
+    def clear(self):
+        """forgets every mapped model"""
+        with self._lock:
+            self._models.clear()
@@ -0,0 +1,72 @@
+"""
+lazy iterables over the paginated list endpoints of the api
+"""
+from collections import namedtuple
+
+
+Page = namedtuple("Page", ["items", "url", "next_url"])
+
+
+class Paginator:
+    """
+    lazy iterable over every model of a list endpoint, following rel="next" links
+
+    iterating yields models, capped by `limit` and `max_pages`. pages() exposes the
+    raw pages along with their urls, so a consumer can checkpoint where it got to
+    and resume from a page url later
+    """
+
+    def __init__(self, client, path, model, limit=None, max_pages=None, **kwargs):
+        """constructor"""
+        self.client = client
+        self.path = path
+        self.model = model
+        self.limit = limit
+        self.max_pages = max_pages
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        """repr"""
+        return "<{}[{}] '{}'>".format(
+            type(self).__name__, self.model.__name__, self.path
+        )
+
+    def pages(self, start=None):
+        """yields the raw pages of the endpoint, optionally starting from a page url"""
+        return self.client.iter_pages(start or self.path, max_pages=self.max_pages)
+
+    def _build(self, item):
+        """builds a model from a raw item"""
+        return self.client.build(self.model, item, **self.kwargs)
+
+    def __iter__(self):
+        """yields models from every page"""
+        count = 0
+        if self.limit is not None and self.limit <= 0:
+            return
+        for page in self.pages():
+            for item in page.items:
+                yield self._build(item)
+                count += 1
+                if self.limit is not None and count >= self.limit:
+                    return
+
+
+class AsyncPaginator(Paginator):
+    """async iterable over every model of a list endpoint"""
+
+    def __iter__(self):
+        """async paginators can only be iterated with `async for`"""
+        raise TypeError("use 'async for' to iterate over an AsyncPaginator")
+
+    async def __aiter__(self):
+        """yields models from every page"""
+        count = 0
+        if self.limit is not None and self.limit <= 0:
+            return
+        async for page in self.pages():
+            for item in page.items:
+                yield self._build(item)
+                count += 1
+                if self.limit is not None and count >= self.limit:
+                    return
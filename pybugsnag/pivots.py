@@ -0,0 +1,121 @@
+"""
+top-k aggregation of pivot values across many errors (or projects)
+
+    from pybugsnag.pivots import top_pivot_values
+
+    errors = project.get_errors(limit=500)
+    top = top_pivot_values(errors, "app.version", k=10, max_workers=8)
+    for version, events in top.most_common():
+        print(version, events)
+
+the values of every item are streamed page by page and folded into a running count
+per distinct value, so raw pivot values are never kept around. with a `capacity`,
+the counts are also pruned to the largest ones whenever they outgrow it, bounding
+memory for high cardinality fields at the cost of exact counts
+"""
+import heapq
+import itertools
+import threading
+from collections import Counter
+from operator import itemgetter
+
+
+DEFAULT_K = 10
+
+
+class TopK:
+    """
+    running counts of values, reporting the k largest with a heap
+
+    counts are exact unless a `capacity` is given and the number of distinct values
+    exceeded it, in which case only the largest `capacity` counts were kept (see
+    `approximate`). safe to update from several threads
+    """
+
+    def __init__(self, k=DEFAULT_K, capacity=None):
+        """constructor"""
+        if capacity is not None and capacity < k:
+            raise ValueError("capacity must be at least k")
+        self.k = k
+        self.capacity = capacity
+        self.approximate = False
+        self.failed = []
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """repr"""
+        return "<TopK {} of {} values{}>".format(
+            self.k, len(self), " (approximate)" if self.approximate else ""
+        )
+
+    def __len__(self):
+        """number of distinct values counted"""
+        return len(self._counts)
+
+    def update(self, counts):
+        """adds a mapping (or iterable of pairs) of values to counts"""
+        if not isinstance(counts, dict):
+            pairs, counts = counts, Counter()
+            for value, count in pairs:
+                counts[value] += count
+        with self._lock:
+            self._counts.update(counts)
+            if self.capacity is not None and len(self._counts) > self.capacity:
+                self._counts = Counter(dict(self._largest(self.capacity)))
+                self.approximate = True
+
+    def add(self, value, count=1):
+        """adds to the count of a single value"""
+        self.update({value: count})
+
+    def _largest(self, n):
+        """the n largest (value, count) pairs"""
+        return heapq.nlargest(n, self._counts.items(), key=itemgetter(1))
+
+    def most_common(self, k=None):
+        """the k (by default self.k) largest (value, count) pairs, largest first"""
+        with self._lock:
+            return self._largest(self.k if k is None else k)
+
+
+def _count_values(item, event_field_display_id, weight, kwargs):
+    """streams the pivot values of an item into counts per value"""
+    counts = Counter()
+    for pivot_value in item.get_pivot_values(event_field_display_id, **kwargs):
+        counts[pivot_value.value] += getattr(pivot_value, weight)
+    return counts
+
+
+def top_pivot_values(
+    items,
+    event_field_display_id,
+    k=DEFAULT_K,
+    weight="events",
+    capacity=None,
+    max_workers=None,
+    **kwargs
+):
+    """
+    fetches the values of a pivot on many errors (or projects) concurrently with
+    client.map, and merges them into a TopK weighted by `weight` ("events", or
+    another count of the pivot values). the remaining keyword arguments are passed
+    to get_pivot_values (per_page=, max_pages=, filters=, ...). items whose values
+    couldn't be fetched are listed in the result's `failed` MapResults
+    """
+    items = iter(items)
+    top = TopK(k, capacity=capacity)
+    first = next(items, None)
+    if first is None:
+        return top
+    results = first._client.map(
+        lambda item: _count_values(item, event_field_display_id, weight, kwargs),
+        itertools.chain([first], items),
+        max_workers=max_workers,
+    )
+    for result in results:
+        if result.error is not None:
+            top.failed.append(result)
+        else:
+            top.update(result.result)
+    return top
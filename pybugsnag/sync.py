@@ -0,0 +1,156 @@
+"""
+incremental sync of errors and events, resuming from persisted high-water marks
+
+list endpoints are read newest first, and paging stops as soon as it reaches
+records that an earlier sync already saw, so a repeated sync costs requests in
+proportion to what changed rather than to the whole history of a project
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from pybugsnag.models import Error, Event
+from pybugsnag.utils.text import iso8601_to_datetime
+
+
+DEFAULT_PER_PAGE = 100
+
+
+Cursor = namedtuple("Cursor", ["timestamp", "ids"])
+SyncReport = namedtuple("SyncReport", ["project", "kind", "new", "updated", "cursor"])
+SyncKind = namedtuple("SyncKind", ["method", "sort", "field"])
+
+
+KINDS = {
+    "errors": SyncKind("get_errors", Error.Sort.LAST_SEEN, "last_seen"),
+    "events": SyncKind("get_events", Event.Sort.TIMESTAMP, "received_at"),
+}
+
+
+class SyncStore:
+    """
+    sqlite store of the per-project cursors of incremental syncs
+
+    a cursor is the newest timestamp a sync saw, along with the ids of the records
+    at exactly that timestamp, so that records sharing it aren't reported twice
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cursors ("
+        "project_id TEXT NOT NULL, kind TEXT NOT NULL, timestamp TEXT NOT NULL, "
+        "ids TEXT NOT NULL, PRIMARY KEY (project_id, kind))"
+    )
+
+    def __init__(self, path=":memory:"):
+        """constructor"""
+        self.path = path if path == ":memory:" else os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(self.SCHEMA)
+
+    def get(self, project_id, kind):
+        """gets the cursor of a project, or None if it was never synced"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT timestamp, ids FROM cursors WHERE project_id = ? AND kind = ?",
+                (str(project_id), kind),
+            ).fetchone()
+        if row is None:
+            return None
+        return Cursor(iso8601_to_datetime(row[0]), frozenset(json.loads(row[1])))
+
+    def set(self, project_id, kind, cursor):
+        """stores the cursor of a project"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cursors VALUES (?, ?, ?, ?)",
+                (
+                    str(project_id),
+                    kind,
+                    cursor.timestamp.isoformat(),
+                    json.dumps(sorted(cursor.ids)),
+                ),
+            )
+
+    def reset(self, project_id=None, kind=None):
+        """forgets cursors, so the next sync starts from scratch"""
+        query, params = "DELETE FROM cursors WHERE 1 = 1", []
+        if project_id is not None:
+            query += " AND project_id = ?"
+            params.append(str(project_id))
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._lock, self._connection:
+            self._connection.execute(query, params)
+
+    def close(self):
+        """closes the database"""
+        self._connection.close()
+
+
+def _advance(cursor, timestamp, record_id):
+    """moves a cursor forward to include a record"""
+    if cursor is None or timestamp > cursor.timestamp:
+        return Cursor(timestamp, frozenset([record_id]))
+    if timestamp == cursor.timestamp:
+        return Cursor(timestamp, cursor.ids | {record_id})
+    return cursor
+
+
+def sync(project, store, kind="errors", per_page=DEFAULT_PER_PAGE, **kwargs):
+    """
+    fetches the errors or events of a project that are newer than its cursor
+
+    errors are reported as new if they were first seen after the cursor, and as
+    updated otherwise. the cursor is only moved forward once every page was read,
+    so a sync that fails partway through is simply repeated by the next run
+    """
+    spec = KINDS[kind]
+    cursor = store.get(project.id, kind)
+    listing = getattr(project, spec.method)(
+        sort=spec.sort,
+        direction=Event.Sort.Direction.DESCENDING,
+        per_page=per_page,
+        **kwargs
+    )
+    new, updated, seen = [], [], set()
+    latest = cursor
+    for record in listing:
+        timestamp = getattr(record, spec.field)
+        if cursor is not None and timestamp < cursor.timestamp:
+            break
+        if record.id in seen:
+            # records shift down a page when newer ones arrive while paging
+            continue
+        seen.add(record.id)
+        if (
+            cursor is not None
+            and timestamp == cursor.timestamp
+            and record.id in cursor.ids
+        ):
+            continue
+        known = (
+            kind == "errors"
+            and cursor is not None
+            and record.first_seen <= cursor.timestamp
+        )
+        (updated if known else new).append(record)
+        latest = _advance(latest, timestamp, record.id)
+    if latest is not cursor:
+        store.set(project.id, kind, latest)
+    return SyncReport(project, kind, new, updated, latest)
+
+
+def sync_all(organization, store, kind="errors", max_workers=None, **kwargs):
+    """
+    syncs every project of an organization concurrently, yielding a MapResult
+    holding the SyncReport of each project as it completes
+    """
+    return organization._client.map(
+        lambda project: sync(project, store, kind=kind, **kwargs),
+        organization.projects,
+        max_workers=max_workers,
+    )
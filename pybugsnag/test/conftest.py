@@ -2,7 +2,10 @@
 configure pytest
 """
 import pytest
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models.client import BugsnagDataClient
 from pybugsnag.test.helpers import dbg
+from pybugsnag.test.server import MockServer, SyntheticServer
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -15,3 +18,31 @@ def before_all(request):
 def after_all():
     """tear down"""
     dbg("[+] end pybugsnag tests")
+
+
+@pytest.fixture
+def mock_server():
+    """a local stand-in for the bugsnag api"""
+    with MockServer() as server:
+        yield server
+
+
+@pytest.fixture
+def local_client(mock_server):
+    """a client pointed at the local mock server"""
+    with BugsnagDataClient(TEST_TOKEN, api_url=mock_server.url) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def synthetic_server():
+    """a local stand-in for the bugsnag api, serving a small synthetic account"""
+    with SyntheticServer() as server:
+        yield server
+
+
+@pytest.fixture
+def synthetic_client(synthetic_server):
+    """a client pointed at the synthetic server"""
+    with BugsnagDataClient(TEST_TOKEN, api_url=synthetic_server.url) as client:
+        yield client
@@ -0,0 +1,192 @@
+"""
+synthetic bugsnag api payloads for tests and benchmarks
+"""
+
+
+TIMESTAMP = "2018-09-24T15:23:00Z"
+TIMESTAMP_MILLIS = "2018-09-24T15:23:00.000Z"
+
+
+def organization_data(organization_id="org"):
+    """synthetic organization payload"""
+    return {
+        "id": str(organization_id),
+        "name": "organization {}".format(organization_id),
+        "slug": "organization-{}".format(organization_id),
+        "created_at": TIMESTAMP_MILLIS,
+        "updated_at": TIMESTAMP_MILLIS,
+    }
+
+
+def project_data(project_id, organization_id="org"):
+    """synthetic project payload"""
+    return {
+        "id": str(project_id),
+        "organization_id": str(organization_id),
+        "name": "project {}".format(project_id),
+        "slug": "project-{}".format(project_id),
+        "type": "python",
+        "open_error_count": 10,
+        "collaborators_count": 3,
+        "release_stages": ["production", "staging"],
+        "created_at": TIMESTAMP_MILLIS,
+        "updated_at": TIMESTAMP_MILLIS,
+    }
+
+
+def error_data(error_id, project_id="0"):
+    """synthetic error payload"""
+    return {
+        "id": str(error_id),
+        "project_id": str(project_id),
+        "error_class": "RuntimeError",
+        "message": "something went wrong in {}".format(error_id),
+        "context": "worker.process",
+        "severity": "error",
+        "status": "open",
+        "events": 12,
+        "users": 3,
+        "release_stages": ["production"],
+        "first_seen": TIMESTAMP,
+        "last_seen": TIMESTAMP,
+        "first_seen_unfiltered": TIMESTAMP,
+    }
+
+
+def event_data(event_id, error_id="0", project_id="0", full_report=False):
+    """synthetic event payload, optionally shaped like a full report"""
+    data = {
+        "id": str(event_id),
+        "error_id": str(error_id),
+        "project_id": str(project_id),
+        "is_full_report": full_report,
+        "context": "worker.process",
+        "severity": "error",
+        "unhandled": True,
+        "received_at": TIMESTAMP_MILLIS,
+        "exceptions": [
+            {
+                "errorClass": "RuntimeError",
+                "message": "something went wrong in {}".format(event_id),
+                "stacktrace": [
+                    {
+                        "file": "app/worker_{}.py".format(x),
+                        "lineNumber": 10 * x,
+                        "columnNumber": 4,
+                        "method": "process_{}".format(x),
+                        "inProject": x % 2 == 0,
+                        "code": {
+                            str(10 * x + y): "line {}".format(y) for y in range(3)
+                        },
+                    }
+                    for x in range(8)
+                ],
+            }
+        ],
+    }
+    if full_report:
+        data.update(
+            {
+                "app": {
+                    "version": "1.2.{}".format(int(event_id) % 10),
+                    "releaseStage": "production",
+                    "type": "python",
+                },
+                "device": {
+                    "hostname": "worker-{}".format(int(event_id) % 5),
+                    "osName": "linux",
+                    "runtimeVersions": {"python": "3.7.0"},
+                },
+                "user": {"id": str(int(event_id) % 100), "email": "user@example.com"},
+                "request": {
+                    "url": "https://example.com/path/{}".format(event_id),
+                    "httpMethod": "GET",
+                    "headers": {"User-Agent": "test", "Accept": "*/*"},
+                },
+                "breadcrumbs": [
+                    {"name": "request", "type": "request", "timestamp": TIMESTAMP}
+                    for _ in range(5)
+                ],
+                "metaData": {
+                    "extra": {"attempt": 1, "queueName": "default"},
+                    "environment": {"HOSTNAME": "worker", "LANG": "en_US.UTF-8"},
+                },
+            }
+        )
+    return data
+
+
+def collaborator_data(collaborator_id, is_admin=False):
+    """synthetic collaborator payload"""
+    return {
+        "id": str(collaborator_id),
+        "name": "collaborator {}".format(collaborator_id),
+        "email": "collaborator{}@example.com".format(collaborator_id),
+        "is_admin": is_admin,
+        "two_factor_enabled": True,
+        "pending_invitation": False,
+        "created_at": TIMESTAMP_MILLIS,
+        "last_request_at": TIMESTAMP_MILLIS,
+    }
+
+
+def release_data(release_id, project_id="0"):
+    """synthetic release payload"""
+    return {
+        "id": str(release_id),
+        "project_id": str(project_id),
+        "release_time": TIMESTAMP,
+        "release_source": "api",
+        "app_version": "1.2.{}".format(release_id),
+        "release_stage": {"name": "production"},
+        "errors_introduced_count": 2,
+        "errors_seen_count": 5,
+        "total_sessions_count": 100,
+    }
+
+
+def pivot_data(display_id):
+    """synthetic pivot payload"""
+    return {
+        "event_field_display_id": display_id,
+        "name": display_id.replace(".", " "),
+        "cardinality": 3,
+        "summary": {
+            "list": [
+                {"value": "value {}".format(x), "events": 3 - x} for x in range(3)
+            ],
+            "other": 0,
+        },
+    }
+
+
+def event_field_data(display_id):
+    """synthetic event field payload"""
+    return {
+        "custom": False,
+        "display_id": display_id,
+        "filter_options": {
+            "name": display_id.replace(".", " "),
+            "match_types": ["eq", "ne"],
+        },
+        "pivot_options": {"name": display_id.replace(".", " ")},
+    }
+
+
+def trend_data(buckets_count=10, counts=None, hours_ago=0):
+    """synthetic hourly trend buckets, ending some hours before TIMESTAMP"""
+    counts = counts if counts is not None else list(range(buckets_count))
+    end = 15 - hours_ago
+    return [
+        {
+            "from": "2018-09-24T{:02d}:00:00Z".format(end - len(counts) + x),
+            "to": "2018-09-24T{:02d}:00:00Z".format(end - len(counts) + x + 1),
+            "events_count": count,
+        }
+        for x, count in enumerate(counts)
+    ]
+
+
+def pivot_value_data(value, events=1):
+    """synthetic pivot value payload"""
+    return {"value": value, "events": events, "errors": 1, "proportion": 0.5}
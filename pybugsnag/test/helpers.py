@@ -1,6 +1,7 @@
 """
 helpers for the pytest suite
 """
+import asyncio
 import json
 import sys
 from colorama import init, Fore, Style
@@ -21,3 +22,13 @@ def dbg(text):
     print("-----")
     print(Style.RESET_ALL)
     print("")
+
+
+def run_async(coroutine):
+    """runs a coroutine to completion on a new event loop (asyncio.run, pre 3.7)"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
@@ -0,0 +1,502 @@
+"""
+a local stand-in for the bugsnag data access api, for offline tests and benchmarks
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from pybugsnag.test import fixtures
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    """threaded http server"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class MockResponse:
+    """a canned response for a route on the mock server"""
+
+    def __init__(self, body=None, status=200, headers=None):
+        """constructor"""
+        self.body = body
+        self.status = status
+        self.headers = headers or {}
+
+    def encode(self):
+        """encodes the body into bytes"""
+        if self.body is None:
+            return b""
+        if isinstance(self.body, bytes):
+            return self.body
+        if isinstance(self.body, str):
+            return self.body.encode("utf-8")
+        return json.dumps(self.body).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """request handler that dispatches to the routes of the owning server"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        """silence the default stderr logging"""
+
+    def _handle(self):
+        """dispatch any http method"""
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        response = mock.dispatch(self.command, self.path, self.headers, body)
+        payload = response.encode()
+        self.send_response(response.status)
+        headers = {"Content-Type": "application/json", **response.headers}
+        for key in headers:
+            self.send_header(key, headers[key])
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_PATCH = _handle
+    do_DELETE = _handle
+
+
+class MockServer:
+    """
+    a small threaded http server bound to localhost
+
+    routes are registered by method and path (without the query string), and map
+    to either a MockResponse, a json-able body, or a callable taking the request.
+
+    every response can be delayed by `latency` seconds, a random `error_rate`
+    fraction of requests fail with a 503, and with a `rate_limit` the server sends
+    rate limit headers and answers 429 once a window's requests are used up
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0,
+        error_rate=0,
+        rate_limit=None,
+        rate_limit_window=60,
+        seed=0,
+        record=True,
+    ):
+        """constructor"""
+        self.routes = {}
+        self.requests = []
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.record = record
+        self._random = random.Random(seed)
+        self._window = (0, 0)
+        self._lock = threading.Lock()
+        self._server = _ThreadingServer((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """base url of the server, usable as a client's api_url"""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/".format(host, port)
+
+    def route(self, path, response, method="GET"):
+        """registers a response for a path"""
+        self.routes[(method.upper(), path.strip("/"))] = response
+
+    def paged_route(self, path, items, per_page):
+        """registers a list route that paginates with rel="next" link headers"""
+
+        def handler(request):
+            """serve one page, linking to the next"""
+            offset = int(request["query"].get("offset", ["0"])[0])
+            headers = {}
+            if offset + per_page < len(items):
+                headers["Link"] = '<{}{}?offset={}>; rel="next"'.format(
+                    self.url, path, offset + per_page
+                )
+            return MockResponse(items[offset:offset + per_page], headers=headers)
+
+        self.route(path, handler)
+
+    def dispatch(self, method, raw_path, headers, body):
+        """finds the response for an incoming request"""
+        parsed = urllib.parse.urlsplit(raw_path)
+        request = {
+            "method": method,
+            "path": parsed.path.strip("/"),
+            "query": urllib.parse.parse_qs(parsed.query),
+            "headers": headers,
+            "body": body,
+        }
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self.record:
+                self.requests.append(request)
+            failed = self.error_rate and self._random.random() < self.error_rate
+            limit_headers, retry_after = self._count_request()
+        if retry_after is not None:
+            return MockResponse(
+                {"errors": ["rate limited"]},
+                status=429,
+                headers={"Retry-After": str(retry_after), **limit_headers},
+            )
+        if failed:
+            return MockResponse({"errors": ["injected failure"]}, status=503)
+        response = self.resolve(request)
+        if not limit_headers:
+            return response
+        return MockResponse(
+            response.body, response.status, {**limit_headers, **response.headers}
+        )
+
+    def _count_request(self):
+        """
+        counts a request against the rate limit, returning the rate limit headers
+        and, if the limit is used up, the seconds until the window resets
+        """
+        if self.rate_limit is None:
+            return {}, None
+        now = time.time()
+        started, count = self._window
+        if now - started >= self.rate_limit_window:
+            started, count = now, 0
+        self._window = (started, count + 1)
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(self.rate_limit - count - 1, 0)),
+        }
+        if count < self.rate_limit:
+            return headers, None
+        return headers, math.ceil(started + self.rate_limit_window - now)
+
+    def resolve(self, request):
+        """finds the response for a request among the registered routes"""
+        handler = self.routes.get((request["method"], request["path"]))
+        if handler is None:
+            return MockResponse({"errors": ["not found"]}, status=404)
+        if callable(handler):
+            handler = handler(request)
+        if not isinstance(handler, MockResponse):
+            handler = MockResponse(handler)
+        return handler
+
+    def start(self):
+        """starts serving in a background thread"""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """stops the server"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        """context manager entry"""
+        return self.start()
+
+    def __exit__(self, *args):
+        """context manager exit"""
+        self.stop()
+
+
+class SyntheticServer(MockServer):
+    """
+    a mock server serving a consistent synthetic bugsnag account at any scale
+
+    there are `organizations` organizations with `projects` projects each, every
+    project has `errors` errors with `events` events each (newest first), and every
+    organization has `collaborators` collaborators and every project `releases`
+    releases. list endpoints honor per_page and paginate with rel="next" links.
+    payloads are built on demand from their ids, so memory doesn't grow with scale
+    """
+
+    EPOCH = datetime(2018, 9, 24, 15, 23)
+    PIVOTS = ["app.release_stage", "device.hostname", "user.email"]
+    ROUTES = [
+        (r"user/organizations", "_organizations"),
+        (r"organizations/(\d+)", "_organization"),
+        (r"organizations/(\d+)/admins_count", "_admins_count"),
+        (r"organizations/(\d+)/projects", "_projects"),
+        (r"organizations/(\d+)/collaborators", "_collaborators"),
+        (r"organizations/(\d+)/collaborators/(\d+)", "_collaborator"),
+        (r"projects/(\d+)", "_project"),
+        (r"projects/(\d+)/errors", "_errors"),
+        (r"projects/(\d+)/errors/(\d+)", "_error"),
+        (r"projects/(\d+)/errors/(\d+)/events", "_error_events"),
+        (r"projects/(\d+)/errors/(\d+)/trend", "_trend"),
+        (r"projects/(\d+)/errors/(\d+)/pivots", "_pivots"),
+        (r"errors/(\d+)/latest_event", "_latest_event"),
+        (r"projects/(\d+)/events", "_events"),
+        (r"projects/(\d+)/events/(\d+)", "_event"),
+        (r"projects/(\d+)/trend", "_trend"),
+        (r"projects/(\d+)/releases", "_releases"),
+        (r"projects/(\d+)/releases/(\d+)", "_release"),
+        (r"projects/(\d+)/pivots", "_pivots"),
+        (r"projects/(\d+)/event_fields", "_event_fields"),
+    ]
+
+    def __init__(
+        self,
+        organizations=1,
+        projects=2,
+        errors=20,
+        events=5,
+        collaborators=5,
+        releases=5,
+        **kwargs
+    ):
+        """constructor"""
+        super(SyntheticServer, self).__init__(**kwargs)
+        self.organizations = organizations
+        self.projects = projects
+        self.errors = errors
+        self.events = events
+        self.collaborators = collaborators
+        self.releases = releases
+        self._routes = [(re.compile(x), getattr(self, y)) for x, y in self.ROUTES]
+        self._encode_page = lru_cache(maxsize=256)(self._encode_page)
+
+    def resolve(self, request):
+        """serves the registered routes first, then the synthetic api"""
+        if (request["method"], request["path"]) in self.routes:
+            return super(SyntheticServer, self).resolve(request)
+        if request["method"] == "GET":
+            for pattern, handler in self._routes:
+                match = pattern.fullmatch(request["path"])
+                if match:
+                    response = handler(request, *(int(x) for x in match.groups()))
+                    if response is not None:
+                        return response
+        return MockResponse({"errors": ["not found"]}, status=404)
+
+    def _timestamp(self, seconds_ago):
+        """an api timestamp some seconds before the epoch of the dataset"""
+        moment = self.EPOCH - timedelta(seconds=seconds_ago)
+        return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+    def _paged(self, request, kind, owner, count):
+        """serves one page of a list endpoint, linking to the next"""
+        query = request["query"]
+        offset = int(query.get("offset", ["0"])[0])
+        per_page = int(query.get("per_page", ["30"])[0])
+        full = query.get("full_reports", ["false"])[0].lower() == "true"
+        headers = {}
+        if offset + per_page < count:
+            params = {"offset": offset + per_page, "per_page": per_page}
+            if full:
+                params["full_reports"] = "true"
+            headers["Link"] = '<{}{}?{}>; rel="next"'.format(
+                self.url, request["path"], urllib.parse.urlencode(params)
+            )
+        body = self._encode_page(
+            kind, owner, offset, min(offset + per_page, count), full
+        )
+        return MockResponse(body, headers=headers)
+
+    def _encode_page(self, kind, owner, start, stop, full):
+        """builds and encodes a page of payloads, cached across requests"""
+        build = getattr(self, "_{}_data".format(kind))
+        page = [build(owner, x, full) for x in range(start, stop)]
+        return json.dumps(page).encode("utf-8")
+
+    def _organization_data(self, _, index, full=False):
+        """organization payload"""
+        return fixtures.organization_data(index)
+
+    def _project_data(self, organization_id, index, full=False):
+        """the payload of the index-th project of an organization"""
+        project_id = organization_id * self.projects + index
+        return fixtures.project_data(project_id, organization_id)
+
+    def _collaborator_data(self, _, index, full=False):
+        """collaborator payload"""
+        return fixtures.collaborator_data(index, is_admin=True)
+
+    def _error_data(self, project_id, index, full=False):
+        """the payload of the index-th most recently seen error of a project"""
+        data = fixtures.error_data(project_id * self.errors + index, project_id)
+        data["events"] = self.events
+        data["first_seen"] = self._timestamp((index + 1) * self.events - 1)
+        data["last_seen"] = self._timestamp(index * self.events)
+        data["first_seen_unfiltered"] = data["first_seen"]
+        return data
+
+    def _event_data(self, project_id, index, full=False):
+        """the payload of the index-th most recent event of a project"""
+        event_id = project_id * self.errors * self.events + index
+        data = fixtures.event_data(
+            event_id, event_id // self.events, project_id, full_report=full
+        )
+        data["received_at"] = self._timestamp(index)
+        return data
+
+    def _error_event_data(self, error_id, index, full=False):
+        """the payload of the index-th most recent event of an error"""
+        project_id = error_id // self.errors
+        offset = (error_id % self.errors) * self.events
+        return self._event_data(project_id, offset + index, full)
+
+    def _release_data(self, project_id, index, full=False):
+        """release payload"""
+        return fixtures.release_data(project_id * self.releases + index, project_id)
+
+    def _pivot_data(self, _, index, full=False):
+        """pivot payload"""
+        return fixtures.pivot_data(self.PIVOTS[index])
+
+    def _event_field_data(self, _, index, full=False):
+        """event field payload"""
+        return fixtures.event_field_data(self.PIVOTS[index])
+
+    def _has_project(self, project_id):
+        """whether a project exists"""
+        return project_id < self.organizations * self.projects
+
+    def _has_error(self, project_id, error_id):
+        """whether an error exists in a project"""
+        return self._has_project(project_id) and error_id // self.errors == project_id
+
+    def _organizations(self, request):
+        """user/organizations"""
+        return self._paged(request, "organization", None, self.organizations)
+
+    def _organization(self, request, organization_id):
+        """organizations/:id"""
+        if organization_id < self.organizations:
+            return MockResponse(self._organization_data(None, organization_id))
+
+    def _admins_count(self, request, organization_id):
+        """organizations/:id/admins_count"""
+        if organization_id < self.organizations:
+            return MockResponse(str(self.collaborators))
+
+    def _projects(self, request, organization_id):
+        """organizations/:id/projects"""
+        if organization_id < self.organizations:
+            return self._paged(request, "project", organization_id, self.projects)
+
+    def _collaborators(self, request, organization_id):
+        """organizations/:id/collaborators"""
+        if organization_id < self.organizations:
+            return self._paged(request, "collaborator", None, self.collaborators)
+
+    def _collaborator(self, request, organization_id, collaborator_id):
+        """organizations/:id/collaborators/:id"""
+        if organization_id < self.organizations:
+            if collaborator_id < self.collaborators:
+                return MockResponse(self._collaborator_data(None, collaborator_id))
+
+    def _project(self, request, project_id):
+        """projects/:id"""
+        if self._has_project(project_id):
+            organization_id, index = divmod(project_id, self.projects)
+            return MockResponse(self._project_data(organization_id, index))
+
+    def _errors(self, request, project_id):
+        """projects/:id/errors"""
+        if self._has_project(project_id):
+            return self._paged(request, "error", project_id, self.errors)
+
+    def _error(self, request, project_id, error_id):
+        """projects/:id/errors/:id"""
+        if self._has_error(project_id, error_id):
+            index = error_id % self.errors
+            return MockResponse(self._error_data(project_id, index))
+
+    def _error_events(self, request, project_id, error_id):
+        """projects/:id/errors/:id/events"""
+        if self._has_error(project_id, error_id):
+            return self._paged(request, "error_event", error_id, self.events)
+
+    def _latest_event(self, request, error_id):
+        """errors/:id/latest_event"""
+        if self.errors and self._has_error(error_id // self.errors, error_id):
+            return MockResponse(self._error_event_data(error_id, 0, full=True))
+
+    def _events(self, request, project_id):
+        """projects/:id/events"""
+        if self._has_project(project_id):
+            count = self.errors * self.events
+            return self._paged(request, "event", project_id, count)
+
+    def _event(self, request, project_id, event_id):
+        """projects/:id/events/:id"""
+        per_project = self.errors * self.events
+        if self._has_project(project_id) and event_id // per_project == project_id:
+            index = event_id % per_project
+            return MockResponse(self._event_data(project_id, index, full=True))
+
+    def _trend(self, request, *ids):
+        """projects/:id/trend and projects/:id/errors/:id/trend"""
+        buckets = int(request["query"].get("buckets_count", ["10"])[0])
+        return MockResponse(fixtures.trend_data(buckets))
+
+    def _releases(self, request, project_id):
+        """projects/:id/releases"""
+        if self._has_project(project_id):
+            return self._paged(request, "release", project_id, self.releases)
+
+    def _release(self, request, project_id, release_id):
+        """projects/:id/releases/:id"""
+        if self._has_project(project_id):
+            if release_id // self.releases == project_id:
+                index = release_id % self.releases
+                return MockResponse(self._release_data(project_id, index))
+
+    def _pivots(self, request, *ids):
+        """projects/:id/pivots and projects/:id/errors/:id/pivots"""
+        return self._paged(request, "pivot", None, len(self.PIVOTS))
+
+    def _event_fields(self, request, project_id):
+        """projects/:id/event_fields"""
+        return self._paged(request, "event_field", None, len(self.PIVOTS))
+
+
+def main():
+    """serves a synthetic dataset until interrupted, printing its url first"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--port", type=int, default=0)
+    for name in ["organizations", "projects", "errors", "events", "collaborators"]:
+        parser.add_argument("--{}".format(name), type=int)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int)
+    args = {x: y for x, y in vars(parser.parse_args()).items() if y is not None}
+    server = SyntheticServer(record=False, **args)
+    print(server.url, flush=True)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
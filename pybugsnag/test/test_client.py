@@ -0,0 +1,550 @@
+"""
+tests for the http behavior of the client, against a local mock server
+"""
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models import Error, ErrorRef, Organization, Project
+from pybugsnag.models.async_client import AsyncBugsnagDataClient
+from pybugsnag.models.client import BugsnagDataClient
+from pybugsnag.models.error import RateLimited, RequestFailed
+from pybugsnag.test.fixtures import error_data, organization_data, project_data
+from pybugsnag.test.helpers import run_async
+from pybugsnag.test.server import MockResponse, MockServer, SyntheticServer
+from pybugsnag.utils.cache import MemoryCache, ResponseCache, SQLiteCache
+from pybugsnag.utils.hooks import EVENTS
+from pybugsnag.utils.ratelimit import RateLimiter
+from pybugsnag.utils.retry import RetryPolicy
+from pybugsnag.utils.singleflight import SingleFlight
+
+
+ORGANIZATION_DATA = organization_data()
+
+
+def test_session_reuse(mock_server, local_client):
+    """the client should hold a single pooled session with prebuilt headers"""
+    mock_server.route("user/organizations", [])
+    session = local_client.session
+    assert local_client.get("user/organizations") == []
+    assert local_client.get("user/organizations") == []
+    assert local_client.session is session
+
+    request = mock_server.requests[-1]
+    assert request["headers"]["Authorization"] == "token {}".format(TEST_TOKEN)
+    assert request["headers"]["User-Agent"].startswith("pybugsnag/")
+
+
+def test_session_close(mock_server):
+    """closing the client drops the session, and it is recreated on demand"""
+    mock_server.route("user/organizations", [])
+    with BugsnagDataClient(TEST_TOKEN, api_url=mock_server.url) as client:
+        client.get("user/organizations")
+        assert client._session is not None
+    assert client._session is None
+
+    client.get("user/organizations")
+    assert client._session is not None
+    client.close()
+
+
+def test_keep_alive_disabled(mock_server):
+    """disabling keep-alive asks the server to close each connection"""
+    mock_server.route("user/organizations", [])
+    with BugsnagDataClient(
+        TEST_TOKEN, api_url=mock_server.url, keep_alive=False
+    ) as client:
+        client.get("user/organizations")
+    assert mock_server.requests[-1]["headers"]["Connection"] == "close"
+
+
+def test_pagination(mock_server, local_client):
+    """list endpoints should lazily follow rel=next links"""
+    mock_server.paged_route(
+        "organizations/org/projects",
+        [project_data(x) for x in range(7)],
+        per_page=3,
+    )
+    organization = Organization(ORGANIZATION_DATA, client=local_client)
+
+    projects = organization.get_projects()
+    assert not mock_server.requests
+    assert [x.id for x in projects] == [str(x) for x in range(7)]
+    assert len(mock_server.requests) == 3
+
+    assert len(list(organization.get_projects(limit=4))) == 4
+    assert len(list(organization.get_projects(max_pages=2))) == 6
+    assert not list(organization.get_projects(limit=0))
+    assert len(organization.projects) == 7
+
+
+def test_async_client(mock_server):
+    """the async client should share the models, with awaitable methods"""
+    mock_server.route("user/organizations", [ORGANIZATION_DATA])
+    mock_server.route("projects/1", project_data(1))
+    mock_server.route("organizations/org/admins_count", "5")
+    mock_server.paged_route(
+        "organizations/org/projects",
+        [project_data(x) for x in range(5)],
+        per_page=2,
+    )
+
+    async def run():
+        """async portion of the test"""
+        async with AsyncBugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url, max_concurrency=2, metrics=True
+        ) as client:
+            organizations = await client.organizations
+            organization = organizations[0]
+            assert isinstance(organization, Organization)
+
+            project = await client.get_project(1)
+            assert isinstance(project, Project)
+            assert project.name == "project 1"
+
+            project_ids = [x.id async for x in organization.get_projects(limit=3)]
+            assert project_ids == ["0", "1", "2"]
+
+            assert len(await organization.projects) == 5
+            assert len(await organization.projects) == 5
+            assert await organization.admins_count == 5
+
+            results = await asyncio.gather(*[client.get_project(1) for _ in range(6)])
+            assert all(x.id == "1" for x in results)
+
+            # the concurrent identical gets share a single request
+            metrics = client.metrics.snapshot()
+            assert metrics["GET projects/{id}"]["requests"] == 2
+            assert client.single_flight.coalesced == 5
+            assert metrics["GET organizations/{id}/projects"]["requests"] == 5
+
+    run_async(run())
+
+
+def test_async_client_sync_context():
+    """the async client should refuse a sync with block"""
+    with pytest.raises(TypeError, match="async with"):
+        with AsyncBugsnagDataClient(TEST_TOKEN):
+            pass
+
+
+def test_rate_limit_headers(mock_server, local_client):
+    """the client should sync its limiter with the quota headers"""
+    mock_server.route(
+        "user/organizations",
+        MockResponse(
+            [], headers={"X-RateLimit-Limit": "10", "X-RateLimit-Remaining": "9"}
+        ),
+    )
+    local_client.get("user/organizations")
+    assert local_client.rate_limiter.rate == 10
+    assert local_client.rate_limiter.metrics["requests"] == 1
+
+
+def test_retry_policy(mock_server):
+    """transient failures on GETs should be retried with backoff"""
+    attempts = []
+    responses = [
+        MockResponse(status=503),
+        MockResponse(status=429, headers={"Retry-After": "0"}),
+        MockResponse([ORGANIZATION_DATA]),
+    ]
+    mock_server.route("user/organizations", lambda request: responses.pop(0))
+    mock_server.route("projects", MockResponse(status=503), method="POST")
+
+    policy = RetryPolicy(max_attempts=3, backoff_base=0.01, on_retry=attempts.append)
+    with BugsnagDataClient(
+        TEST_TOKEN, api_url=mock_server.url, retry_policy=policy
+    ) as client:
+        assert client.get("user/organizations") == [ORGANIZATION_DATA]
+        assert [x.status for x in attempts] == [503, 429]
+        assert attempts[-1].delay == 0
+
+        # non-idempotent requests are not retried by default
+        assert client.post("projects", raw=True).status_code == 503
+        assert len(attempts) == 2
+
+        mock_server.route("user/organizations", MockResponse(status=429))
+        with pytest.raises(RateLimited):
+            client.get("user/organizations")
+
+
+def test_injected_faults():
+    """the synthetic server's failures and quotas should be absorbed by retries"""
+    policy = RetryPolicy(max_attempts=10, backoff_base=0.001, backoff_cap=0.01)
+    with SyntheticServer(errors=40, error_rate=0.3, seed=1) as server:
+        with BugsnagDataClient(
+            TEST_TOKEN, api_url=server.url, retry_policy=policy
+        ) as client:
+            project = client.get_project(0)
+            errors = list(project.get_errors(per_page=7))
+        assert [x.id for x in errors] == [str(x) for x in range(40)]
+        assert [x["path"] for x in server.requests].count("projects/0/errors") > 6
+
+    # a limiter with a fixed, generous rate doesn't pace itself to the quota
+    with SyntheticServer(rate_limit=3) as server:
+        with BugsnagDataClient(
+            TEST_TOKEN,
+            api_url=server.url,
+            rate_limiter=RateLimiter(rate=100),
+            retry_policy=RetryPolicy(max_attempts=1),
+        ) as client:
+            remaining = [
+                client.get("projects/0", raw=True).headers["X-RateLimit-Remaining"]
+                for _ in range(3)
+            ]
+            assert remaining == ["2", "1", "0"]
+            with pytest.raises(RateLimited):
+                client.get_project(0)
+
+
+def test_hooks_and_metrics(mock_server):
+    """every attempt, retry and cache hit should fire hooks that metrics aggregate"""
+    responses = [MockResponse(status=503), MockResponse(project_data(1))]
+    mock_server.route("projects/1", lambda request: responses.pop(0))
+    events = []
+    with BugsnagDataClient(
+        TEST_TOKEN,
+        api_url=mock_server.url,
+        retry_policy=RetryPolicy(backoff_base=0.001),
+        response_cache=ResponseCache(ttl=60),
+        metrics=True,
+    ) as client:
+        for event in EVENTS:
+            client.on(event, events.append)
+        client.get_project(1)
+        client.get_project(1)
+
+    assert [x.event for x in events] == [
+        "before_request",
+        "after_response",
+        "retry",
+        "before_request",
+        "after_response",
+        "cache_hit",
+    ]
+    assert {x.endpoint for x in events} == {"projects/{id}"}
+    assert events[0].request_id == events[1].request_id != events[3].request_id
+    assert events[4].attempt == 2
+    assert events[4].size == len(json.dumps(project_data(1)))
+    assert events[4].elapsed >= events[4].duration > 0
+
+    metrics = client.metrics.snapshot()["GET projects/{id}"]
+    assert metrics["requests"] == 2
+    assert metrics["statuses"] == {503: 1, 200: 1}
+    assert (metrics["retries"], metrics["cache_hits"]) == (1, 1)
+
+
+def test_raising_hook(mock_server):
+    """an exception raised by a hook should reach the caller as is"""
+    mock_server.route("projects/1", project_data(1))
+
+    def veto(event):
+        """refuses every request"""
+        raise ValueError("vetoed {}".format(event.url))
+
+    with BugsnagDataClient(TEST_TOKEN, api_url=mock_server.url) as client:
+        client.on("before_request", veto)
+        with pytest.raises(ValueError):
+            client.get_project(1)
+
+    async def run():
+        """async portion of the test"""
+        async with AsyncBugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url
+        ) as client:
+            client.on("before_request", veto)
+            with pytest.raises(ValueError):
+                await client.get_project(1)
+
+    run_async(run())
+    assert not mock_server.requests
+
+
+def test_conditional_cache(mock_server):
+    """unchanged responses should be revalidated with etags and reused"""
+
+    def handler(request):
+        """304 when the client already has the current etag"""
+        if request["headers"].get("If-None-Match") == '"v1"':
+            return MockResponse(status=304, headers={"ETag": '"v1"'})
+        return MockResponse(project_data(1), headers={"ETag": '"v1"'})
+
+    mock_server.route("projects/1", handler)
+    mock_server.route("projects/1/trend", [{"events_count": 1}])
+    cache = ResponseCache(max_entries=2, ttls={"projects/*/trend": 60})
+    with BugsnagDataClient(
+        TEST_TOKEN, api_url=mock_server.url, response_cache=cache
+    ) as client:
+        first = client.get("projects/1")
+        second = client.get("projects/1")
+        assert first is second
+        assert len(mock_server.requests) == 2
+        assert mock_server.requests[-1]["headers"]["If-None-Match"] == '"v1"'
+        assert cache.metrics["revalidations"] == 1
+
+        client.get("projects/1/trend")
+        client.get("projects/1/trend")
+        assert len(mock_server.requests) == 3
+        assert cache.hits == 1
+
+        mock_server.route(
+            "projects/2", MockResponse(project_data(2), headers={"ETag": "x"})
+        )
+        client.get("projects/2")
+        assert len(cache) == 2
+        url = urllib.parse.urljoin(mock_server.url, "projects/1")
+        assert cache.get(url, namespace=client.cache_namespace) is None
+
+
+def test_shared_disk_cache(mock_server, tmp_path):
+    """a sqlite response cache should keep data warm across clients"""
+    mock_server.route("projects/1", project_data(1))
+    path = str(tmp_path / "responses.db")
+    for _ in range(2):
+        cache = ResponseCache(ttl=60, backend=SQLiteCache(path))
+        with BugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url, response_cache=cache
+        ) as client:
+            assert client.get_project(1).name == "project 1"
+    assert len(mock_server.requests) == 1
+
+    # a client with another token never reads the entries of the first one
+    cache = ResponseCache(ttl=60, backend=SQLiteCache(path))
+    with BugsnagDataClient(
+        "other-token", api_url=mock_server.url, response_cache=cache
+    ) as client:
+        assert client.get_project(1).name == "project 1"
+    assert len(mock_server.requests) == 2
+
+
+def test_cache_single_lookup(mock_server):
+    """a cache miss should read the backend once"""
+    mock_server.route("projects/1", project_data(1))
+    backend = MemoryCache()
+    with BugsnagDataClient(
+        TEST_TOKEN, api_url=mock_server.url, response_cache=backend
+    ) as client:
+        client.get("projects/1")
+    assert backend.metrics["misses"] == 1
+    assert backend.metrics["hits"] == 0
+
+
+def test_cache_backend_shortcut(mock_server):
+    """a bare cache backend should be wrapped in a response cache"""
+    client = BugsnagDataClient(
+        TEST_TOKEN, api_url=mock_server.url, response_cache=MemoryCache()
+    )
+    assert isinstance(client.response_cache, ResponseCache)
+
+
+def test_fan_out(mock_server, local_client):
+    """errors for every project should stream back, with per-project failures"""
+    mock_server.route(
+        "organizations/org/projects", [project_data(x) for x in range(4)]
+    )
+    for project_id in range(3):
+        mock_server.route(
+            "projects/{}/errors".format(project_id),
+            [error_data("{}-{}".format(project_id, x)) for x in range(2)],
+        )
+    mock_server.route("projects/3/errors", "not json")
+    organization = Organization(ORGANIZATION_DATA, client=local_client)
+
+    results = list(organization.get_errors_for_all_projects(max_workers=2))
+    assert len(results) == 4
+    failed = [x for x in results if x.error]
+    assert [x.item.id for x in failed] == ["3"]
+    for result in results:
+        if not result.error:
+            assert [x.id[0] for x in result.result] == [result.item.id] * 2
+
+    squares = sorted(x.result for x in local_client.map(lambda x: x * x, range(50)))
+    assert squares == [x * x for x in range(50)]
+
+
+def test_async_fan_out(mock_server):
+    """the async client should fan out with the same api"""
+    mock_server.route("organizations/org/projects", [project_data(x) for x in range(3)])
+    for project_id in range(3):
+        mock_server.route(
+            "projects/{}/errors".format(project_id), [error_data(project_id)]
+        )
+
+    async def run():
+        """async portion of the test"""
+        async with AsyncBugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url
+        ) as client:
+            organization = Organization(ORGANIZATION_DATA, client=client)
+            results = [x async for x in organization.get_errors_for_all_projects()]
+            assert sorted(x.item.id for x in results) == ["0", "1", "2"]
+            assert all(x.result[0].id == x.item.id for x in results)
+
+    run_async(run())
+
+
+def test_get_failures(mock_server, local_client):
+    """gets should raise for an error status instead of returning the error body"""
+    mock_server.route("projects/9", MockResponse({"errors": ["Not found"]}, status=404))
+    with pytest.raises(RequestFailed) as failure:
+        local_client.get("projects/9")
+    assert failure.value.status == 404
+    with pytest.raises(RequestFailed):
+        local_client.get_project(9)
+    assert local_client.get("projects/9", raw=True).status_code == 404
+
+
+def test_error_mutations(mock_server, local_client):
+    """errors should be updated and deleted with patch and delete requests"""
+    mock_server.route(
+        "projects/0/errors/1", {**error_data(1), "status": "fixed"}, method="PATCH"
+    )
+    mock_server.route("projects/0/errors/1", MockResponse(status=204), method="DELETE")
+    mock_server.route("projects/0/errors/2", MockResponse(status=404), method="DELETE")
+    project = local_client.build(Project, project_data(0))
+    error = local_client.build(Error, error_data(1), project=project)
+
+    assert error.update(Error.Operation.FIX) is error
+    assert error.status == "fixed"
+    request = mock_server.requests[-1]
+    assert request["method"] == "PATCH"
+    assert json.loads(request["body"]) == {"operation": "fix"}
+
+    # a reference is materialized from the updated payload
+    mock_server.route("projects/0/errors/3", error_data(3), method="PATCH")
+    ref = ErrorRef(local_client, "3", project=project)
+    assert ref.update(Error.Operation.SNOOZE, reopen_rules={}) is ref
+    assert ref.materialized and ref.resolve().project is project
+
+    assert error.delete() is None
+    with pytest.raises(RequestFailed) as failure:
+        local_client.build(Error, error_data(2), project=project).delete()
+    assert failure.value.status == 404
+
+
+def test_write_failures(mock_server, local_client):
+    """every write verb should raise for an error status"""
+    for method in ["POST", "PUT", "PATCH", "DELETE"]:
+        mock_server.route(
+            "projects/0", MockResponse({"errors": ["nope"]}, status=422), method=method
+        )
+
+    async def run():
+        """async portion of the test"""
+        async with AsyncBugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url
+        ) as client:
+            for method in ["post", "put", "patch", "delete"]:
+                with pytest.raises(RequestFailed):
+                    await getattr(client, method)("projects/0")
+
+    for method in ["post", "put", "patch", "delete"]:
+        with pytest.raises(RequestFailed) as failure:
+            getattr(local_client, method)("projects/0")
+        assert failure.value.status == 422
+    run_async(run())
+
+
+def test_bulk_update_errors(mock_server, local_client):
+    """bulk updates should be chunked, concurrent, and reported per id"""
+
+    def bulk(request):
+        """fails the chunk with error 13 in it"""
+        ids = request["query"]["error_ids[]"]
+        return MockResponse(status=500 if "13" in ids else 204)
+
+    mock_server.route("projects/0/errors", bulk, method="PATCH")
+    project = local_client.build(Project, project_data(0))
+    ids = [str(x) for x in range(25)]
+    results = project.bulk_update_errors(
+        ids + ["0"], Error.Operation.IGNORE, chunk_size=10, max_workers=2
+    )
+    assert [x.error_id for x in results] == ids
+    assert [x.error_id for x in results if not x.ok] == ids[10:20]
+    assert results[13].error.status == 500
+    assert len(mock_server.requests) == 3
+    bodies = [json.loads(x["body"]) for x in mock_server.requests]
+    assert bodies == [{"operation": "ignore"}] * 3
+
+    errors = [local_client.build(Error, error_data(x)) for x in range(3)]
+    assert all(x.ok for x in project.bulk_update_errors(errors, Error.Operation.FIX))
+    assert mock_server.requests[-1]["query"]["error_ids[]"] == ["0", "1", "2"]
+
+
+def test_async_bulk_update_errors(mock_server):
+    """bulk updates should be awaitable on the async client"""
+
+    def bulk(request):
+        """fails the chunk with error 3 in it"""
+        ids = request["query"]["error_ids[]"]
+        return MockResponse(status=500 if "3" in ids else 204)
+
+    mock_server.route("projects/0/errors", bulk, method="PATCH")
+
+    async def run():
+        """async portion of the test"""
+        async with AsyncBugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url
+        ) as client:
+            project = client.build(Project, project_data(0))
+            results = await project.bulk_update_errors(
+                range(5), Error.Operation.OPEN, chunk_size=2
+            )
+            assert [x.ok for x in results] == [True, True, False, False, True]
+            assert results[3].error.status == 500
+            assert len(mock_server.requests) == 3
+
+    run_async(run())
+
+
+def test_single_flight():
+    """concurrent identical gets should share one request and its result"""
+    with MockServer(latency=0.2) as server:
+        server.route("projects/1", project_data(1))
+        server.route("projects", [])
+        with BugsnagDataClient(TEST_TOKEN, api_url=server.url) as client:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                projects = list(executor.map(client.get_project, [1] * 8))
+                paths = ["projects?a=1&b=2", "projects?b=2&a=1"]
+                assert list(executor.map(client.get, paths)) == [[], []]
+            assert all(x is projects[0] for x in projects)
+            assert client.single_flight.metrics == {"calls": 2, "coalesced": 8}
+            assert client.single_flight.in_flight == 0
+        assert len(server.requests) == 2
+
+        with BugsnagDataClient(
+            TEST_TOKEN, api_url=server.url, coalesce=False
+        ) as client:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                list(executor.map(client.get_project, [1] * 3))
+        assert len(server.requests) == 5
+
+
+def test_single_flight_errors():
+    """callers joining a failed call should get its exception"""
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        """fails once released"""
+        started.set()
+        release.wait()
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", fail)
+        started.wait()
+        follower = executor.submit(flight.do, "key", fail)
+        while not flight.coalesced:
+            time.sleep(0.01)
+        release.set()
+        for future in [leader, follower]:
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.calls == 1 and flight.in_flight == 0
+    assert flight.do("key", lambda: 1) == 1
@@ -0,0 +1,66 @@
+"""
+tests for the optional integrations
+"""
+import pytest
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models.client import BugsnagDataClient
+from pybugsnag.test.fixtures import project_data
+from pybugsnag.test.server import MockResponse
+from pybugsnag.utils.retry import RetryPolicy
+
+
+def flaky_client(mock_server, **kwargs):
+    """a client whose first request for a project gets a 503"""
+    responses = [MockResponse(status=503), MockResponse(project_data(1))]
+    mock_server.route("projects/1", lambda request: responses.pop(0))
+    return BugsnagDataClient(
+        TEST_TOKEN,
+        api_url=mock_server.url,
+        retry_policy=RetryPolicy(backoff_base=0.001),
+        **kwargs
+    )
+
+
+def test_opentelemetry(mock_server):
+    """every attempt should be traced as a client span"""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+    from pybugsnag.contrib.otel import TracingHooks
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    with flaky_client(mock_server) as client:
+        TracingHooks(tracer_provider=provider).attach(client.hooks)
+        client.get_project(1)
+
+    spans = exporter.get_finished_spans()
+    assert [x.name for x in spans] == ["GET projects/{id}"] * 2
+    assert [x.attributes["http.response.status_code"] for x in spans] == [503, 200]
+    assert not spans[0].status.is_ok
+    assert spans[1].attributes["http.request.resend_count"] == 1
+
+
+def test_prometheus(mock_server):
+    """latency, bytes and retries should be exported per endpoint"""
+    prometheus_client = pytest.importorskip("prometheus_client")
+    from pybugsnag.contrib.prometheus import PrometheusMetrics
+
+    registry = prometheus_client.CollectorRegistry()
+    with flaky_client(mock_server) as client:
+        PrometheusMetrics(registry=registry).attach(client.hooks)
+        client.get_project(1)
+
+    labels = {"method": "GET", "endpoint": "projects/{id}"}
+    sample = registry.get_sample_value
+    assert sample("pybugsnag_request_retries_total", labels) == 1
+    assert sample("pybugsnag_response_bytes_total", labels) > 0
+    for status in ["200", "503"]:
+        count = sample(
+            "pybugsnag_request_duration_seconds_count", {**labels, "status": status}
+        )
+        assert count == 1
@@ -0,0 +1,176 @@
+"""
+tests for the streaming exporters
+"""
+import gzip
+import json
+import pytest
+from pybugsnag.export import Checkpoint, NDJSONWriter, ParquetWriter, export
+from pybugsnag.models import Event, Project
+from pybugsnag.models.pagination import Paginator
+from pybugsnag.test.fixtures import event_data, project_data
+
+
+EVENTS = [event_data(x, full_report=True) for x in range(10)]
+
+
+class Interrupted(Exception):
+    """stands in for a crash partway through an export"""
+
+
+class FlakyPaginator(Paginator):
+    """a paginator that dies after a number of pages"""
+
+    def __init__(self, *args, fail_after=None, **kwargs):
+        """constructor"""
+        super().__init__(*args, **kwargs)
+        self.fail_after = fail_after
+
+    def pages(self, start=None):
+        """yields pages until it is time to fail"""
+        for count, page in enumerate(super().pages(start=start)):
+            if count == self.fail_after:
+                raise Interrupted()
+            yield page
+
+
+def read_ndjson(path):
+    """reads back every line of a gzipped ndjson file"""
+    with gzip.open(path, "rt") as export_file:
+        return [json.loads(x) for x in export_file]
+
+
+def test_ndjson_export(mock_server, local_client, tmp_path):
+    """events should be streamed into a gzipped ndjson file"""
+    mock_server.paged_route("projects/0/events", EVENTS, per_page=3)
+    project = Project(project_data(0), client=local_client)
+    path = str(tmp_path / "events.ndjson.gz")
+
+    result = export(project.get_events(full_reports=True), NDJSONWriter(path))
+    assert result.pages == 4
+    assert result.rows == 10
+    assert read_ndjson(path) == EVENTS
+
+
+def test_export_limit(mock_server, local_client, tmp_path):
+    """an export should stop at the paginator's limit"""
+    mock_server.paged_route("projects/0/events", EVENTS, per_page=3)
+    project = Project(project_data(0), client=local_client)
+    path = str(tmp_path / "events.ndjson.gz")
+
+    result = export(project.get_events(limit=2), NDJSONWriter(path))
+    assert (result.pages, result.rows) == (1, 2)
+    assert read_ndjson(path) == EVENTS[:2]
+
+    mock_server.requests.clear()
+    checkpoint = str(tmp_path / "checkpoint.json")
+    paginator = project.get_events(limit=4)
+    result = export(paginator, NDJSONWriter(path), checkpoint=checkpoint)
+    assert (result.pages, result.rows) == (2, 4)
+    assert read_ndjson(path) == EVENTS[:4]
+    assert len(mock_server.requests) == 2
+    assert Checkpoint(checkpoint).done
+
+
+def test_ndjson_resume(mock_server, local_client, tmp_path):
+    """an interrupted export should pick up after the last page it wrote"""
+    mock_server.paged_route("projects/0/events", EVENTS, per_page=3)
+    path = str(tmp_path / "events.ndjson.gz")
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    flaky = FlakyPaginator(local_client, "projects/0/events", Event, fail_after=2)
+    with pytest.raises(Interrupted):
+        export(flaky, NDJSONWriter(path), checkpoint=checkpoint)
+    state = Checkpoint(checkpoint)
+    assert (state.pages, state.rows, state.done) == (2, 6, False)
+    assert state.next_url.endswith("offset=6")
+
+    mock_server.requests.clear()
+    paginator = local_client.paginate("projects/0/events", Event)
+    result = export(paginator, NDJSONWriter(path), checkpoint=checkpoint)
+    assert (result.pages, result.rows) == (4, 10)
+    assert len(mock_server.requests) == 2
+    assert read_ndjson(path) == EVENTS
+    assert Checkpoint(checkpoint).done
+
+    # a finished export is not run again
+    mock_server.requests.clear()
+    export(paginator, NDJSONWriter(path), checkpoint=checkpoint)
+    assert not mock_server.requests
+
+
+def test_ndjson_resume_partial_write(mock_server, local_client, tmp_path):
+    """output written after the last checkpoint should be dropped when resuming"""
+    mock_server.paged_route("projects/0/events", EVENTS, per_page=3)
+    path = str(tmp_path / "events.ndjson.gz")
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    flaky = FlakyPaginator(local_client, "projects/0/events", Event, fail_after=2)
+    with pytest.raises(Interrupted):
+        export(flaky, NDJSONWriter(path), checkpoint=checkpoint)
+    # a crash between writing a page and saving the checkpoint
+    with open(path, "ab") as export_file:
+        export_file.write(gzip.compress(b'{"id": "duplicate"}\n')[:20])
+
+    paginator = local_client.paginate("projects/0/events", Event)
+    export(paginator, NDJSONWriter(path), checkpoint=checkpoint)
+    assert read_ndjson(path) == EVENTS
+
+
+def test_done_with_last_page(mock_server, local_client, tmp_path):
+    """the last page should be checkpointed as done along with its progress"""
+    mock_server.paged_route("projects/0/events", EVENTS, per_page=3)
+    path = str(tmp_path / "events.ndjson")
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    class CrashingWriter(NDJSONWriter):
+        """a writer dying while closing the finished output"""
+
+        def close(self, flush=True):
+            """closes the output file, then crashes"""
+            super().close(flush=flush)
+            raise Interrupted()
+
+    paginator = local_client.paginate("projects/0/events", Event)
+    with pytest.raises(Interrupted):
+        export(paginator, CrashingWriter(path), checkpoint=checkpoint)
+    state = Checkpoint(checkpoint)
+    assert (state.pages, state.rows, state.done) == (4, 10, True)
+
+    mock_server.requests.clear()
+    assert export(paginator, NDJSONWriter(path), checkpoint=checkpoint).rows == 10
+    assert not mock_server.requests
+
+
+def test_parquet_resume(mock_server, local_client, tmp_path):
+    """parquet exports should write whole part files and resume after the last one"""
+    pyarrow = pytest.importorskip("pyarrow")
+    pytest.importorskip("pyarrow.parquet")
+    mock_server.paged_route("projects/0/events", EVENTS, per_page=2)
+    directory = str(tmp_path / "events")
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    def writer():
+        """a writer flushing every two pages"""
+        return ParquetWriter(directory, columns=["id", "severity"], row_group_size=4)
+
+    flaky = FlakyPaginator(local_client, "projects/0/events", Event, fail_after=3)
+    with pytest.raises(Interrupted):
+        export(flaky, writer(), checkpoint=checkpoint)
+    # the third page was still buffered, so it is fetched again
+    assert Checkpoint(checkpoint).rows == 4
+
+    paginator = local_client.paginate("projects/0/events", Event)
+    result = export(paginator, writer(), checkpoint=checkpoint)
+    assert result.rows == 10
+
+    table = pyarrow.parquet.read_table(directory)
+    assert sorted(table.column("id").to_pylist(), key=int) == [
+        str(x) for x in range(10)
+    ]
+    assert table.column_names == ["id", "severity", "payload"]
+    assert json.loads(table.column("payload")[0].as_py()) == EVENTS[0]
+
+    # a fresh export into the same directory replaces the earlier parts
+    paginator = local_client.paginate("projects/0/events", Event, limit=4)
+    assert export(paginator, writer()).rows == 4
+    assert pyarrow.parquet.read_table(directory).num_rows == 4
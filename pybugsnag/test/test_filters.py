@@ -0,0 +1,78 @@
+"""
+tests for the filter builder
+"""
+import urllib.parse
+from datetime import datetime
+import pytest
+from pybugsnag.filters import F, as_filter
+from pybugsnag.models import EventField, Project
+from pybugsnag.models.error import InvalidFilter
+from pybugsnag.test.fixtures import event_field_data, project_data
+
+
+def test_filter_params():
+    """filters should compile into bugsnag's array params"""
+    query = (F.error_status == "open") & (F.app.release_stage == "a & b")
+    assert query.to_params() == (
+        ("filters[app.release_stage][][type]", "eq"),
+        ("filters[app.release_stage][][value]", "a & b"),
+        ("filters[error.status][][type]", "eq"),
+        ("filters[error.status][][value]", "open"),
+    )
+    assert query.to_params() is query.to_params()
+
+    # the same filter built in another order gives the same params
+    reordered = (F.app.release_stage == "a & b") & (F.error_status == "open")
+    assert reordered == query and hash(reordered) == hash(query)
+    assert reordered.to_params() == query.to_params()
+    either = (F.severity == "warning") | (F.severity == "error")
+    assert either.to_params() == F.severity.is_in(["error", "warning"]).to_params()
+
+    since = F.since == datetime(2018, 9, 24, 15, 23)
+    assert since.conditions == (("event.since", "eq", "2018-09-24T15:23:00Z"),)
+    assert (F["user.email"] != "a@b.c").conditions == (("user.email", "ne", "a@b.c"),)
+    assert F.event.unhandled.empty(False).conditions == (
+        ("event.unhandled", "empty", "false"),
+    )
+
+    either = (F.severity == "error") | (F.severity == "warning")
+    assert either == F.severity.is_in(["error", "warning"])
+    assert as_filter({"error.status": "open", "event.severity": ["error"]}) == (
+        (F.error_status == "open") & (F.severity == "error")
+    )
+
+
+def test_invalid_filters():
+    """shapes the api can't express should be refused"""
+    with pytest.raises(InvalidFilter):
+        (F.error_status == "open") & (F.error_status == "fixed")
+    with pytest.raises(InvalidFilter):
+        (F.error_status == "open") | (F.severity == "error")
+    with pytest.raises(InvalidFilter):
+        as_filter("error.status=open")
+
+
+def test_filter_validation():
+    """filters should be checked against a project's event fields"""
+    fields = [EventField(event_field_data(x)) for x in ["error.status", "user.email"]]
+    query = (F.error_status == "open") & (F.user_email != "a@b.c")
+    assert query.validate(fields) is query
+    with pytest.raises(InvalidFilter):
+        (F.error_status.empty()).validate(fields)
+    with pytest.raises(InvalidFilter):
+        (F.app.release_stage == "production").validate(fields)
+
+
+def test_filtered_request(mock_server, local_client):
+    """filters should be sent url-encoded, alongside the other params"""
+    mock_server.route("projects/0/errors", [])
+    project = Project(project_data(0), client=local_client)
+    query = (F.error_status == "open") & (F.release_stage == "a & b")
+    assert not list(project.get_errors(filters=query))
+
+    sent = mock_server.requests[-1]["query"]
+    assert sent["filters[error.status][][value]"] == ["open"]
+    assert sent["filters[app.release_stage][][value]"] == ["a & b"]
+    assert sent["sort"] == ["last_seen"]
+    raw = urllib.parse.urlencode(query.to_params())
+    assert "%5B" in raw and "a+%26+b" in raw
@@ -0,0 +1,221 @@
+"""
+offline tests for the models
+"""
+import gc
+import json
+import pickle
+from datetime import datetime
+import pytest
+from pybugsnag.globals import TEST_TOKEN
+from pybugsnag.models import (
+    Error,
+    ErrorRef,
+    Event,
+    Organization,
+    OrganizationRef,
+    Project,
+    ProjectRef,
+    Ref,
+    materialize,
+)
+from pybugsnag.models.async_client import AsyncBugsnagDataClient
+from pybugsnag.models.client import BugsnagDataClient
+from pybugsnag.models.error import RequestFailed
+from pybugsnag.test.fixtures import (
+    error_data,
+    event_data,
+    organization_data,
+    project_data,
+)
+from pybugsnag.test.helpers import run_async
+from pybugsnag.test.server import MockResponse
+
+
+def test_lazy_attributes():
+    """payload keys should resolve as snake_case attributes from a single dict"""
+    data = event_data(1, full_report=True)
+    data["camelCaseKey"] = "value"
+    project = Project(project_data(1))
+    event = Event(data, project=project)
+
+    assert event._data is data
+    assert event.camel_case_key == "value"
+    assert event.meta_data["extra"]["attempt"] == 1
+    assert event.project is project
+    assert "camel_case_key" in dir(event)
+    assert "camel_case_key" not in vars(event)
+    assert not hasattr(event, "missing_key")
+    with pytest.raises(AttributeError):
+        event.missing_key  # pylint: disable=pointless-statement
+
+    error = Error(error_data(1))
+    assert error.error_class == "RuntimeError"
+    assert pickle.loads(pickle.dumps(error)).error_class == "RuntimeError"
+
+
+def test_lazy_json():
+    """the payload should only be serialized on demand, once"""
+    event = Event(event_data(1))
+    assert event._serialized is None
+    serialized = event.to_json()
+    assert json.loads(serialized) == event_data(1)
+    assert event.to_json() is serialized
+    assert event._json is serialized
+
+
+def test_known_fields():
+    """model classes should precompute their key mappings from FIELDS"""
+    assert Event._keys["meta_data"] == "metaData"
+    assert Error._keys["error_class"] == "error_class"
+    assert Event._keys is not Error._keys
+
+
+def test_snakeify_nested():
+    """nested payloads should be snakeified when the client asks for it"""
+    data = event_data(1, full_report=True)
+    assert Event(data).meta_data["extra"]["queueName"] == "default"
+
+    client = BugsnagDataClient(TEST_TOKEN, snakeify_nested=True)
+    event = Event(data, client=client)
+    assert event.meta_data["extra"]["queue_name"] == "default"
+    assert event.meta_data is event.meta_data
+    assert event.exceptions[0]["stacktrace"][0]["line_number"] == 0
+    assert data["metaData"]["extra"]["queueName"] == "default"
+
+
+def test_lazy_dates():
+    """date fields should only be parsed when they are read"""
+    data = error_data(1)
+    data["last_seen"] = "2018-09-24T17:23:00.000+02:00"
+    data["first_seen_unfiltered"] = None
+    error = Error(data)
+    assert "first_seen" not in vars(error)
+    assert error.first_seen == datetime(2018, 9, 24, 15, 23)
+    assert error.last_seen == error.first_seen
+    assert "first_seen" in vars(error)
+    assert error.first_seen_unfiltered is None
+
+    data = event_data(1)
+    data["received_at"] = "not a date"
+    event = Event(data)
+    with pytest.raises(ValueError):
+        event.received_at  # pylint: disable=pointless-statement
+
+
+def test_model_json_backend():
+    """models should serialize with their client's json backend"""
+    client = BugsnagDataClient(TEST_TOKEN, json_backend="json")
+    event = Event(event_data(1), client=client)
+    assert event._json_backend is client.json_backend
+    assert event.to_json() == json.dumps(event_data(1))
+
+
+def test_identity_map(mock_server, local_client):
+    """the same entity should resolve to one instance, merging fresher payloads"""
+    mock_server.route("organizations/org/projects", [project_data(0), project_data(1)])
+    mock_server.route("projects/0", {**project_data(0), "name": "renamed"})
+    organization = local_client.build(Organization, organization_data())
+    projects = list(organization.get_projects())
+    assert projects[0].created_at == datetime(2018, 9, 24, 15, 23)
+
+    project = local_client.get_project(0)
+    assert project is projects[0]
+    assert project.name == "renamed"
+    assert project.organization is organization
+    assert project.slug == "project-0"
+
+    project._merge({"id": "0", "created_at": "2018-09-25T15:23:00.000Z"})
+    assert project.created_at == datetime(2018, 9, 25, 15, 23)
+    assert json.loads(project.to_json())["name"] == "renamed"
+    assert local_client.identity_map.hits == 1
+
+    del project, projects
+    gc.collect()
+    assert (Project, "0") not in local_client.identity_map
+    assert len(local_client.identity_map) == 1  # only the organization
+
+
+def test_identity_map_disabled():
+    """clients without an identity map should build a new model every time"""
+    client = BugsnagDataClient(TEST_TOKEN, identity_map=False)
+    first = client.build(Error, error_data(1))
+    assert client.build(Error, error_data(1)) is not first
+
+
+def test_lazy_references(mock_server, local_client):
+    """related models should be id-only references until an attribute is read"""
+    mock_server.route("projects/0", project_data(0))
+    mock_server.route("projects/0/errors/1/events", [event_data(1)])
+    error = local_client.build(Error, error_data(1))
+    assert isinstance(error.project, ProjectRef)
+    assert error.project is error.project
+    assert error.project.id == "0"
+    events = list(error.get_events())
+    assert events[0].project is error.project
+    assert mock_server.requests[0]["path"] == "projects/0/errors/1/events"
+    assert len(mock_server.requests) == 1
+
+    assert error.project.name == "project 0"
+    assert error.project.materialized
+    assert isinstance(error.project.organization, OrganizationRef)
+    assert error.project.organization.id == "org"
+    assert len(mock_server.requests) == 2
+    assert error.project.created_at == datetime(2018, 9, 24, 15, 23)
+    assert len(mock_server.requests) == 2
+
+    with pytest.raises(ValueError):
+        ErrorRef(local_client, "2").resolve()
+    with pytest.raises(TypeError):
+        Ref(local_client, "2")
+
+    # methods that need the payload resolve the reference first
+    ref = ProjectRef(local_client, "0")
+    assert json.loads(ref.to_json()) == project_data(0)
+    assert ref.materialized
+
+
+def test_materialize(mock_server, local_client):
+    """references should be fetched concurrently, skipping mapped models"""
+    for project_id in range(3):
+        mock_server.route("projects/{}".format(project_id), project_data(project_id))
+    missing = MockResponse({"errors": ["Not found"]}, status=404)
+    mock_server.route("projects/9", missing)
+    known = local_client.get_project(1)
+    refs = [ProjectRef(local_client, str(x)) for x in [0, 1, 2, 9]]
+    projects = materialize(refs, max_workers=2)
+    assert [x and x.id for x in projects] == ["0", "1", "2", None]
+    assert projects[1] is known
+    assert len(mock_server.requests) == 4
+    assert not refs[3].materialized
+
+    # a json error body isn't mistaken for a model
+    with pytest.raises(RequestFailed) as failure:
+        refs[3].resolve()
+    assert failure.value.status == 404
+    with pytest.raises(RequestFailed):
+        local_client.get_project(9)
+    assert (Project, None) not in local_client.identity_map
+
+    error_refs = [ErrorRef(local_client, "1", project=refs[0])]
+    mock_server.route("projects/0/errors/1", error_data(1))
+    assert materialize(error_refs)[0].project is refs[0].resolve()
+    assert materialize([]) == []
+
+
+def test_async_materialize(mock_server):
+    """references should be awaited on an async client"""
+    mock_server.route("projects/0", project_data(0))
+
+    async def run():
+        """async portion of the test"""
+        async with AsyncBugsnagDataClient(
+            TEST_TOKEN, api_url=mock_server.url
+        ) as client:
+            ref = ProjectRef(client, "0")
+            with pytest.raises(TypeError):
+                ref.name  # pylint: disable=pointless-statement
+            assert (await materialize([ref]))[0].name == "project 0"
+            assert ref.name == "project 0"
+            assert (await ref.fetch()) is ref.resolve()
+
+    run_async(run())
@@ -0,0 +1,77 @@
+"""
+tests for pivot values and their top-k aggregation
+"""
+import pytest
+from pybugsnag.models import Error, Pivot, PivotValue, Project
+from pybugsnag.pivots import TopK, top_pivot_values
+from pybugsnag.test.fixtures import (
+    error_data,
+    pivot_data,
+    pivot_value_data,
+    project_data,
+)
+from pybugsnag.test.server import MockResponse
+
+
+def test_pivot_values(mock_server, local_client):
+    """pivot values should be paginated, on errors and projects"""
+    values = [pivot_value_data("1.{}".format(x), events=x) for x in range(5)]
+    mock_server.paged_route("projects/0/pivots/app.version/values", values, 2)
+    mock_server.paged_route("projects/0/errors/1/pivots/app.version/values", values, 2)
+    project = local_client.build(Project, project_data(0))
+    error = local_client.build(Error, error_data(1), project=project)
+
+    pivot = Pivot(pivot_data("app.version"), client=local_client, project=project)
+    project_values = list(pivot.get_values(per_page=2))
+    assert isinstance(project_values[0], PivotValue)
+    assert [x.events for x in project_values] == list(range(5))
+    assert project_values[0].project is project
+    assert mock_server.requests[0]["query"]["per_page"] == ["2"]
+
+    pivot = Pivot(pivot_data("app.version"), client=local_client, error=error)
+    assert [x.value for x in pivot.get_values(limit=3)] == ["1.0", "1.1", "1.2"]
+    assert mock_server.requests[-1]["path"].startswith("projects/0/errors/1/")
+
+
+def test_top_k():
+    """the largest counts should be reported, exactly unless pruned"""
+    top = TopK(k=2)
+    top.update({"a": 3, "b": 1})
+    top.update([("b", 4), ("c", 2), ("b", 1)])
+    top.add("c")
+    assert top.most_common() == [("b", 6), ("a", 3)]
+    assert top.most_common(3)[-1] == ("c", 3)
+    assert not top.approximate
+
+    bounded = TopK(k=1, capacity=2)
+    bounded.update({"a": 5, "b": 1, "c": 2})
+    assert bounded.approximate and len(bounded) == 2
+    assert bounded.most_common() == [("a", 5)]
+    with pytest.raises(ValueError):
+        TopK(k=3, capacity=2)
+
+
+def test_top_pivot_values(mock_server, local_client):
+    """pivot values of many errors should be merged into one top-k"""
+    project = local_client.build(Project, project_data(0))
+    errors = [
+        local_client.build(Error, error_data(x), project=project) for x in range(4)
+    ]
+    for error in errors[:3]:
+        values = [
+            pivot_value_data("1.{}".format(x), events=int(error.id) + x)
+            for x in range(3)
+        ]
+        mock_server.paged_route(
+            "projects/0/errors/{}/pivots/app.version/values".format(error.id),
+            values,
+            per_page=2,
+        )
+    mock_server.route(
+        "projects/0/errors/3/pivots/app.version/values", MockResponse(status=500)
+    )
+
+    top = top_pivot_values(iter(errors), "app.version", k=2, max_workers=2)
+    assert top.most_common() == [("1.2", 9), ("1.1", 6)]
+    assert [x.item for x in top.failed] == [errors[3]]
+    assert top_pivot_values([], "app.version").most_common() == []
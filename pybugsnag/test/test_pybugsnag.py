@@ -12,10 +12,6 @@ from pybugsnag.models import (
     Project,
     Release,
 )
-from pybugsnag.models.client import test_client
-
-
-CLIENT = test_client()
 
 
 def is_list_of_type(check_list, check_type):
@@ -25,9 +21,9 @@ def is_list_of_type(check_list, check_type):
     return True
 
 
-def test_organizations():
+def test_organizations(synthetic_client):
     """testing accessing organizations"""
-    organizations = CLIENT.organizations
+    organizations = synthetic_client.organizations
     assert organizations
     assert isinstance(organizations, list)
 
@@ -35,7 +31,7 @@ def test_organizations():
     assert organization
     assert isinstance(organization, Organization)
 
-    found_organization = CLIENT.get_organization(organization.id)
+    found_organization = synthetic_client.get_organization(organization.id)
     assert isinstance(found_organization, Organization)
 
     assert isinstance(organization.created_at, datetime)
@@ -52,32 +48,32 @@ def test_organizations():
     assert "<pybugsnag.Organization" in str(organization)
 
 
-def test_projects():
+def test_projects(synthetic_client):
     """testing features around projects"""
-    organization = CLIENT.organizations[0]
+    organization = synthetic_client.organizations[0]
     assert organization
     assert is_list_of_type(organization.projects, Project)
     project = organization.projects[0]
 
-    found_project = CLIENT.get_project(project.id)
+    found_project = synthetic_client.get_project(project.id)
     assert isinstance(found_project, Project)
 
     assert isinstance(project.created_at, datetime)
     assert isinstance(project.updated_at, datetime)
 
-    errors = project.get_errors()
+    errors = list(project.get_errors())
     assert is_list_of_type(errors, Error)
 
     error_found = project.get_error(errors[0].id)
     assert isinstance(error_found, Error)
 
-    events = project.get_events()
+    events = list(project.get_events())
     assert is_list_of_type(events, Event)
 
     event_found = project.get_event(events[0].id)
     assert isinstance(event_found, Event)
 
-    releases = project.get_releases()
+    releases = list(project.get_releases())
     assert is_list_of_type(releases, Release)
 
     # TODO reimplement when the apiary is fixed
@@ -90,30 +86,30 @@ def test_projects():
     trend_resolution = project.get_trend_resolution()
     assert is_list_of_type(trend_resolution, dict)
 
-    pivots = project.get_pivots()
+    pivots = list(project.get_pivots())
     assert is_list_of_type(pivots, Pivot)
 
-    event_fields = project.get_event_fields()
+    event_fields = list(project.get_event_fields())
     assert is_list_of_type(event_fields, EventField)
 
     assert "<pybugsnag.Release" in str(releases[0])
     assert "<pybugsnag.EventField" in str(event_fields[0])
 
 
-def test_errors():
+def test_errors(synthetic_client):
     """testing features around errors"""
-    organization = CLIENT.organizations[0]
+    organization = synthetic_client.organizations[0]
     assert organization
     assert isinstance(organization.projects, list)
 
     project = organization.projects[0]
     assert isinstance(project, Project)
 
-    errors = project.get_errors()
+    errors = list(project.get_errors())
     assert is_list_of_type(errors, Error)
 
     error = errors[0]
-    events = error.get_events()
+    events = list(error.get_events())
     assert is_list_of_type(events, Event)
     assert isinstance(events[0].project, Project)
     assert isinstance(error.first_seen, datetime)
@@ -132,27 +128,27 @@ def test_errors():
     trend_resolution = error.get_trend_resolution()
     assert is_list_of_type(trend_resolution, dict)
 
-    pivots = error.get_pivots()
+    pivots = list(error.get_pivots())
     assert is_list_of_type(pivots, Pivot)
 
     assert "<pybugsnag.Error" in str(error)
     assert "<pybugsnag.Pivot" in str(pivots[0])
 
 
-def test_events():
+def test_events(synthetic_client):
     """testing features around events"""
-    organization = CLIENT.organizations[0]
+    organization = synthetic_client.organizations[0]
     assert organization
     assert isinstance(organization.projects, list)
 
     project = organization.projects[0]
     assert isinstance(project, Project)
 
-    errors = project.get_errors()
+    errors = list(project.get_errors())
     assert is_list_of_type(errors, Error)
     error = errors[0]
 
-    events = error.get_events()
+    events = list(error.get_events())
     assert is_list_of_type(events, Event)
     event = events[0]
 
@@ -0,0 +1,98 @@
+"""
+tests for incremental sync
+"""
+from pybugsnag.models import Organization, Project
+from pybugsnag.sync import SyncStore, sync, sync_all
+from pybugsnag.test.fixtures import (
+    error_data,
+    event_data,
+    organization_data,
+    project_data,
+)
+
+
+def stamp(minute):
+    """a timestamp some minutes into the day"""
+    return "2018-09-24T{:02d}:{:02d}:00Z".format(minute // 60, minute % 60)
+
+
+def error_at(error_id, first_seen, last_seen):
+    """an error payload first and last seen at the given minutes"""
+    data = error_data(error_id)
+    data.update({"first_seen": stamp(first_seen), "last_seen": stamp(last_seen)})
+    return data
+
+
+def newest_first(items, field):
+    """sorts payloads like the api does for a descending sort"""
+    return sorted(items, key=lambda x: x[field], reverse=True)
+
+
+def test_sync_errors(mock_server, local_client, tmp_path):
+    """repeated syncs should only page through what changed since the last one"""
+    errors = [error_at(x, x, x) for x in range(10)]
+    mock_server.paged_route(
+        "projects/0/errors", newest_first(errors, "last_seen"), per_page=3
+    )
+    project = Project(project_data(0), client=local_client)
+    store = SyncStore(str(tmp_path / "sync.db"))
+
+    report = sync(project, store, per_page=3)
+    assert sorted(int(x.id) for x in report.new) == list(range(10))
+    assert report.updated == []
+    assert report.cursor.ids == {"9"}
+
+    # a new error and a new event on an old one
+    errors[2] = error_at(2, 2, 20)
+    errors.append(error_at(10, 15, 15))
+    mock_server.paged_route(
+        "projects/0/errors", newest_first(errors, "last_seen"), per_page=3
+    )
+    mock_server.requests.clear()
+    report = sync(project, SyncStore(str(tmp_path / "sync.db")), per_page=3)
+    assert [x.id for x in report.new] == ["10"]
+    assert [x.id for x in report.updated] == ["2"]
+    # the first page ends on the cursor's timestamp, so one more page is read
+    assert len(mock_server.requests) == 2
+
+    mock_server.requests.clear()
+    report = sync(project, store, per_page=3)
+    assert report.new == report.updated == []
+    assert len(mock_server.requests) == 1
+
+
+def test_sync_events_boundary(mock_server, local_client):
+    """records sharing the cursor's timestamp, or repeated across pages, are deduped"""
+    events = [event_data(x) for x in range(4)]
+    for event in events:
+        event["received_at"] = stamp(5)
+    mock_server.paged_route("projects/0/events", list(events), per_page=3)
+    project = Project(project_data(0), client=local_client)
+    store = SyncStore()
+
+    report = sync(project, store, kind="events", per_page=3)
+    assert len(report.new) == 4
+    assert report.cursor.ids == {"0", "1", "2", "3"}
+
+    # a new event at the same timestamp, plus a page boundary that repeats one
+    newer = event_data(4)
+    newer["received_at"] = stamp(5)
+    mock_server.paged_route(
+        "projects/0/events", [newer] + events[:3] + events[2:], per_page=3
+    )
+    report = sync(project, store, kind="events", per_page=3)
+    assert [x.id for x in report.new] == ["4"]
+
+
+def test_sync_all(mock_server, local_client):
+    """every project of an organization is synced"""
+    mock_server.route("organizations/org/projects", [project_data(0), project_data(1)])
+    for project_id in range(2):
+        mock_server.route(
+            "projects/{}/errors".format(project_id),
+            [error_at(x, x, x) for x in range(3)],
+        )
+    organization = Organization(organization_data(), client=local_client)
+    results = list(sync_all(organization, SyncStore()))
+    assert sorted(x.item.id for x in results) == ["0", "1"]
+    assert all(len(x.result.new) == 3 for x in results)
@@ -0,0 +1,85 @@
+"""
+tests for the trend analytics
+"""
+import pytest
+from pybugsnag.models import Error, Project
+from pybugsnag.test.fixtures import error_data, project_data, trend_data
+from pybugsnag.test.server import MockResponse
+
+numpy = pytest.importorskip("numpy")
+from pybugsnag.trends import TrendMatrix, fetch_trends  # noqa: E402
+
+
+def test_alignment():
+    """series with different buckets should share one time index"""
+    trends = TrendMatrix.from_buckets(
+        {
+            "a": trend_data(counts=[1, 2, 3]),
+            "b": trend_data(counts=[5, 5], hours_ago=2),
+        }
+    )
+    assert len(trends) == 2
+    assert trends.counts.tolist() == [[0, 1, 2, 3], [5, 5, 0, 0]]
+    assert str(trends.starts[0]) == "2018-09-24T11:00:00.000"
+    assert trends.durations.tolist() == [3600] * 4
+    assert trends.totals().tolist() == [6, 10]
+    assert trends.rate(per=60)[0, 3] == 3 / 60
+    assert trends.delta()[0, 1:].tolist() == [1, 1, 1]
+    assert numpy.isnan(trends.delta()[0, 0])
+
+
+def test_ewma():
+    """the moving average should match the recursive definition"""
+    trends = TrendMatrix.from_buckets({"a": trend_data(counts=[4, 0, 8])})
+    assert trends.ewma(alpha=0.5).tolist() == [[4, 2, 5]]
+    assert trends.ewma(span=3).tolist() == [[4, 2, 5]]
+    with pytest.raises(ValueError):
+        trends.ewma()
+
+
+def test_spikes():
+    """a burst should stand out against its own history only"""
+    trends = TrendMatrix.from_buckets(
+        {
+            "flat": trend_data(counts=[0, 0, 0, 0, 0, 9]),
+            "noisy": trend_data(counts=[0, 20, 0, 20, 0, 9]),
+            "steady": trend_data(counts=[3, 3, 3, 3, 3, 3]),
+        }
+    )
+    scores = trends.zscores()
+    assert numpy.isnan(scores[:, 0]).all()
+    assert scores[0, -1] == 9
+    assert trends.spiking() == ["flat"]
+    # against just the previous bucket, the noisy series spikes too
+    assert trends.spiking(window=1) == ["flat", "noisy"]
+    assert trends.spikes(threshold=100).sum() == 0
+
+
+def test_fetch_trends(mock_server, local_client):
+    """trends of many errors should be fetched concurrently, in order"""
+    project = Project(project_data(0), client=local_client)
+    errors = [
+        Error(error_data(x), client=local_client, project=project) for x in range(4)
+    ]
+    for error in errors:
+        mock_server.route(
+            "projects/0/errors/{}/trend".format(error.id),
+            trend_data(counts=[int(error.id)] * 3),
+        )
+    mock_server.route("projects/0/errors/3/trend", MockResponse(status=500))
+
+    trends = fetch_trends(errors, buckets_count=3, max_workers=2)
+    assert trends.keys == errors[:3]
+    assert trends.totals().tolist() == [0, 3, 6]
+    assert [x.item for x in trends.failed] == [errors[3]]
+    assert mock_server.requests[0]["query"]["buckets_count"] == ["3"]
+
+
+def test_dataframe():
+    """trends should convert to a dataframe with a column per series"""
+    pytest.importorskip("pandas")
+    trends = TrendMatrix.from_buckets({"a": trend_data(counts=[1, 2])})
+    frame = trends.to_dataframe()
+    assert list(frame.columns) == ["a"]
+    assert frame["a"].tolist() == [1, 2]
+    assert str(frame.index[0]) == "2018-09-24 13:00:00"
@@ -0,0 +1,279 @@
+"""
+tests for the pybugsnag utilities
+"""
+import time
+import urllib.parse
+from datetime import datetime
+import pytest
+from pybugsnag.models.error import MissingDependency
+from pybugsnag.test.fixtures import event_data
+from pybugsnag.utils.cache import (
+    CacheBackend,
+    CacheEntry,
+    MemoryCache,
+    SQLiteCache,
+    normalize_url,
+)
+from pybugsnag.utils.hooks import (
+    AFTER_RESPONSE,
+    ERROR,
+    RETRY,
+    Hooks,
+    MetricsCollector,
+    endpoint_template,
+)
+from pybugsnag.utils.ratelimit import RateLimiter, parse_retry_after
+from pybugsnag.utils.retry import RetryPolicy
+from pybugsnag.utils.serialization import (
+    BACKENDS,
+    PREFERENCE,
+    STDLIB,
+    get_json_backend,
+)
+from pybugsnag.filters import F
+from pybugsnag.utils.text import (
+    dict_to_query_params,
+    iso8601_to_datetime,
+    snakeify,
+    snakeify_keys,
+)
+
+
+def test_rate_limiter_pacing():
+    """a bucket of one token at 20/s should pace 5 calls over ~0.2s"""
+    limiter = RateLimiter(rate=20, window=1, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    elapsed = time.monotonic() - start
+    assert 0.15 < elapsed < 1
+    assert limiter.requests == 5
+    assert limiter.throttled_requests == 4
+    assert limiter.metrics["throttled_time"] > 0.15
+
+
+def test_rate_limiter_headers():
+    """quota headers should teach the limiter its rate and remaining tokens"""
+    limiter = RateLimiter()
+    assert limiter.reserve() == 0
+
+    limiter.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0"})
+    assert limiter.rate == 60
+    assert 0.5 < limiter.reserve() <= 1
+
+    limiter = RateLimiter()
+    limiter.update({"Retry-After": "2"})
+    assert 1.5 < limiter.reserve() <= 2
+
+
+def test_parse_retry_after():
+    """retry-after may be seconds or an http date"""
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("garbage") is None
+
+
+def test_retry_policy_backoff():
+    """backoff grows exponentially up to the cap, with full jitter"""
+    policy = RetryPolicy(backoff_base=1, backoff_cap=5, jitter=False)
+    assert [policy.backoff(x) for x in range(1, 5)] == [1, 2, 4, 5]
+    assert policy.delay(1, headers={"Retry-After": "7"}) == 7
+
+    policy = RetryPolicy(backoff_base=1, backoff_cap=5)
+    assert all(0 <= policy.backoff(3) <= 4 for _ in range(100))
+
+    assert policy.should_retry("get", 1)
+    assert policy.should_retry("get", 1, status=502)
+    assert not policy.should_retry("get", 1, status=404)
+    assert not policy.should_retry("get", 3, status=502)
+    assert not policy.should_retry("post", 1, status=502)
+
+
+def test_normalize_url():
+    """cache keys should not depend on the order of query params"""
+    url = "http://host/a?a=1&b=2"
+    assert normalize_url("HTTP://Host/a?b=2&a=1") == normalize_url(url)
+
+
+def test_cache_backends(tmp_path):
+    """memory and sqlite backends should share the same semantics"""
+    for backend in [
+        MemoryCache(max_entries=2),
+        SQLiteCache(str(tmp_path / "cache.db"), max_entries=2),
+    ]:
+        backend.set("a", {"value": 1})
+        backend.set("b", [1, 2])
+        assert backend.get("a") == {"value": 1}
+        backend.set("c", "three")
+        assert backend.get("b") is None
+        assert backend.get("c") == "three"
+        assert len(backend) == 2
+
+        backend.set("expired", 1, ttl=-1)
+        assert backend.get("expired") is None
+        backend.delete("a")
+        assert backend.get("a") is None
+        assert backend.metrics["hits"] == 2
+        assert backend.metrics["misses"] == 3
+        backend.clear()
+        assert not len(backend)
+
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_sqlite_cache_persistence(tmp_path):
+    """entries in a sqlite cache should survive the process, with byte limits"""
+    path = str(tmp_path / "cache.db")
+    entry = CacheEntry("http://host/a", {"id": "1"}, etag="x", links={})
+    cache = SQLiteCache(path)
+    cache.set("a", entry)
+    cache.close()
+
+    loaded = SQLiteCache(path).get("a")
+    assert isinstance(loaded, CacheEntry)
+    assert loaded.data == {"id": "1"} and loaded.etag == "x"
+    assert loaded.stored_at == entry.stored_at
+
+    cache = SQLiteCache(str(tmp_path / "small.db"), max_bytes=100)
+    cache.set("a", "x" * 60)
+    cache.set("b", "y" * 60)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 60
+
+
+def test_snakeify():
+    """key conversion should be memoized and optionally recursive"""
+    assert snakeify("camelCaseKey") == "camel_case_key"
+    assert snakeify("HTTPMethod") == "http_method"
+    assert snakeify("already_snake") == "already_snake"
+    hits = snakeify.cache_info().hits
+    snakeify("camelCaseKey")
+    assert snakeify.cache_info().hits == hits + 1
+
+    nested = {"metaData": {"queueName": "x", "list": [{"lineNumber": 1}]}}
+    assert snakeify_keys(nested) == {
+        "meta_data": {"queue_name": "x", "list": [{"line_number": 1}]}
+    }
+
+
+@pytest.mark.parametrize("fromisoformat", [True, False])
+def test_iso8601_to_datetime(fromisoformat, monkeypatch):
+    """timestamps should parse with or without millis, and with offsets"""
+    if not fromisoformat:
+        # python 3.6 has no datetime.fromisoformat
+        monkeypatch.setattr("pybugsnag.utils.text.FROMISOFORMAT", None)
+    expected = datetime(2018, 9, 24, 15, 23)
+    assert iso8601_to_datetime("2018-09-24T15:23:00Z") == expected
+    assert iso8601_to_datetime("2018-09-24T15:23:00.000Z") == expected
+    assert iso8601_to_datetime("2018-09-24T15:23:00Z", milliseconds=True) == expected
+    assert iso8601_to_datetime("2018-09-24T17:23:00+02:00") == expected
+    assert iso8601_to_datetime("2018-09-24T10:23:00.000-0500") == expected
+    assert iso8601_to_datetime("2018-09-24T15:23:00.0000001Z") == expected
+    assert iso8601_to_datetime(
+        "2018-09-24T15:23:00.123456789Z"
+    ) == expected.replace(microsecond=123456)
+    assert iso8601_to_datetime(None) is None
+    assert iso8601_to_datetime(expected) is expected
+    with pytest.raises(ValueError):
+        iso8601_to_datetime("yesterday")
+
+
+def test_query_params():
+    """query strings should be encoded, canonical, and leave their input alone"""
+    base = datetime(2018, 9, 24, 15, 23)
+    params = {"q": "a & b+c", "full_reports": True, "base": base, "per_page": 30}
+    query = dict_to_query_params(params)
+    assert query == (
+        "?base=2018-09-24T15%3A23%3A00Z&full_reports=true&per_page=30&q=a+%26+b%2Bc"
+    )
+    assert params["base"] is base and params["full_reports"] is True
+    assert dict_to_query_params(dict(reversed(list(params.items())))) == query
+    assert dict_to_query_params({}) == dict_to_query_params({"a": None}) == ""
+
+    # repeated params, and filters keep the pairing of their array params
+    assert dict_to_query_params({"stage": ["b c", "a"]}) == "?stage=b+c&stage=a"
+    filters = F.severity.is_in(["warning", "error"])
+    query = dict_to_query_params({"sort": "last_seen", "filters": filters})
+    assert urllib.parse.parse_qsl(query[1:]) == list(filters.to_params()) + [
+        ("sort", "last_seen")
+    ]
+    url = "https://api.bugsnag.com/projects/1/errors{}".format(query)
+    assert normalize_url(url) == url
+
+    # equal values of different types aren't confused by the cache
+    assert dict_to_query_params({"offset": 1}) == "?offset=1"
+    assert dict_to_query_params({"offset": True}) == "?offset=true"
+    assert dict_to_query_params({"per_page": 1.0}) == "?per_page=1.0"
+    assert dict_to_query_params({"per_page": 1}) == "?per_page=1"
+    assert dict_to_query_params({"ids": (1, True)}) == "?ids=1&ids=true"
+    assert dict_to_query_params({"ids": (True, 1)}) == "?ids=true&ids=1"
+
+    # filters on several fields are ordered by field
+    first = (F.error_status == "open") & (F.severity == "error")
+    second = (F.severity == "error") & (F.error_status == "open")
+    assert dict_to_query_params({"filters": first}) == dict_to_query_params(
+        {"filters": second}
+    )
+
+
+def test_json_backends():
+    """the fastest installed json backend should be picked by default"""
+    default = get_json_backend()
+    assert default.name == next(x for x in PREFERENCE if x in BACKENDS)
+    assert get_json_backend("json") is STDLIB
+    assert get_json_backend(STDLIB) is STDLIB
+    with pytest.raises(MissingDependency):
+        get_json_backend("simplejson")
+
+    payload = event_data(1, full_report=True)
+    for backend in BACKENDS.values():
+        serialized = backend.dumps(payload)
+        assert isinstance(serialized, str)
+        assert backend.loads(serialized.encode("utf-8")) == payload
+
+
+def test_endpoint_template():
+    """ids should be replaced so metrics group by endpoint"""
+    base = "https://api.bugsnag.com/"
+    assert endpoint_template(base + "user/organizations") == "user/organizations"
+    assert (
+        endpoint_template(base + "projects/5a1/errors/5b2/events?per_page=30")
+        == "projects/{id}/errors/{id}/events"
+    )
+    assert endpoint_template(base + "errors/5b2/latest_event") == (
+        "errors/{id}/latest_event"
+    )
+    assert endpoint_template(base + "organizations/5a1/admins_count") == (
+        "organizations/{id}/admins_count"
+    )
+
+
+def test_metrics_collector():
+    """the collector should aggregate counts, bytes and latency per endpoint"""
+    hooks = Hooks()
+    metrics = MetricsCollector().attach(hooks)
+    url = "https://api.bugsnag.com/projects/{}/errors"
+    for index, duration in enumerate([0.004, 0.02, 0.03, 0.2]):
+        path = url.format(index)
+        hooks.emit(AFTER_RESPONSE, "get", path, status=200, duration=duration, size=10)
+    hooks.emit(AFTER_RESPONSE, "get", url.format(9), status=503, duration=1.5, size=0)
+    hooks.emit(RETRY, "get", url.format(9), delay=0.5, status=503)
+    hooks.emit(ERROR, "get", url.format(9), duration=20, exception=OSError())
+
+    snapshot = metrics.snapshot()
+    assert list(snapshot) == ["GET projects/{id}/errors"]
+    endpoint = snapshot["GET projects/{id}/errors"]
+    assert endpoint["requests"] == 6
+    assert endpoint["errors"] == 2
+    assert endpoint["retries"] == 1
+    assert endpoint["bytes"] == 40
+    assert endpoint["statuses"] == {200: 4, 503: 1}
+    assert endpoint["latency_p50"] == 0.05
+    assert endpoint["latency_p99"] is None
+    assert endpoint["latency_buckets"][0.005] == 1
+    assert metrics.slowest() == ["GET projects/{id}/errors"]
+
+    with pytest.raises(ValueError):
+        hooks.register("after_request", print)
@@ -0,0 +1,215 @@
+"""
+vectorized analytics over trend buckets, across many errors (or projects) at once
+
+    from pybugsnag.trends import fetch_trends
+
+    trends = fetch_trends(project.get_errors(limit=1000), buckets_count=24)
+    rates = trends.rate(per=3600)  # events per hour, one row per error
+    for error in trends.spiking(threshold=3):
+        print("spike in", error)
+
+the bucket lists returned by get_trend_buckets / get_trend_resolution are aligned
+on a common time index into a 2d numpy array, with a row per series and a column
+per bucket, so every statistic is computed for all the series in one go
+"""
+from operator import methodcaller
+from pybugsnag.models.error import MissingDependency
+from pybugsnag.utils.text import iso8601_to_datetime
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pandas
+except ImportError:  # pragma: no cover
+    pandas = None
+
+
+DEFAULT_ZSCORE_THRESHOLD = 3.0
+
+
+def _parse_times(values):
+    """parses api timestamps into a datetime64 array"""
+    try:
+        # numpy parses iso 8601 directly, as long as there's no timezone suffix
+        return numpy.array(
+            [x[:-1] if x.endswith("Z") else x for x in values], dtype="datetime64[ms]"
+        )
+    except ValueError:
+        return numpy.array(
+            [iso8601_to_datetime(x) for x in values], dtype="datetime64[ms]"
+        )
+
+
+class TrendMatrix:
+    """
+    event counts of many series of trend buckets, aligned on a common time index
+
+    `keys` label the rows (the errors or projects the trends are for), `starts` and
+    `ends` bound the columns, and `counts` is a (len(keys), len(starts)) float array.
+    buckets a series doesn't have are filled with `fill_value`
+    """
+
+    def __init__(self, keys, starts, ends, counts, failed=None):
+        """constructor"""
+        self.keys = list(keys)
+        self.starts = starts
+        self.ends = ends
+        self.counts = counts
+        self.failed = failed or []
+
+    def __repr__(self):
+        """repr"""
+        return "<TrendMatrix {} series x {} buckets>".format(*self.counts.shape)
+
+    def __len__(self):
+        """number of series"""
+        return len(self.keys)
+
+    @classmethod
+    def from_buckets(cls, series, fill_value=0.0):
+        """
+        builds a matrix from a dict (or (key, buckets) pairs) of trend bucket lists,
+        each bucket being a {"from", "to", "events_count"} dict
+        """
+        if numpy is None:
+            raise MissingDependency("numpy is required for trend analytics")
+        items = list(series.items() if isinstance(series, dict) else series)
+        keys = [x[0] for x in items]
+        parsed = []
+        for _, buckets in items:
+            parsed.append(
+                (
+                    _parse_times([x["from"] for x in buckets]),
+                    _parse_times([x["to"] for x in buckets]),
+                    numpy.array([x["events_count"] for x in buckets], dtype=float),
+                )
+            )
+        if parsed:
+            all_starts = numpy.concatenate([x[0] for x in parsed])
+            all_ends = numpy.concatenate([x[1] for x in parsed])
+        else:
+            all_starts = all_ends = numpy.array([], dtype="datetime64[ms]")
+        starts, first = numpy.unique(all_starts, return_index=True)
+        ends = all_ends[first]
+        counts = numpy.full((len(keys), len(starts)), fill_value, dtype=float)
+        for row, (series_starts, _, series_counts) in enumerate(parsed):
+            counts[row, numpy.searchsorted(starts, series_starts)] = series_counts
+        return cls(keys, starts, ends, counts)
+
+    @property
+    def durations(self):
+        """length of every bucket, in seconds"""
+        return (self.ends - self.starts) / numpy.timedelta64(1, "s")
+
+    def totals(self):
+        """total events of every series"""
+        return self.counts.sum(axis=1)
+
+    def rate(self, per=1.0):
+        """events per `per` seconds in every bucket"""
+        durations = self.durations
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return numpy.where(durations > 0, self.counts * per / durations, numpy.nan)
+
+    def delta(self):
+        """change in events from the previous bucket (nan for the first one)"""
+        result = numpy.full_like(self.counts, numpy.nan)
+        result[:, 1:] = numpy.diff(self.counts, axis=1)
+        return result
+
+    def ewma(self, alpha=None, span=None):
+        """
+        exponentially weighted moving average of the counts, with a smoothing
+        factor `alpha`, or one derived from a `span` of buckets
+        """
+        if alpha is None:
+            if span is None:
+                raise ValueError("ewma needs either alpha or span")
+            alpha = 2.0 / (span + 1.0)
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        result = numpy.empty_like(self.counts)
+        if not self.counts.size:
+            return result
+        result[:, 0] = self.counts[:, 0]
+        # vectorized across every series, one bucket at a time
+        for column in range(1, self.counts.shape[1]):
+            result[:, column] = (
+                alpha * self.counts[:, column] + (1 - alpha) * result[:, column - 1]
+            )
+        return result
+
+    def zscores(self, window=None, min_std=1.0):
+        """
+        z-score of every bucket against the mean and standard deviation of the
+        `window` buckets before it (or all of them), nan where there's no history.
+        the deviation is floored at `min_std`, so a burst after a flat series still
+        stands out
+        """
+        columns = self.counts.shape[1]
+        padded = numpy.zeros((len(self.keys), columns + 1))
+        padded_squares = numpy.zeros_like(padded)
+        numpy.cumsum(self.counts, axis=1, out=padded[:, 1:])
+        numpy.cumsum(self.counts ** 2, axis=1, out=padded_squares[:, 1:])
+        ends = numpy.arange(columns)
+        starts = ends - window if window else numpy.zeros(columns, dtype=int)
+        starts = numpy.maximum(starts, 0)
+        seen = (ends - starts).astype(float)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            mean = (padded[:, ends] - padded[:, starts]) / seen
+            squares = (padded_squares[:, ends] - padded_squares[:, starts]) / seen
+            std = numpy.sqrt(numpy.maximum(squares - mean ** 2, 0))
+            scores = (self.counts - mean) / numpy.maximum(std, min_std)
+        scores[:, seen == 0] = numpy.nan
+        return scores
+
+    def spikes(self, threshold=DEFAULT_ZSCORE_THRESHOLD, window=None, min_events=1):
+        """boolean matrix of the buckets whose z-score reaches the threshold"""
+        scores = self.zscores(window=window)
+        with numpy.errstate(invalid="ignore"):
+            return (scores >= threshold) & (self.counts >= min_events)
+
+    def spiking(self, threshold=DEFAULT_ZSCORE_THRESHOLD, window=None, min_events=1):
+        """keys of the series whose latest bucket is a spike"""
+        if not self.counts.size:
+            return []
+        latest = self.spikes(threshold, window=window, min_events=min_events)[:, -1]
+        return [self.keys[x] for x in numpy.flatnonzero(latest)]
+
+    def to_dataframe(self):
+        """the counts as a pandas DataFrame, with a column per series"""
+        if pandas is None:
+            raise MissingDependency("pandas is required for to_dataframe")
+        columns = [getattr(x, "id", x) for x in self.keys]
+        return pandas.DataFrame(
+            self.counts.T, index=pandas.DatetimeIndex(self.starts), columns=columns
+        )
+
+
+def fetch_trends(items, buckets_count=None, resolution=None, max_workers=None):
+    """
+    fetches the trends of many errors (or projects) concurrently with client.map,
+    returning a TrendMatrix keyed by item. trends are bucketed by `resolution` if
+    one is given, else into `buckets_count` buckets. items whose fetch failed are
+    left out, and listed in the matrix's `failed` MapResults
+    """
+    items = list(items)
+    if not items:
+        return TrendMatrix.from_buckets([])
+    if resolution is not None:
+        fetch = methodcaller("get_trend_resolution", resolution)
+    elif buckets_count is not None:
+        fetch = methodcaller("get_trend_buckets", buckets_count)
+    else:
+        fetch = methodcaller("get_trend_buckets")
+    results = list(items[0]._client.map(fetch, items, max_workers=max_workers))
+    order = {id(x): index for index, x in enumerate(items)}
+    results.sort(key=lambda x: order[id(x.item)])
+    matrix = TrendMatrix.from_buckets(
+        [(x.item, x.result) for x in results if x.error is None]
+    )
+    matrix.failed = [x for x in results if x.error is not None]
+    return matrix
@@ -0,0 +1,400 @@
+"""
+http response caching utilities
+"""
+import abc
+import fnmatch
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from pybugsnag.utils.text import canonical_query
+
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+def normalize_url(url):
+    """normalizes a url into a cache key, ordering its query params"""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.urlencode(
+        canonical_query(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    )
+    return urllib.parse.urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, query, "")
+    )
+
+
+class CacheEntry:
+    """a decoded response body along with the validators needed to revalidate it"""
+
+    __slots__ = ("url", "data", "etag", "last_modified", "links", "stored_at")
+
+    def __init__(self, url, data, etag=None, last_modified=None, links=None):
+        """constructor"""
+        self.url = url
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.links = links or {}
+        self.stored_at = time.time()
+
+    @classmethod
+    def from_response(cls, url, response, loads=json.loads):
+        """decodes a response into a cache entry"""
+        return cls(
+            url,
+            loads(response.content),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            links=response.links,
+        )
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        """loads an entry serialized with to_dict"""
+        entry = cls(
+            dictionary["url"],
+            dictionary["data"],
+            etag=dictionary["etag"],
+            last_modified=dictionary["last_modified"],
+            links=dictionary["links"],
+        )
+        entry.stored_at = dictionary["stored_at"]
+        return entry
+
+    def to_dict(self):
+        """serializes this entry for storage outside of the process"""
+        return {x: getattr(self, x) for x in self.__slots__}
+
+    @property
+    def age(self):
+        """seconds since this entry was stored or last revalidated"""
+        return time.time() - self.stored_at
+
+    @property
+    def next_url(self):
+        """the rel="next" link of this response, if any"""
+        return self.links.get("next", {}).get("url")
+
+
+class CacheBackend(abc.ABC):
+    """
+    interface for cache storage backends
+
+    values are stored by key with an optional ttl in seconds, after which they are
+    treated as missing. backends count their own hits and misses
+    """
+
+    def __init__(self, ttl=None):
+        """constructor"""
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @abc.abstractmethod
+    def __len__(self):
+        """number of stored values"""
+
+    @abc.abstractmethod
+    def get(self, key):
+        """gets a value by key, or None if it is missing or expired"""
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl=None):
+        """stores a value by key"""
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """removes a value by key"""
+
+    @abc.abstractmethod
+    def clear(self):
+        """removes every value"""
+
+    def _expires_at(self, ttl):
+        """the expiry timestamp for a value stored now"""
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl is not None else None
+
+    def _count(self, value):
+        """counts a lookup as a hit or a miss"""
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    @property
+    def metrics(self):
+        """counters for the backend"""
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+class MemoryCache(CacheBackend):
+    """in-process LRU cache backend, bounded by number of entries"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, ttl=None):
+        """constructor"""
+        super(MemoryCache, self).__init__(ttl=ttl)
+        self.max_entries = max_entries
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """number of stored values"""
+        return len(self._values)
+
+    def get(self, key):
+        """gets a value by key, or None if it is missing or expired"""
+        with self._lock:
+            stored = self._values.get(key)
+            if stored is not None and stored[1] is not None and stored[1] < time.time():
+                del self._values[key]
+                stored = None
+            if stored is not None:
+                self._values.move_to_end(key)
+            return self._count(stored[0] if stored is not None else None)
+
+    def set(self, key, value, ttl=None):
+        """stores a value by key, evicting the least recently used ones"""
+        with self._lock:
+            self._values[key] = (value, self._expires_at(ttl))
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def delete(self, key):
+        """removes a value by key"""
+        with self._lock:
+            self._values.pop(key, None)
+
+    def clear(self):
+        """removes every value"""
+        with self._lock:
+            self._values.clear()
+
+
+class SQLiteCache(CacheBackend):
+    """
+    on-disk cache backend, so short-lived processes can share warm responses
+
+    entries are evicted least recently used first once there are more than
+    `max_entries` of them, or once they take more than `max_bytes` in total
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS cache ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+        "expires_at REAL, accessed_at REAL NOT NULL)"
+    )
+
+    def __init__(self, path, max_entries=DEFAULT_CACHE_SIZE, max_bytes=None, ttl=None):
+        """constructor"""
+        super(SQLiteCache, self).__init__(ttl=ttl)
+        self.path = os.path.expanduser(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(self.SCHEMA)
+
+    def __len__(self):
+        """number of stored values"""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _dumps(self, value):
+        """serializes a value"""
+        if isinstance(value, CacheEntry):
+            value = {"__entry__": value.to_dict()}
+        return json.dumps(value)
+
+    def _loads(self, text):
+        """deserializes a value"""
+        value = json.loads(text)
+        if isinstance(value, dict) and "__entry__" in value:
+            return CacheEntry.from_dict(value["__entry__"])
+        return value
+
+    def get(self, key):
+        """gets a value by key, or None if it is missing or expired"""
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] < now:
+                self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return self._count(self._loads(row[0]) if row is not None else None)
+
+    def set(self, key, value, ttl=None):
+        """stores a value by key, evicting the least recently used ones"""
+        text = self._dumps(value)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                (key, text, len(text), self._expires_at(ttl), time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        """drops expired values, then the least recently used over the limits"""
+        self._connection.execute(
+            "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?",
+            (time.time(),),
+        )
+        self._connection.execute(
+            "DELETE FROM cache WHERE key NOT IN "
+            "(SELECT key FROM cache ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+        if self.max_bytes is None:
+            return
+        total = self._connection.execute("SELECT SUM(size) FROM cache").fetchone()[0]
+        rows = self._connection.execute(
+            "SELECT key, size FROM cache ORDER BY accessed_at ASC"
+        ).fetchall()
+        for key, size in rows:
+            if not total or total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+
+    def delete(self, key):
+        """removes a value by key"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """removes every value"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM cache")
+
+    def close(self):
+        """closes the database connection"""
+        self._connection.close()
+
+
+class ResponseCache:
+    """
+    cache of GET responses, using http conditional requests
+
+    an entry younger than its endpoint's ttl is served without a request at all.
+    older entries are revalidated with If-None-Match / If-Modified-Since, and a
+    304 reuses the stored body instead of downloading it again. with the default
+    in-memory backend the body isn't even parsed again.
+
+    `ttls` maps path patterns (fnmatch-style, relative to the api url and without
+    the query string) to ttls in seconds, e.g. {"projects/*/trend": 60}. entries are
+    stored in `backend`, keyed by their normalized url within a `namespace`, so
+    clients with different tokens sharing a backend never see each other's entries
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, ttl=0, ttls=None, backend=None):
+        """constructor"""
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        if backend is None:
+            backend = MemoryCache(max_entries=max_entries)
+        self.backend = backend
+        self._lock = threading.Lock()
+
+        # metrics
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def __len__(self):
+        """number of cached entries"""
+        return len(self.backend)
+
+    def ttl_for(self, url):
+        """the ttl for the endpoint of the given url"""
+        path = urllib.parse.urlsplit(url).path.strip("/")
+        for pattern in self.ttls:
+            if fnmatch.fnmatch(path, pattern.strip("/")):
+                return self.ttls[pattern]
+        return self.ttl
+
+    @staticmethod
+    def key(url, namespace=None):
+        """the backend key of a url, within a namespace"""
+        url = normalize_url(url)
+        return url if namespace is None else "{}:{}".format(namespace, url)
+
+    def get(self, url, namespace=None):
+        """gets an entry by url, fresh or not"""
+        return self.backend.get(self.key(url, namespace))
+
+    def lookup(self, url, namespace=None):
+        """
+        gets an entry by url with a single backend read, along with whether it can
+        be used without revalidation
+        """
+        entry = self.get(url, namespace=namespace)
+        fresh = entry is not None and entry.age < self.ttl_for(url)
+        if fresh:
+            with self._lock:
+                self.hits += 1
+        return entry, fresh
+
+    def get_fresh(self, url, namespace=None):
+        """gets an entry by url, only if it can be used without revalidation"""
+        entry, fresh = self.lookup(url, namespace=namespace)
+        return entry if fresh else None
+
+    def set(self, url, entry, namespace=None):
+        """stores an entry"""
+        self.backend.set(self.key(url, namespace), entry)
+
+    def clear(self):
+        """drops every entry"""
+        self.backend.clear()
+
+    @staticmethod
+    def conditional_headers(entry):
+        """the conditional request headers to revalidate an entry"""
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def update(self, url, response, stale=None, loads=json.loads, namespace=None):
+        """resolves a response against the stale entry it was revalidating"""
+        if response.status_code == 304 and stale is not None:
+            stale.stored_at = time.time()
+            with self._lock:
+                self.revalidations += 1
+            self.set(url, stale, namespace=namespace)
+            return stale
+        with self._lock:
+            self.misses += 1
+        entry = CacheEntry.from_response(url, response, loads=loads)
+        cacheable = entry.etag or entry.last_modified or self.ttl_for(url) > 0
+        if response.status_code == 200 and cacheable:
+            self.set(url, entry, namespace=namespace)
+        return entry
+
+    @property
+    def metrics(self):
+        """counters for the cache"""
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "backend": self.backend.metrics,
+        }
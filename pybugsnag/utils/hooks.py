@@ -0,0 +1,247 @@
+"""
+request lifecycle hooks and an in-process metrics collector
+"""
+import itertools
+import threading
+import urllib.parse
+from collections import namedtuple
+from functools import lru_cache
+
+
+BEFORE_REQUEST = "before_request"
+AFTER_RESPONSE = "after_response"
+ERROR = "error"
+RETRY = "retry"
+CACHE_HIT = "cache_hit"
+EVENTS = (BEFORE_REQUEST, AFTER_RESPONSE, ERROR, RETRY, CACHE_HIT)
+
+# collections of the api, whose next path segment is an id
+COLLECTIONS = {
+    "collaborators",
+    "errors",
+    "events",
+    "organizations",
+    "pivots",
+    "projects",
+    "releases",
+    "release_groups",
+}
+# segments that follow a collection without being an id
+ACTIONS = {"latest_event"}
+ID_PLACEHOLDER = "{id}"
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+RequestEvent = namedtuple(
+    "RequestEvent",
+    [
+        "event",
+        "method",
+        "url",
+        "endpoint",
+        "request_id",
+        "attempt",
+        "status",
+        "duration",
+        "elapsed",
+        "size",
+        "delay",
+        "exception",
+    ],
+)
+RequestEvent.__new__.__defaults__ = (None,) * 8
+
+
+@lru_cache(maxsize=1024)
+def endpoint_template(url):
+    """
+    turns a url into the template of its endpoint, replacing ids with a placeholder,
+    so that metrics group requests by endpoint rather than by resource
+    """
+    segments = urllib.parse.urlsplit(url).path.strip("/").split("/")
+    for index in range(1, len(segments)):
+        if segments[index - 1] in COLLECTIONS and segments[index] not in ACTIONS:
+            segments[index] = ID_PLACEHOLDER
+    return "/".join(segments)
+
+
+class Hooks:
+    """
+    registry of handlers for the lifecycle events of a client's requests
+
+    every handler is called with a RequestEvent. before_request, after_response and
+    error fire for every attempt, retry fires when an attempt is about to be
+    retried, and cache_hit when a fresh cached response is used without a request
+    """
+
+    def __init__(self):
+        """constructor"""
+        self._handlers = {x: [] for x in EVENTS}
+        self._ids = itertools.count(1)
+
+    def register(self, event, handler=None):
+        """registers a handler for an event, usable as a decorator"""
+        if event not in self._handlers:
+            raise ValueError("unknown hook event '{}'".format(event))
+        if handler is None:
+            return lambda handler: self.register(event, handler)
+        self._handlers[event].append(handler)
+        return handler
+
+    def unregister(self, event, handler):
+        """removes a handler for an event"""
+        self._handlers[event].remove(handler)
+
+    def listening(self, event):
+        """whether anything is registered for an event"""
+        return bool(self._handlers[event])
+
+    def next_id(self):
+        """a new id tying the events of one attempt together"""
+        return next(self._ids)
+
+    def emit(self, event, method, url, **kwargs):
+        """calls the handlers of an event"""
+        handlers = self._handlers[event]
+        if not handlers:
+            return
+        payload = RequestEvent(
+            event, method.upper(), url, endpoint_template(url), **kwargs
+        )
+        for handler in handlers:
+            handler(payload)
+
+
+class EndpointMetrics:
+    """counters and a latency histogram for one endpoint"""
+
+    def __init__(self):
+        """constructor"""
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.statuses = {}
+
+    def observe(self, duration):
+        """adds a latency to the histogram"""
+        self.latency_sum += duration
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if duration <= bound:
+                self.latency_buckets[index] += 1
+                return
+        self.latency_buckets[-1] += 1
+
+    def quantile(self, fraction):
+        """
+        estimates a latency quantile from the histogram, as the upper bound of the
+        bucket it falls in (None if it falls in the unbounded one)
+        """
+        total = sum(self.latency_buckets)
+        if not total:
+            return None
+        seen = 0
+        for index, count in enumerate(self.latency_buckets[:-1]):
+            seen += count
+            if seen >= fraction * total:
+                return LATENCY_BUCKETS[index]
+        return None
+
+    def to_dict(self):
+        """a snapshot of the metrics"""
+        observed = sum(self.latency_buckets)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache_hits": self.cache_hits,
+            "bytes": self.bytes,
+            "statuses": dict(self.statuses),
+            "latency_mean": self.latency_sum / observed if observed else None,
+            "latency_p50": self.quantile(0.5),
+            "latency_p95": self.quantile(0.95),
+            "latency_p99": self.quantile(0.99),
+            "latency_buckets": dict(
+                zip(LATENCY_BUCKETS + (float("inf"),), self.latency_buckets)
+            ),
+        }
+
+
+class MetricsCollector:
+    """
+    in-process metrics for a client's requests, grouped by method and endpoint
+    template: request, error, retry and cache hit counts, response bytes, statuses
+    and a latency histogram per attempt
+    """
+
+    def __init__(self):
+        """constructor"""
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def attach(self, hooks):
+        """registers the collector's handlers on a client's hooks"""
+        hooks.register(AFTER_RESPONSE, self._on_response)
+        hooks.register(ERROR, self._on_error)
+        hooks.register(RETRY, self._on_retry)
+        hooks.register(CACHE_HIT, self._on_cache_hit)
+        return self
+
+    def _endpoint(self, event):
+        """metrics of the endpoint of an event, to be used under the lock"""
+        key = "{} {}".format(event.method, event.endpoint)
+        metrics = self._endpoints.get(key)
+        if metrics is None:
+            metrics = self._endpoints[key] = EndpointMetrics()
+        return metrics
+
+    def _on_response(self, event):
+        """counts a response"""
+        with self._lock:
+            metrics = self._endpoint(event)
+            metrics.requests += 1
+            metrics.bytes += event.size or 0
+            metrics.statuses[event.status] = metrics.statuses.get(event.status, 0) + 1
+            if event.status >= 400:
+                metrics.errors += 1
+            metrics.observe(event.duration)
+
+    def _on_error(self, event):
+        """counts a request that failed without a response"""
+        with self._lock:
+            metrics = self._endpoint(event)
+            metrics.requests += 1
+            metrics.errors += 1
+            metrics.observe(event.duration)
+
+    def _on_retry(self, event):
+        """counts a retry"""
+        with self._lock:
+            self._endpoint(event).retries += 1
+
+    def _on_cache_hit(self, event):
+        """counts a response served from the cache"""
+        with self._lock:
+            self._endpoint(event).cache_hits += 1
+
+    def snapshot(self):
+        """the metrics of every endpoint, keyed like 'GET projects/{id}/errors'"""
+        with self._lock:
+            return {x: self._endpoints[x].to_dict() for x in sorted(self._endpoints)}
+
+    def slowest(self, count=5):
+        """the endpoints with the highest mean latency"""
+        snapshot = self.snapshot()
+        timed = [x for x in snapshot if snapshot[x]["latency_mean"] is not None]
+        timed.sort(key=lambda x: snapshot[x]["latency_mean"], reverse=True)
+        return timed[:count]
+
+    def reset(self):
+        """forgets everything collected so far"""
+        with self._lock:
+            self._endpoints = {}
@@ -0,0 +1,133 @@
+"""
+client-side rate limiting utilities
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+RATE_LIMIT_WINDOW = 60
+LIMIT_HEADER = "X-RateLimit-Limit"
+REMAINING_HEADER = "X-RateLimit-Remaining"
+RETRY_AFTER_HEADER = "Retry-After"
+
+
+def parse_retry_after(value):
+    """parses a Retry-After header (seconds or an http date) into seconds to wait"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class RateLimiter:
+    """
+    token bucket limiter that paces requests before the server starts rejecting them
+
+    the bucket refills at `rate` tokens per `window` seconds. if no rate is given,
+    it is learned from the X-RateLimit-Limit header of the first response. the
+    remaining quota and any Retry-After are synced from every response.
+
+    callers reserve a token under a lock and then sleep outside of it, so the same
+    limiter is safe to share between threads and asyncio tasks
+    """
+
+    def __init__(self, rate=None, window=RATE_LIMIT_WINDOW, capacity=None):
+        """constructor"""
+        self.window = window
+        self.rate = None
+        self.capacity = None
+        self._learn_rate = rate is None
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        if rate is not None:
+            self._set_rate(rate, capacity)
+
+        # metrics
+        self.requests = 0
+        self.throttled_requests = 0
+        self.throttled_time = 0.0
+
+    def _set_rate(self, rate, capacity=None):
+        """sets the refill rate, starting with a full bucket"""
+        self.rate = rate
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+
+    @property
+    def fill_rate(self):
+        """tokens added per second"""
+        return self.rate / self.window if self.rate else None
+
+    def _refill(self, now):
+        """adds the tokens earned since the last refill"""
+        if self.fill_rate:
+            elapsed = now - self._updated_at
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.fill_rate)
+        self._updated_at = now
+
+    def reserve(self):
+        """takes a token from the bucket, returning how long to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self._blocked_until - now)
+            if self.fill_rate:
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.fill_rate)
+            self.requests += 1
+            if wait > 0:
+                self.throttled_requests += 1
+                self.throttled_time += wait
+            return wait
+
+    def acquire(self):
+        """blocks until a request is allowed, returning the time spent throttled"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """waits until a request is allowed, returning the time spent throttled"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, headers):
+        """syncs the bucket with the quota headers of a response"""
+        limit = headers.get(LIMIT_HEADER)
+        remaining = headers.get(REMAINING_HEADER)
+        retry_after = parse_retry_after(headers.get(RETRY_AFTER_HEADER))
+        with self._lock:
+            now = time.monotonic()
+            if limit is not None and self._learn_rate:
+                limit = int(limit)
+                if limit > 0 and limit != self.rate:
+                    self._set_rate(limit)
+            self._refill(now)
+            if remaining is not None and self.fill_rate:
+                self._tokens = min(self._tokens, float(remaining))
+            if retry_after is not None:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    @property
+    def metrics(self):
+        """counters for the time spent throttled"""
+        return {
+            "requests": self.requests,
+            "throttled_requests": self.throttled_requests,
+            "throttled_time": self.throttled_time,
+        }
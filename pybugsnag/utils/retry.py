@@ -0,0 +1,75 @@
+"""
+retry policies for transient request failures
+"""
+import random
+from collections import namedtuple
+from pybugsnag.utils.ratelimit import RETRY_AFTER_HEADER, parse_retry_after
+
+
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD"])
+
+
+RetryAttempt = namedtuple(
+    "RetryAttempt",
+    ["method", "url", "attempt", "delay", "status", "exception", "elapsed"],
+)
+
+
+class RetryPolicy:
+    """
+    exponential backoff with full jitter
+
+    an attempt is retried if its method is retryable and it either failed to
+    connect (status is None) or came back with a retryable status. the delay is
+    the server's Retry-After when there is one, and otherwise a random value
+    between zero and min(backoff_cap, backoff_base * 2 ** (attempt - 1))
+    """
+
+    def __init__(
+        self,
+        max_attempts=3,
+        backoff_base=0.5,
+        backoff_cap=30.0,
+        jitter=True,
+        retry_statuses=RETRYABLE_STATUSES,
+        retry_methods=IDEMPOTENT_METHODS,
+        respect_retry_after=True,
+        on_retry=None,
+    ):
+        """constructor"""
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(x.upper() for x in retry_methods)
+        self.respect_retry_after = respect_retry_after
+        self.on_retry = on_retry
+
+    def should_retry(self, method, attempt, status=None):
+        """whether the given attempt should be retried"""
+        if attempt >= self.max_attempts or method.upper() not in self.retry_methods:
+            return False
+        return status is None or status in self.retry_statuses
+
+    def backoff(self, attempt):
+        """the backoff before the next attempt, with full jitter"""
+        ceiling = min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling) if self.jitter else ceiling
+
+    def delay(self, attempt, headers=None):
+        """the delay before the next attempt, honoring Retry-After"""
+        if self.respect_retry_after and headers is not None:
+            retry_after = parse_retry_after(headers.get(RETRY_AFTER_HEADER))
+            if retry_after is not None:
+                return retry_after
+        return self.backoff(attempt)
+
+    def report(self, retry_attempt):
+        """hands a retry attempt to the on_retry hook"""
+        if self.on_retry is not None:
+            self.on_retry(retry_attempt)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,47 @@
+"""
+pluggable json backends for decoding responses and serializing models
+"""
+import json
+from collections import namedtuple
+from pybugsnag.models.error import MissingDependency
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+JSONBackend = namedtuple("JSONBackend", ["name", "loads", "dumps"])
+
+
+def _orjson_dumps(value):
+    """orjson serializes to bytes"""
+    return orjson.dumps(value).decode("utf-8")
+
+
+STDLIB = JSONBackend("json", json.loads, json.dumps)
+BACKENDS = {"json": STDLIB}
+if orjson is not None:
+    BACKENDS["orjson"] = JSONBackend("orjson", orjson.loads, _orjson_dumps)
+if ujson is not None:
+    BACKENDS["ujson"] = JSONBackend("ujson", ujson.loads, ujson.dumps)
+PREFERENCE = ["orjson", "ujson", "json"]
+
+
+def get_json_backend(backend=None):
+    """
+    gets a json backend by name, or the fastest one installed if no name is given.
+    a JSONBackend (or anything with loads/dumps) is returned as-is
+    """
+    if backend is None:
+        return next(BACKENDS[x] for x in PREFERENCE if x in BACKENDS)
+    if not isinstance(backend, str):
+        return backend
+    if backend not in BACKENDS:
+        raise MissingDependency("json backend '{}' is not installed".format(backend))
+    return BACKENDS[backend]
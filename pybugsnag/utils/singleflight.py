@@ -0,0 +1,86 @@
+"""
+single-flight deduplication of identical in-flight calls
+"""
+import asyncio
+import threading
+
+
+class _Call:
+    """an in-flight call, awaited by the callers that joined it"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        """constructor"""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    shares one in-flight call between concurrent callers with the same key
+
+    the first caller for a key runs the call, and callers arriving while it's in
+    flight wait for it and get the same result (or exception) instead of making the
+    call again. once it completes the key is forgotten, so later callers make a new
+    call. do() is for threads and do_async() for asyncio tasks
+    """
+
+    def __init__(self):
+        """constructor"""
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+
+        # metrics
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """calls func, unless a call for the same key is in flight, and joins it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, func):
+        """awaits func(), unless a call for the same key is in flight, and joins it"""
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = self._tasks[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        # a cancelled caller doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self):
+        """number of calls in flight"""
+        return len(self._calls) + len(self._tasks)
+
+    @property
+    def metrics(self):
+        """counters for the calls made and the calls coalesced into them"""
+        return {"calls": self.calls, "coalesced": self.coalesced}
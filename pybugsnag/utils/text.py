@@ -2,22 +2,42 @@
 text manipulation utilities
 """
 import re
-from datetime import datetime
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 
+SNAKEIFY_CACHE_SIZE = 4096
+QUERY_CACHE_SIZE = 1024
 DATE_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 DATE_FORMAT_MILLIS = "%Y-%m-%dT%H:%M:%S.%fZ"
 FIRST_CAP = re.compile("(.)([A-Z][a-z]+)")
 ALL_CAP = re.compile("([a-z0-9])([A-Z])")
 LOCALS_FILTER = ["self", "kwargs"]
+ISO8601 = re.compile(
+    r"(?P<year>\d{4})-?(?P<month>\d{2})-?(?P<day>\d{2})[T ]"
+    r"(?P<hour>\d{2}):?(?P<minute>\d{2})"
+    r"(?::?(?P<second>\d{2})(?:[.,](?P<fraction>\d+))?)?"
+    r"(?P<offset>[+-](?P<offset_hours>\d{2}):?(?P<offset_minutes>\d{2})?)?$"
+)
 
 
+@lru_cache(maxsize=SNAKEIFY_CACHE_SIZE)
 def snakeify(text):
-    """camelCase to snake_case"""
+    """camelCase to snake_case, memoized since payloads repeat the same keys"""
     first_string = FIRST_CAP.sub(r"\1_\2", text)
     return ALL_CAP.sub(r"\1_\2", first_string).lower()
 
 
+def snakeify_keys(value):
+    """recursively converts the keys of nested dicts to snake_case"""
+    if isinstance(value, dict):
+        return {snakeify(x): snakeify_keys(value[x]) for x in value}
+    if isinstance(value, list):
+        return [snakeify_keys(x) for x in value]
+    return value
+
+
 def filter_locals(local_variables, extras=None):
     """filters out builtin variables in the local scope and returns locals as a dict"""
     var_filter = LOCALS_FILTER.copy()
@@ -35,20 +55,130 @@ def datetime_to_iso8601(date_object, milliseconds=False):
     return date_object.strftime(DATE_FORMAT_MILLIS if milliseconds else DATE_FORMAT)
 
 
-def iso8601_to_datetime(date_string, milliseconds=False):
-    """converts a iso8601 string to a python datetime"""
-    return datetime.strptime(
-        date_string, DATE_FORMAT_MILLIS if milliseconds else DATE_FORMAT
+# the fast path of iso8601_to_datetime, only available from python 3.7
+FROMISOFORMAT = getattr(datetime, "fromisoformat", None)
+
+
+def iso8601_to_datetime(date_string, milliseconds=None):
+    """
+    converts a iso8601 string to a naive utc python datetime
+
+    both of the formats bugsnag uses (with or without milliseconds) are accepted
+    regardless of `milliseconds`, as are utc offsets, which are converted to utc
+    """
+    if date_string is None or isinstance(date_string, datetime):
+        return date_string
+    if date_string[-1:] in ("Z", "z"):
+        date_string = date_string[:-1] + "+00:00"
+    date = None
+    if FROMISOFORMAT is not None:
+        try:
+            date = FROMISOFORMAT(date_string)
+        except ValueError:
+            pass
+    if date is None:
+        date = _parse_iso8601(date_string)
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def _parse_iso8601(date_string):
+    """slower fallback for the iso8601 variants fromisoformat can't handle"""
+    match = ISO8601.match(date_string)
+    if not match:
+        raise ValueError("invalid iso8601 timestamp: '{}'".format(date_string))
+    parts = match.groupdict()
+    date = datetime(
+        int(parts["year"]),
+        int(parts["month"]),
+        int(parts["day"]),
+        int(parts["hour"]),
+        int(parts["minute"]),
+        int(parts["second"] or 0),
+        int((parts["fraction"] or "0")[:6].ljust(6, "0")),
     )
+    if parts["offset"]:
+        sign = -1 if parts["offset"][0] == "-" else 1
+        offset = timedelta(
+            hours=int(parts["offset_hours"]), minutes=int(parts["offset_minutes"] or 0)
+        )
+        date = date.replace(tzinfo=timezone(sign * offset))
+    return date
+
+
+def query_value(value):
+    """formats a single query param value the way bugsnag wants it"""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, datetime):
+        return datetime_to_iso8601(value)
+    return str(value)
+
+
+def query_pairs(params):
+    """
+    expands query params into (key, value) pairs. lists become repeated params,
+    objects with a to_params() method (like filters) expand into their own pairs,
+    and None values are dropped
+    """
+    pairs = []
+    for key, value in params:
+        if value is None:
+            continue
+        if hasattr(value, "to_params"):
+            pairs.extend(value.to_params())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            pairs.extend((key, query_value(x)) for x in value)
+        else:
+            pairs.append((key, query_value(value)))
+    return pairs
+
+
+def canonical_query(pairs):
+    """
+    orders query pairs by param name, keeping the order of the pairs within a name.
+    array params are ordered by their name up to the first "[]", so the type and
+    value pairs of filters[field][][type] and filters[field][][value] stay paired
+    """
+    return sorted(pairs, key=lambda x: x[0].split("[]", 1)[0])
+
+
+def _typed(value):
+    """
+    a cache key for a param value that tells apart equal values of different types
+    (True, 1 and 1.0 hash alike, but don't format alike)
+    """
+    if isinstance(value, (tuple, frozenset)):
+        return type(value), tuple(_typed(x) for x in value)
+    return type(value), value
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_query_string(key, items):
+    """_query_string, memoized on the typed key of its items"""
+    return _query_string(items)
+
+
+def _query_string(items):
+    """encodes the items of a params dict into a canonical query string"""
+    pairs = canonical_query(query_pairs(items))
+    return "?{}".format(urllib.parse.urlencode(pairs)) if pairs else ""
 
 
 def dict_to_query_params(params):
-    """given a dictionary of query params, form the query param string"""
+    """
+    given a dictionary of query params, form the url-encoded query param string.
+    the dictionary isn't modified, and the result is canonical (params in order of
+    name), so it can serve as part of a cache key
+    """
     if not params:
         return ""
-    for param in params:
-        if isinstance(params[param], bool):
-            params[param] = str(params[param]).lower()
-        elif isinstance(params[param], datetime):
-            params[param] = datetime_to_iso8601(params[param])
-    return "?{}".format("&".join(["{}={}".format(x, params[x]) for x in params]))
+    items = tuple(params.items())
+    try:
+        key = tuple((x, _typed(y)) for x, y in items)
+        hash(key)
+    except TypeError:
+        # unhashable values, like lists, can't be cached
+        return _query_string(items)
+    return _cached_query_string(key, items)
@@ -45,12 +45,20 @@ setup(
     download_url="https://github.com/jpetrucciani/{}.git".format(LIBRARY),
     license="LICENSE",
     packages=find_packages(),
+    python_requires=">=3.6",
     install_requires=install_requires,
+    extras_require={
+        "async": ["httpx"],
+        "otel": ["opentelemetry-api"],
+        "parquet": ["pyarrow"],
+        "prometheus": ["prometheus_client"],
+        "trends": ["numpy"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.5",
         "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
     ],
     zip_safe=False,
 )